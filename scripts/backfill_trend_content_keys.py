@@ -0,0 +1,152 @@
+"""
+Add ad_trends.content_key to existing databases and make it unique.
+
+Bulk ingestion upserts with ON CONFLICT (content_key), which needs a unique
+index on the column; until this runs every write through
+bulk_insert_trends fails on databases whose ad_trends predates it.
+
+The column is added if missing and filled with trend_content_key(platform,
+trend_name) in batches of BATCH_SIZE. Rows sharing a key are then reduced
+to one, keeping the highest trend_score and then the newest captured_at,
+and the unique index is built. Each batch commits on its own, so the
+script can be stopped and rerun. Stop writers still running the previous
+release first: rows they add have no key, and duplicates written during
+the run make the index build fail (rerun to clean them up).
+
+A partitioned ad_trends enforces uniqueness through ad_trend_keys instead
+(scripts/partition_ad_trends.py); there only the backfill runs.
+
+Usage:
+    python scripts/backfill_trend_content_keys.py [DATABASE_URL]
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import bindparam, column, delete, func, inspect, select, table, text, update
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.config.settings import settings
+from src.db.models.intelligence import trend_content_key
+
+BATCH_SIZE = 1000
+INDEX_NAME = "uq_ad_trends_content_key"
+
+# Untyped columns: ids round-trip as stored whatever GUID layout the database
+# has, and the model's onupdate (updated_at, possibly not there yet) stays out
+trends = table(
+    "ad_trends",
+    column("id"), column("platform"), column("trend_name"),
+    column("trend_score"), column("captured_at"), column("content_key"),
+)
+
+
+def _describe(sync_conn, table_name):
+    """Column names and whether content_key is already unique, or None without the table."""
+    inspector = inspect(sync_conn)
+    if not inspector.has_table(table_name):
+        return None
+    columns = {c["name"] for c in inspector.get_columns(table_name)}
+    unique = any(
+        entry["column_names"] == ["content_key"]
+        for entry in inspector.get_unique_constraints(table_name)
+        + [i for i in inspector.get_indexes(table_name) if i["unique"]]
+    )
+    return columns, unique
+
+
+async def backfill(database_url: str) -> int:
+    engine = create_async_engine(database_url)
+    try:
+        async with engine.begin() as conn:
+            described = await conn.run_sync(_describe, trends.name)
+            if described is None:
+                print("ad_trends not found; the app creates it on startup.")
+                return 0
+            columns, unique = described
+            if "content_key" not in columns:
+                print("ad_trends.content_key: adding column")
+                await conn.execute(text("ALTER TABLE ad_trends ADD COLUMN content_key VARCHAR(64)"))
+            partitioned = False
+            if conn.dialect.name == "postgresql":
+                partitioned = (await conn.execute(text(
+                    "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('ad_trends')"
+                ))).scalar()
+
+        statement = (
+            update(trends)
+            .where(trends.c.id == bindparam("row_id"))
+            .values(content_key=bindparam("key"))
+        )
+        total = 0
+        while True:
+            async with engine.begin() as conn:
+                rows = (await conn.execute(
+                    select(trends.c.id, trends.c.platform, trends.c.trend_name)
+                    .where(trends.c.content_key.is_(None))
+                    .limit(BATCH_SIZE)
+                )).all()
+                if not rows:
+                    break
+                await conn.execute(statement, [
+                    {"row_id": row.id, "key": trend_content_key(row.platform, row.trend_name)}
+                    for row in rows
+                ])
+            total += len(rows)
+            print(f"ad_trends.content_key: {total} rows filled")
+
+        if partitioned:
+            print("ad_trends is partitioned; ad_trend_keys enforces uniqueness")
+            print("Done")
+            return 0
+        if unique:
+            print("ad_trends.content_key: already unique")
+            print("Done")
+            return 0
+
+        duplicated_keys = (
+            select(trends.c.content_key)
+            .group_by(trends.c.content_key)
+            .having(func.count() > 1)
+            .limit(BATCH_SIZE)
+        )
+        removed = 0
+        while True:
+            async with engine.begin() as conn:
+                keys = (await conn.execute(duplicated_keys)).scalars().all()
+                if not keys:
+                    break
+                rows = (await conn.execute(
+                    select(trends.c.id, trends.c.content_key)
+                    .where(trends.c.content_key.in_(keys))
+                    .order_by(
+                        trends.c.content_key,
+                        trends.c.trend_score.desc().nulls_last(),
+                        trends.c.captured_at.desc().nulls_last(),
+                        trends.c.id,
+                    )
+                )).all()
+                # First row per key is the one kept
+                kept, doomed = set(), []
+                for row in rows:
+                    if row.content_key in kept:
+                        doomed.append(row.id)
+                    else:
+                        kept.add(row.content_key)
+                for start in range(0, len(doomed), BATCH_SIZE):
+                    await conn.execute(delete(trends).where(trends.c.id.in_(doomed[start:start + BATCH_SIZE])))
+            removed += len(doomed)
+            print(f"ad_trends: {removed} duplicate rows removed")
+
+        print(f"{INDEX_NAME}: building")
+        async with engine.begin() as conn:
+            await conn.execute(text(f"CREATE UNIQUE INDEX {INDEX_NAME} ON ad_trends (content_key)"))
+        print("Done")
+    finally:
+        await engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(backfill(sys.argv[1] if len(sys.argv) > 1 else settings.DATABASE_URL)))
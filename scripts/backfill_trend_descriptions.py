@@ -0,0 +1,79 @@
+"""
+Fill ad_trends.description for rows written before the column existed.
+
+Listings select the description column as stored, so every row needs it
+resolved the way the write path does (trend_description). Databases whose
+ad_trends predates the column get it added first.
+
+Rows are updated in batches of BATCH_SIZE, each in its own transaction, so
+the script can run against a live database and be resumed at any point.
+
+Usage:
+    python scripts/backfill_trend_descriptions.py [DATABASE_URL]
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import bindparam, column, inspect, select, table, text, update
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.config.settings import settings
+from src.db.models.intelligence import AdTrend, trend_description
+
+BATCH_SIZE = 1000
+
+# Untyped id: it round-trips as stored whatever GUID layout the database has,
+# and the model's onupdate (updated_at, possibly not there yet) stays out
+trends = table(
+    "ad_trends",
+    column("id"), column("data", AdTrend.data.type), column("trend_type"),
+    column("industry"), column("description"),
+)
+
+
+async def backfill(database_url: str) -> int:
+    engine = create_async_engine(database_url)
+    try:
+        async with engine.begin() as conn:
+            columns = await conn.run_sync(
+                lambda sync_conn: {c["name"] for c in inspect(sync_conn).get_columns(trends.name)}
+                if inspect(sync_conn).has_table(trends.name) else None
+            )
+            if columns is None:
+                print("ad_trends not found; the app creates it on startup.")
+                return 0
+            if "description" not in columns:
+                print("ad_trends.description: adding column")
+                await conn.execute(text("ALTER TABLE ad_trends ADD COLUMN description VARCHAR"))
+
+        statement = (
+            update(trends)
+            .where(trends.c.id == bindparam("row_id"))
+            .values(description=bindparam("resolved"))
+        )
+        total = 0
+        while True:
+            async with engine.begin() as conn:
+                rows = (await conn.execute(
+                    select(trends.c.id, trends.c.data, trends.c.trend_type, trends.c.industry)
+                    .where(trends.c.description.is_(None))
+                    .limit(BATCH_SIZE)
+                )).all()
+                if not rows:
+                    break
+                await conn.execute(statement, [
+                    {"row_id": row.id, "resolved": str(trend_description(row.data, row.trend_type, row.industry))}
+                    for row in rows
+                ])
+            total += len(rows)
+            print(f"ad_trends.description: {total} rows filled")
+        print("Done")
+    finally:
+        await engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(backfill(sys.argv[1] if len(sys.argv) > 1 else settings.DATABASE_URL)))
@@ -0,0 +1,76 @@
+"""
+Add ad_trends.updated_at to existing databases and build its indexes.
+
+updated_at drives listing version tokens (ETag / Last-Modified), cached
+counts and incremental exports, so GET /api/v1/trends/ fails on databases
+whose ad_trends predates it.
+
+The column is added if missing and filled from captured_at, the best
+known write time for old rows, in batches of BATCH_SIZE. Each batch
+commits on its own, so the script can run against a live database and be
+resumed. ix_ad_trends_updated_at and ix_ad_trends_industry_platform_updated
+are then created unless they already exist.
+
+Usage:
+    python scripts/backfill_trend_updated_at.py [DATABASE_URL]
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import DateTime, func, inspect, select, text, update
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.config.settings import settings
+from src.db.models.intelligence import AdTrend
+
+BATCH_SIZE = 1000
+INDEXES = ("ix_ad_trends_updated_at", "ix_ad_trends_industry_platform_updated")
+
+
+async def backfill(database_url: str) -> int:
+    engine = create_async_engine(database_url)
+    table = AdTrend.__table__
+    try:
+        async with engine.begin() as conn:
+            columns = await conn.run_sync(
+                lambda sync_conn: {c["name"] for c in inspect(sync_conn).get_columns(table.name)}
+                if inspect(sync_conn).has_table(table.name) else None
+            )
+            if columns is None:
+                print("ad_trends not found; the app creates it on startup.")
+                return 0
+            if "updated_at" not in columns:
+                print("ad_trends.updated_at: adding column")
+                column_type = DateTime().compile(dialect=conn.dialect)
+                await conn.execute(text(f"ALTER TABLE ad_trends ADD COLUMN updated_at {column_type}"))
+
+        pending = select(table.c.id).where(table.c.updated_at.is_(None)).limit(BATCH_SIZE)
+        statement = (
+            update(table)
+            .where(table.c.id.in_(pending.scalar_subquery()))
+            .values(updated_at=func.coalesce(table.c.captured_at, func.current_timestamp()))
+        )
+        total = 0
+        while True:
+            async with engine.begin() as conn:
+                filled = (await conn.execute(statement)).rowcount
+            if not filled:
+                break
+            total += filled
+            print(f"ad_trends.updated_at: {total} rows filled")
+
+        for index in table.indexes:
+            if index.name in INDEXES:
+                print(f"{index.name}: building if missing")
+                async with engine.begin() as conn:
+                    await conn.run_sync(lambda sync_conn: index.create(sync_conn, checkfirst=True))
+        print("Done")
+    finally:
+        await engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(backfill(sys.argv[1] if len(sys.argv) > 1 else settings.DATABASE_URL)))
@@ -0,0 +1,150 @@
+"""
+Convert GUID columns from CHAR(32) hex to 16-byte binary on SQLite.
+
+GUID now stores ids as 16 raw bytes outside PostgreSQL. Rows written
+earlier hold 32-character hex text; they still load, but lookups and
+keyset pagination compare bytes, so legacy rows must be converted.
+
+Each table with GUID columns is rebuilt from the current model (SQLite
+cannot change a column type in place): the old table is renamed, the
+new one created with its indexes, rows copied with the ids converted in
+SQL, and the old table dropped, all in one transaction per table.
+PostgreSQL uses a native uuid column and needs nothing.
+
+Usage:
+    python scripts/migrate_guid_binary.py [DATABASE_URL] [--dry-run] [--no-vacuum]
+
+DATABASE_URL defaults to the application's setting. Stop writers first;
+the script is idempotent and skips tables that are already converted.
+Run scripts/migrate_winning_patterns.py before it: the rebuilt
+winning_patterns has the model's NOT NULL vertical and unique constraint.
+"""
+import argparse
+import os
+import sys
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from src.config.settings import settings
+from src.db.base import Base
+from src.db.models.intelligence import GUID
+
+LEGACY_SUFFIX = "__guid_legacy"
+
+
+def guid_blob(value):
+    """SQL function body: any stored GUID representation -> 16 bytes."""
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        if len(value) == 16:
+            return value
+        value = value.decode("ascii")
+    return uuid.UUID(value).bytes
+
+
+def guid_tables():
+    """(table, GUID column names) for every model table with GUID columns."""
+    for table in Base.metadata.sorted_tables:
+        columns = [column.name for column in table.columns if isinstance(column.type, GUID)]
+        if columns:
+            yield table, columns
+
+
+def legacy_rows(conn, table_name, columns) -> int:
+    condition = " OR ".join(f'typeof("{name}") = \'text\'' for name in columns)
+    return conn.execute(text(
+        f'SELECT count(*) FROM "{table_name}" WHERE {condition}'
+    )).scalar()
+
+
+def declared_types(conn, table_name):
+    return {row[1]: (row[2] or "").upper() for row in conn.execute(text(f'PRAGMA table_info("{table_name}")'))}
+
+
+def table_exists(conn, table_name) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": table_name}
+    ).first() is not None
+
+
+def rebuild_table(conn, table, guid_columns) -> int:
+    """Recreate one table with binary GUID columns and copy its rows across."""
+    legacy = table.name + LEGACY_SUFFIX
+    existing = declared_types(conn, table.name)
+    conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{legacy}"'))
+    # Index names are global in SQLite; the new table recreates them
+    for (index_name,) in conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table AND sql IS NOT NULL"
+    ), {"table": legacy}).all():
+        conn.execute(text(f'DROP INDEX "{index_name}"'))
+    table.create(conn)
+
+    # Columns the model gained since the table was created are left to their defaults
+    shared = [column.name for column in table.columns if column.name in existing]
+    targets = ", ".join(f'"{name}"' for name in shared)
+    sources = ", ".join(
+        f'guid_blob("{name}")' if name in guid_columns else f'"{name}"' for name in shared
+    )
+    copied = conn.execute(text(
+        f'INSERT INTO "{table.name}" ({targets}) SELECT {sources} FROM "{legacy}"'
+    )).rowcount
+    conn.execute(text(f'DROP TABLE "{legacy}"'))
+    return copied
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("database_url", nargs="?", default=settings.DATABASE_URL)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change")
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip reclaiming freed pages")
+    args = parser.parse_args()
+
+    url = make_url(args.database_url)
+    if url.get_backend_name() == "postgresql":
+        print("PostgreSQL stores GUIDs as native uuid; nothing to migrate.")
+        return 0
+    if url.get_backend_name() != "sqlite":
+        print(f"Unsupported backend '{url.get_backend_name()}'; only SQLite is migrated by this script.")
+        return 1
+
+    # The stdlib driver; the app's aiosqlite URL points at the same file. Transactions
+    # are issued explicitly: pysqlite would otherwise run the DDL outside of one
+    engine = create_engine(url.set(drivername="sqlite"), isolation_level="AUTOCOMMIT")
+    converted = 0
+    with engine.connect() as conn:
+        conn.connection.driver_connection.create_function("guid_blob", 1, guid_blob, deterministic=True)
+        for table, columns in guid_tables():
+            if not table_exists(conn, table.name):
+                continue
+            types = declared_types(conn, table.name)
+            pending = legacy_rows(conn, table.name, columns)
+            if pending == 0 and all(types.get(name) == "BLOB" for name in columns):
+                print(f"{table.name}: already binary")
+                continue
+            if args.dry_run:
+                print(f"{table.name}: would convert {pending} rows with hex GUIDs ({', '.join(columns)})")
+                continue
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                copied = rebuild_table(conn, table, columns)
+            except Exception:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+            conn.exec_driver_sql("COMMIT")
+            converted += 1
+            print(f"{table.name}: rebuilt, {copied} rows copied, {pending} GUIDs converted from hex")
+
+        if converted and not args.no_vacuum:
+            conn.execute(text("VACUUM"))
+            print("Vacuumed")
+    engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
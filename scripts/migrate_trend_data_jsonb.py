@@ -0,0 +1,87 @@
+"""
+Convert ad_trends.data to JSONB on PostgreSQL and build its GIN index.
+
+New databases get both from the model. Existing ones created the column as
+json, which has no containment operator, so metadata.<key>=<value> filters
+would fail there until this runs.
+
+The type change rewrites the table under an ACCESS EXCLUSIVE lock; run it
+in a quiet window. The index is then built CONCURRENTLY, without blocking
+writes. Both steps are skipped when already done. SQLite needs nothing:
+its filters use json_extract.
+
+Usage:
+    python scripts/migrate_trend_data_jsonb.py [DATABASE_URL]
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.config.settings import settings
+
+COLUMN_TYPE_SQL = text("""
+    SELECT data_type FROM information_schema.columns
+    WHERE table_name = 'ad_trends' AND column_name = 'data' AND table_schema = current_schema()
+""")
+
+ALTER_SQL = text("ALTER TABLE ad_trends ALTER COLUMN data TYPE jsonb USING data::jsonb")
+
+INDEX_SQL = text(
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ad_trends_data "
+    "ON ad_trends USING gin (data jsonb_path_ops)"
+)
+
+# A failed concurrent build leaves an INVALID index that IF NOT EXISTS would keep
+INDEX_VALID_SQL = text("""
+    SELECT i.indisvalid FROM pg_index i
+    WHERE i.indexrelid = to_regclass('ix_ad_trends_data')
+""")
+
+
+async def migrate(database_url: str) -> int:
+    url = make_url(database_url)
+    if url.get_backend_name() != "postgresql":
+        print(f"{url.get_backend_name()}: nothing to migrate; metadata filters use json_extract.")
+        return 0
+
+    engine = create_async_engine(
+        url.set(drivername="postgresql+asyncpg"),
+        isolation_level="AUTOCOMMIT",  # CREATE INDEX CONCURRENTLY cannot run in a transaction
+    )
+    try:
+        async with engine.connect() as conn:
+            data_type = (await conn.execute(COLUMN_TYPE_SQL)).scalar()
+            if data_type is None:
+                print("ad_trends.data not found; the app creates it as jsonb on startup.")
+                return 0
+            if data_type == "jsonb":
+                print("ad_trends.data: already jsonb")
+            else:
+                print(f"ad_trends.data: converting {data_type} -> jsonb")
+                await conn.execute(ALTER_SQL)
+
+            valid = (await conn.execute(INDEX_VALID_SQL)).scalar()
+            if valid:
+                # Also the case once ad_trends is partitioned, where CONCURRENTLY is not allowed
+                print("ix_ad_trends_data: already built")
+                print("Done")
+                return 0
+            if valid is False:
+                print("ix_ad_trends_data: dropping invalid index from an interrupted build")
+                await conn.execute(text("DROP INDEX CONCURRENTLY ix_ad_trends_data"))
+            print("ix_ad_trends_data: building (concurrently)")
+            await conn.execute(INDEX_SQL)
+            await conn.execute(text("ANALYZE ad_trends"))
+            print("Done")
+    finally:
+        await engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(migrate(sys.argv[1] if len(sys.argv) > 1 else settings.DATABASE_URL)))
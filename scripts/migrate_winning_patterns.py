@@ -0,0 +1,172 @@
+"""
+Bring winning_patterns up to the schema the pattern aggregator upserts into.
+
+The aggregator flushes with ON CONFLICT (pattern_type, value, vertical),
+which needs uq_winning_patterns_type_value_vertical, and writes
+updated_at. Databases whose winning_patterns predates both reject every
+flush until this runs.
+
+In one transaction:
+- updated_at is added if missing and filled from detected_at
+- rows are re-keyed the way the aggregator keys observations
+  (normalize_pattern_value, normalize_vertical; NULL vertical becomes
+  DEFAULT_VERTICAL), since NULLs never conflict
+- rows sharing a key are merged into the oldest one: source_count is
+  summed, performance_score becomes the source_count-weighted mean and
+  confidence_level is recomputed
+- vertical is made NOT NULL and the unique constraint and
+  ix_winning_patterns_vertical_count are added. SQLite cannot alter
+  columns or add constraints in place, so there the table is rebuilt from
+  the model and its rows copied across.
+
+Stop workers running the previous release first; the table is locked
+against writes while this runs, and a rerun skips what is already done.
+
+Usage:
+    python scripts/migrate_winning_patterns.py [DATABASE_URL]
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import DateTime, bindparam, column, delete, inspect, select, table, text, update
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.config.settings import settings
+from src.db.models.intelligence import WinningPattern
+from src.services.patterns.aggregator import normalize_pattern_value, normalize_vertical, pattern_confidence
+
+UNIQUE_NAME = "uq_winning_patterns_type_value_vertical"
+LEGACY_SUFFIX = "__legacy"
+
+# Untyped id: it round-trips as stored whatever GUID layout the database has
+patterns = table(
+    "winning_patterns",
+    column("id"), column("pattern_type"), column("value"), column("vertical"),
+    column("performance_score"), column("confidence_level"), column("source_count"),
+    column("detected_at"),
+)
+
+
+def merge_duplicates(conn) -> int:
+    """Re-key every row like the aggregator and fold rows sharing a key into one."""
+    rows = conn.execute(select(patterns).order_by(patterns.c.detected_at, patterns.c.id)).all()
+    groups = {}
+    for row in rows:
+        key = (row.pattern_type, normalize_pattern_value(row.value), normalize_vertical(row.vertical))
+        groups.setdefault(key, []).append(row)
+
+    merged, doomed = [], []
+    for (pattern_type, value, vertical), group in groups.items():
+        keeper = group[0]
+        if len(group) == 1:
+            if (keeper.value, keeper.vertical) != (value, vertical):
+                merged.append({"row_id": keeper.id, "value": value, "vertical": vertical})
+            continue
+        source_count = sum(row.source_count or 0 for row in group)
+        scored = [(row.performance_score, row.source_count or 0) for row in group if row.performance_score is not None]
+        weight = sum(count for _, count in scored)
+        merged.append({
+            "row_id": keeper.id,
+            "value": value,
+            "vertical": vertical,
+            "source_count": source_count,
+            "performance_score": (
+                sum(score * count for score, count in scored) / weight if weight else keeper.performance_score
+            ),
+            "confidence_level": pattern_confidence(source_count),
+        })
+        doomed.extend(row.id for row in group[1:])
+
+    if doomed:
+        conn.execute(delete(patterns).where(patterns.c.id.in_(doomed)))
+    for values in merged:
+        row_id = values.pop("row_id")
+        conn.execute(update(patterns).where(patterns.c.id == bindparam("row_id")).values(**values), {"row_id": row_id})
+    return len(doomed)
+
+
+def rebuild_sqlite(conn, existing) -> int:
+    """Recreate winning_patterns from the model and copy its rows across."""
+    model = WinningPattern.__table__
+    legacy = model.name + LEGACY_SUFFIX
+    conn.execute(text(f'ALTER TABLE "{model.name}" RENAME TO "{legacy}"'))
+    # Index names are global in SQLite; the new table recreates them
+    for (index_name,) in conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table AND sql IS NOT NULL"
+    ), {"table": legacy}).all():
+        conn.execute(text(f'DROP INDEX "{index_name}"'))
+    model.create(conn)
+    shared = ", ".join(f'"{c.name}"' for c in model.columns if c.name in existing)
+    copied = conn.execute(text(
+        f'INSERT INTO "{model.name}" ({shared}) SELECT {shared} FROM "{legacy}"'
+    )).rowcount
+    conn.execute(text(f'DROP TABLE "{legacy}"'))
+    return copied
+
+
+def migrate_table(conn) -> None:
+    model = WinningPattern.__table__
+    inspector = inspect(conn)
+    if not inspector.has_table(model.name):
+        print("winning_patterns not found; the app creates it on startup.")
+        return
+    columns = {c["name"]: c for c in inspector.get_columns(model.name)}
+    constrained = any(c["name"] == UNIQUE_NAME for c in inspector.get_unique_constraints(model.name))
+    if constrained and not columns["vertical"]["nullable"] and "updated_at" in columns:
+        print("winning_patterns: already migrated")
+        return
+
+    postgres = conn.dialect.name == "postgresql"
+    if postgres:
+        conn.execute(text("LOCK TABLE winning_patterns IN SHARE ROW EXCLUSIVE MODE"))
+
+    if "updated_at" not in columns:
+        print("winning_patterns.updated_at: adding column")
+        column_type = DateTime().compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE winning_patterns ADD COLUMN updated_at {column_type}"))
+        columns["updated_at"] = {"name": "updated_at"}
+    filled = conn.execute(text(
+        "UPDATE winning_patterns SET updated_at = detected_at WHERE updated_at IS NULL"
+    )).rowcount
+    print(f"winning_patterns.updated_at: {filled} rows filled")
+
+    removed = merge_duplicates(conn)
+    print(f"winning_patterns: {removed} duplicate rows merged")
+
+    if postgres:
+        conn.execute(text("ALTER TABLE winning_patterns ALTER COLUMN vertical SET NOT NULL"))
+        if not constrained:
+            print(f"{UNIQUE_NAME}: adding")
+            conn.execute(text(
+                f"ALTER TABLE winning_patterns ADD CONSTRAINT {UNIQUE_NAME} UNIQUE (pattern_type, value, vertical)"
+            ))
+        for index in model.indexes:
+            index.create(conn, checkfirst=True)
+    else:
+        copied = rebuild_sqlite(conn, columns)
+        print(f"winning_patterns: rebuilt, {copied} rows copied")
+
+
+async def migrate(database_url: str) -> int:
+    # Transactions are issued explicitly: pysqlite would otherwise run the
+    # SQLite rebuild's DDL outside of one
+    engine = create_async_engine(database_url, isolation_level="AUTOCOMMIT")
+    try:
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("BEGIN IMMEDIATE" if conn.dialect.name == "sqlite" else "BEGIN")
+            try:
+                await conn.run_sync(migrate_table)
+            except Exception:
+                await conn.exec_driver_sql("ROLLBACK")
+                raise
+            await conn.exec_driver_sql("COMMIT")
+        print("Done")
+    finally:
+        await engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(migrate(sys.argv[1] if len(sys.argv) > 1 else settings.DATABASE_URL)))
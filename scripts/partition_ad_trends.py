@@ -0,0 +1,68 @@
+"""
+Convert ad_trends to a table range-partitioned by captured_at (PostgreSQL).
+
+The existing table becomes the ad_trends_legacy partition, covering
+everything before next month, so no rows are copied. Monthly partitions
+and a DEFAULT partition are created after it, and the ad_trend_keys
+registry is filled from the existing rows.
+
+Takes an ACCESS EXCLUSIVE lock on ad_trends for the whole transaction,
+including building the (id, captured_at) primary key index on the legacy
+rows; stop writers first. Requires ad_trends.data to be jsonb
+(scripts/migrate_trend_data_jsonb.py), the updated_at and content_key
+columns (scripts/backfill_trend_updated_at.py,
+scripts/backfill_trend_content_keys.py) and TREND_PARTITIONING_ENABLED=true
+for every app and worker process once it has run.
+
+scripts/verify_trend_partitioning.py runs the same conversion, and the
+retention cycle after it, in a scratch schema; run it against the target
+server first.
+
+Usage:
+    python scripts/partition_ad_trends.py [DATABASE_URL]
+"""
+from datetime import datetime
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.config.settings import settings
+from src.db.models.intelligence import AdTrendKey, TrendPartitionArchive
+from src.services.trends import partitions
+
+
+async def main(database_url: str) -> int:
+    url = make_url(database_url)
+    if url.get_backend_name() != "postgresql":
+        print(f"{url.get_backend_name()}: partitioning is PostgreSQL only; nothing to do.")
+        return 0
+    if not settings.TREND_PARTITIONING_ENABLED:
+        print("Set TREND_PARTITIONING_ENABLED=true first: writers must use the content key registry.")
+        return 1
+
+    engine = create_async_engine(url.set(drivername="postgresql+asyncpg"))
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                lambda sync_conn: AdTrendKey.metadata.create_all(
+                    sync_conn, tables=[AdTrendKey.__table__, TrendPartitionArchive.__table__]
+                )
+            )
+            if await partitions.is_partitioned(conn):
+                print("ad_trends is already partitioned")
+                return 0
+            await partitions.convert_to_partitioned(conn, datetime.utcnow(), settings.TREND_PARTITIONS_AHEAD)
+            for partition in await partitions.list_partitions(conn):
+                print(f"{partition.name}: {partition.start or 'MINVALUE'} - {partition.end or 'MAXVALUE'}")
+        print("Done")
+    finally:
+        await engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else settings.DATABASE_URL)))
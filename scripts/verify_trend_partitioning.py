@@ -0,0 +1,385 @@
+"""
+Exercise the ad_trends partitioning path against a real PostgreSQL.
+
+Runs what scripts/partition_ad_trends.py and the trends retention tasks do,
+inside a throwaway schema so the database's own tables are not touched:
+
+- builds ad_trends as the app creates it, with trends captured over the
+  last 15 months, and converts it in place (convert_to_partitioned)
+- checks the partition bounds, the (id, captured_at) primary key, that the
+  legacy table's indexes were adopted rather than rebuilt, and the
+  content key registry
+- ensure_partitions, including that a repeated run creates nothing
+- bulk_insert_trends in both on_conflict modes through the registry, two
+  writers racing for the same key, mark_trends_seen and
+  deactivate_stale_trends
+- detach -> Parquet archive -> drop -> rehydrate for the legacy partition
+  and a monthly one, and archiving again once the rehydration TTL passed
+
+Archives go to a local directory unless --minio is given, in which case
+the configured MinIO and TREND_ARCHIVE_BUCKET are used.
+
+Usage:
+    python scripts/verify_trend_partitioning.py [DATABASE_URL] [--minio] [--keep] [--rows-per-month N]
+
+Exits non-zero if any check fails.
+"""
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyarrow.parquet as pq
+from sqlalchemy import select, text, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from src.config.settings import settings
+from src.db.models.intelligence import AdTrend, AdTrendKey, TrendPartitionArchive, trend_content_key
+from src.services.trends import archive, partitions
+from src.services.trends.storage import bulk_insert_trends, deactivate_stale_trends, mark_trends_seen
+
+HISTORY_MONTHS = 15
+AHEAD = 3
+
+
+class DirectoryStore:
+    """The part of the MinIO client archive.py uses, backed by a local directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, key)
+
+    def bucket_exists(self, bucket: str) -> bool:
+        return os.path.isdir(os.path.join(self.root, bucket))
+
+    def make_bucket(self, bucket: str) -> None:
+        os.makedirs(os.path.join(self.root, bucket))
+
+    def fput_object(self, bucket: str, key: str, path: str, content_type=None, metadata=None) -> None:
+        target = self._path(bucket, key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(path, target)
+
+    def fget_object(self, bucket: str, key: str, path: str) -> None:
+        shutil.copyfile(self._path(bucket, key), path)
+
+
+class Checks:
+    def __init__(self):
+        self.failed = 0
+
+    def __call__(self, name: str, ok: bool, detail: str = "") -> None:
+        print(f"{'ok  ' if ok else 'FAIL'} {name}" + (f" ({detail})" if detail else ""))
+        if not ok:
+            self.failed += 1
+
+
+async def scalar(conn, sql: str, **params):
+    return (await conn.execute(text(sql), params)).scalar()
+
+
+async def index_count(conn, table: str) -> int:
+    return await scalar(conn, "SELECT count(*) FROM pg_index WHERE indrelid = to_regclass(:t)", t=table)
+
+
+async def partition_rows(conn, name: str) -> int:
+    return await scalar(conn, f'SELECT count(*) FROM "{name}"')
+
+
+async def partition_of(conn, trend_name: str) -> str:
+    return await scalar(
+        conn, "SELECT tableoid::regclass::text FROM ad_trends WHERE trend_name = :n", n=trend_name
+    )
+
+
+def retention_for(now: datetime, cutoff: datetime) -> int:
+    """retention_months that puts archive_expired_partitions' cutoff at `cutoff`."""
+    current = partitions.month_start(now)
+    return (current.year * 12 + current.month) - (cutoff.year * 12 + cutoff.month)
+
+
+def trend(name: str, **values):
+    row = {
+        "platform": "meta", "format": "video", "industry": "fashion", "trend_type": "audio",
+        "trend_name": name, "trend_score": 1.0, "data": {"description": name, "metadata": {"n": name}},
+    }
+    row.update(values)
+    return row
+
+
+async def seed(engine, now: datetime, rows_per_month: int) -> int:
+    """ad_trends as the app creates it, filled as if written over the past months."""
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: AdTrend.metadata.create_all(sync_conn, tables=[
+            AdTrend.__table__, AdTrendKey.__table__, TrendPartitionArchive.__table__
+        ]))
+    rows = []
+    for months_back in range(HISTORY_MONTHS):
+        month = partitions.add_months(partitions.month_start(now), -months_back)
+        for i in range(rows_per_month):
+            captured = min(month + timedelta(days=i % 27, minutes=i), now - timedelta(minutes=1))
+            rows.append(trend(f"trend-{months_back}-{i}", captured_at=captured))
+    rows.append(trend("no-captured-at", captured_at=None))
+    async with AsyncSession(engine) as db:
+        stored = await bulk_insert_trends(db, rows)
+        # As if each row was last written when it was captured
+        await db.execute(update(AdTrend).values(updated_at=AdTrend.captured_at))
+        await db.commit()
+    return len(stored)
+
+
+async def verify(engine, store, rows_per_month: int, check: Checks) -> None:
+    now = datetime.utcnow()
+    m0 = partitions.month_start(now)
+    m1, m2 = partitions.add_months(m0, 1), partitions.add_months(m0, 2)
+    p1, p2 = partitions.partition_name(m1), partitions.partition_name(m2)
+
+    seeded = await seed(engine, now, rows_per_month)
+    check("seeded legacy table", seeded == HISTORY_MONTHS * rows_per_month + 1, f"{seeded} rows")
+
+    # Conversion
+    async with engine.begin() as conn:
+        indexes_before = await index_count(conn, partitions.PARENT_TABLE)
+        await partitions.convert_to_partitioned(conn, now, AHEAD)
+    async with engine.connect() as conn:
+        check("ad_trends is partitioned", await partitions.is_partitioned(conn))
+        listed = await partitions.list_partitions(conn)
+        expected = [(partitions.LEGACY_PARTITION, None, m1)] + [
+            (partitions.partition_name(partitions.add_months(m0, k)),
+             partitions.add_months(m0, k), partitions.add_months(m0, k + 1))
+            for k in range(1, AHEAD + 1)
+        ]
+        check("partition bounds", [(p.name, p.start, p.end) for p in listed] == expected,
+              ", ".join(p.name for p in listed))
+        check("default partition exists",
+              await scalar(conn, "SELECT to_regclass(:t) IS NOT NULL", t=partitions.DEFAULT_PARTITION))
+        check("all rows kept", await scalar(conn, "SELECT count(*) FROM ad_trends") == seeded)
+        check("NULL captured_at filled",
+              await scalar(conn, "SELECT count(*) FROM ad_trends WHERE captured_at IS NULL") == 0)
+        pk = await scalar(conn, """
+            SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = to_regclass('ad_trends') AND i.indisprimary
+        """)
+        check("primary key is (id, captured_at)", pk == ["captured_at", "id"], str(pk))
+        check("partitioned indexes valid", await scalar(conn, """
+            SELECT count(*) FROM pg_index WHERE indrelid = to_regclass('ad_trends') AND NOT indisvalid
+        """) == 0)
+        parent_indexes = await index_count(conn, partitions.PARENT_TABLE)
+        attached = await scalar(conn, """
+            SELECT count(*) FROM pg_inherits h
+            JOIN pg_index parent ON parent.indexrelid = h.inhparent
+            JOIN pg_index child ON child.indexrelid = h.inhrelid
+            WHERE parent.indrelid = to_regclass('ad_trends') AND child.indrelid = to_regclass(:legacy)
+        """, legacy=partitions.LEGACY_PARTITION)
+        check("every partitioned index has a legacy child", attached == parent_indexes,
+              f"{attached}/{parent_indexes}")
+        # The (id) key was swapped for (id, captured_at); the rest were adopted, not rebuilt
+        legacy_indexes = await index_count(conn, partitions.LEGACY_PARTITION)
+        check("legacy indexes adopted", legacy_indexes == indexes_before,
+              f"{indexes_before} before, {legacy_indexes} after")
+        check("registry filled", await scalar(conn, "SELECT count(*) FROM ad_trend_keys") == seeded)
+
+    # Partition maintenance
+    async with engine.begin() as conn:
+        check("ensure_partitions is idempotent", await partitions.ensure_partitions(conn, now, AHEAD) == [])
+        later = await partitions.ensure_partitions(conn, partitions.add_months(now, 2), AHEAD)
+        check("ensure_partitions extends the range", later == [
+            partitions.partition_name(partitions.add_months(m0, AHEAD + 1)),
+            partitions.partition_name(partitions.add_months(m0, AHEAD + 2)),
+        ], ", ".join(later))
+
+    # Writes through the registry
+    settings.TREND_PARTITIONING_ENABLED = True
+    existing = "trend-3-0"
+    in_m1 = m1 + timedelta(days=2)
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        stored = await bulk_insert_trends(db, [
+            trend(existing), trend("new-now"), trend("new-next-month", captured_at=in_m1)
+        ])
+        await db.commit()
+        check("skip: only new keys stored", sorted(t.trend_name for t in stored) == ["new-next-month", "new-now"])
+        again = await bulk_insert_trends(db, [trend("new-now"), trend("new-next-month")])
+        await db.commit()
+        check("skip: repeated keys not stored", again == [])
+
+        before = await db.scalar(select(text("count(*)")).select_from(AdTrend))
+        stored = await bulk_insert_trends(db, [
+            trend(existing, trend_score=99.0),
+            trend("new-next-month", trend_score=77.0),
+            trend("upsert-new", trend_score=5.0),
+            trend("upsert-new", trend_score=6.0),
+        ], on_conflict="update")
+        await db.commit()
+        scores = {t.trend_name: t.trend_score for t in stored}
+        check("update: refreshed and inserted rows returned",
+              scores == {existing: 99.0, "new-next-month": 77.0, "upsert-new": 6.0}, str(scores))
+        after = await db.scalar(select(text("count(*)")).select_from(AdTrend))
+        check("update: one row added", after == before + 1, f"{before} -> {after}")
+
+    async with engine.connect() as conn:
+        check("update: no duplicate rows", await scalar(conn, """
+            SELECT count(*) FROM ad_trends WHERE trend_name IN (:a, 'new-next-month', 'upsert-new')
+        """, a=existing) == 3)
+        check("update: stored score", await scalar(
+            conn, "SELECT trend_score FROM ad_trends WHERE trend_name = :n", n=existing) == 99.0)
+        check("rows land in their month", await partition_of(conn, "new-next-month") == p1,
+              await partition_of(conn, "new-next-month"))
+        key = trend_content_key("meta", "new-next-month")
+        registered = (await conn.execute(
+            select(AdTrendKey.trend_id, AdTrendKey.captured_at).where(AdTrendKey.content_key == key)
+        )).one()
+        row = (await conn.execute(
+            select(AdTrend.id, AdTrend.captured_at).where(AdTrend.trend_name == "new-next-month")
+        )).one()
+        check("registry points at the row", tuple(registered) == tuple(row))
+
+    # Two writers racing for one new key: the second waits on the registry, then skips
+    async with AsyncSession(engine) as first, AsyncSession(engine) as second:
+        claimed = await bulk_insert_trends(first, [trend("raced")])
+        racing = asyncio.create_task(bulk_insert_trends(second, [trend("raced")]))
+        await asyncio.sleep(0.5)
+        check("second writer waits for the first", not racing.done())
+        await first.commit()
+        lost = await asyncio.wait_for(racing, timeout=10)
+        await second.commit()
+        check("race: stored once", len(claimed) == 1 and lost == [])
+
+    # Retention of active flags
+    async with AsyncSession(engine) as db:
+        month_ago = now - timedelta(days=40)
+        await db.execute(
+            update(AdTrend).where(AdTrend.trend_name == existing).values(updated_at=month_ago, is_active=False)
+        )
+        await db.commit()
+        seen = await mark_trends_seen(db, [trend_content_key("meta", existing)])
+        await db.commit()
+        check("mark_trends_seen through the registry", seen == 1)
+        cutoff = now - timedelta(days=settings.TREND_ACTIVE_DAYS)
+        stale = await db.scalar(
+            select(text("count(*)")).select_from(AdTrend)
+            .where(AdTrend.is_active == True, AdTrend.updated_at <= cutoff)
+        )
+        deactivated = await deactivate_stale_trends(db)
+        await db.commit()
+        check("deactivate_stale_trends", deactivated == stale and stale > 0, f"{deactivated} of {stale}")
+        check("seen trend stays active",
+              await db.scalar(select(AdTrend.is_active).where(AdTrend.trend_name == existing)) is True)
+
+    # Archive: move the cutoff to m2 so the legacy and m1 partitions expire
+    async with engine.connect() as conn:
+        counts = {name: await partition_rows(conn, name) for name in (partitions.LEGACY_PARTITION, p1)}
+        total = await scalar(conn, "SELECT count(*) FROM ad_trends")
+    archived = await archive.archive_expired_partitions(
+        engine, now=now, retention_months=retention_for(now, m2), client=store
+    )
+    check("expired partitions archived", sorted(archived) == sorted(counts), ", ".join(archived))
+    async with engine.connect() as conn:
+        for name, rows in counts.items():
+            record = await archive._get_record(conn, name)
+            check(f"{name}: archive record", record["status"] == "archived" and record["row_count"] == rows,
+                  f"{record['status']}, {record['row_count']} rows")
+            check(f"{name}: table dropped", await scalar(conn, "SELECT to_regclass(:t) IS NULL", t=name))
+            handle, path = tempfile.mkstemp(suffix=".parquet")
+            os.close(handle)
+            store.fget_object(settings.TREND_ARCHIVE_BUCKET, record["object_key"], path)
+            metadata = pq.ParquetFile(path).metadata
+            os.remove(path)
+            check(f"{name}: Parquet object", metadata.num_rows == rows, f"{metadata.num_rows} rows")
+        check("rows left", await scalar(conn, "SELECT count(*) FROM ad_trends") == total - sum(counts.values()))
+        check("archived keys released",
+              await scalar(conn, "SELECT count(*) FROM ad_trend_keys WHERE captured_at < :m2", m2=m2) == 0)
+
+    # An archived trend seen again is stored fresh, in a current partition
+    async with AsyncSession(engine) as db:
+        fresh = await bulk_insert_trends(db, [trend(existing, captured_at=m2 + timedelta(days=1))])
+        await db.commit()
+        check("archived trend stored again", len(fresh) == 1)
+
+    # Rehydrate both
+    for name in counts:
+        record = await archive.rehydrate_partition(engine, name, client=store)
+        check(f"{name}: rehydrated", record["status"] == "rehydrated")
+    async with engine.connect() as conn:
+        listed = {p.name: (p.start, p.end) for p in await partitions.list_partitions(conn)}
+        check("rehydrated bounds", listed.get(partitions.LEGACY_PARTITION) == (None, m1)
+              and listed.get(p1) == (m1, m2))
+        check("rows restored", await scalar(conn, "SELECT count(*) FROM ad_trends") == total + 1)
+        check("fresh key kept over the restored one", await scalar(conn, """
+            SELECT k.captured_at >= :m2 FROM ad_trend_keys k WHERE k.content_key = :key
+        """, m2=m2, key=trend_content_key("meta", existing)))
+        restored = (await conn.execute(
+            select(AdTrend.data, AdTrend.trend_score).where(AdTrend.trend_name == "new-next-month")
+        )).one()
+        check("restored values", restored.data["metadata"] == {"n": "new-next-month"}
+              and restored.trend_score == 77.0)
+
+    # Within the TTL rehydrated partitions stay; after it they are archived again
+    kept = await archive.archive_expired_partitions(
+        engine, now=now, retention_months=retention_for(now, m2), client=store
+    )
+    check("rehydrated partitions kept within TTL", kept == [], ", ".join(kept))
+    expired = now + timedelta(days=settings.TREND_REHYDRATED_TTL_DAYS + 1)
+    again = await archive.archive_expired_partitions(
+        engine, now=expired, retention_months=retention_for(expired, m2), client=store
+    )
+    check("archived again after TTL", sorted(again) == sorted(counts), ", ".join(again))
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("database_url", nargs="?", default=settings.DATABASE_URL)
+    parser.add_argument("--minio", action="store_true", help="Archive to the configured MinIO")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema for inspection")
+    parser.add_argument("--rows-per-month", type=int, default=200)
+    args = parser.parse_args()
+
+    url = make_url(args.database_url)
+    if url.get_backend_name() != "postgresql":
+        print(f"{url.get_backend_name()}: partitioning is PostgreSQL only; nothing to verify.")
+        return 1
+
+    schema = f"verify_partitioning_{uuid.uuid4().hex[:8]}"
+    admin = create_async_engine(url.set(drivername="postgresql+asyncpg"), isolation_level="AUTOCOMMIT")
+    async with admin.connect() as conn:
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_async_engine(
+        url.set(drivername="postgresql+asyncpg"),
+        connect_args={"server_settings": {"search_path": schema}},
+    )
+    directory = None
+    if args.minio:
+        store = archive.archive_client()
+    else:
+        directory = tempfile.mkdtemp(prefix="trend-archives-")
+        store = DirectoryStore(directory)
+
+    check = Checks()
+    print(f"Using schema {schema}")
+    try:
+        await verify(engine, store, args.rows_per_month, check)
+    finally:
+        await engine.dispose()
+        if args.keep:
+            print(f"Kept schema {schema}")
+        else:
+            async with admin.connect() as conn:
+                await conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        await admin.dispose()
+        if directory:
+            shutil.rmtree(directory)
+
+    print(f"{check.failed} check(s) failed" if check.failed else "All checks passed")
+    return 1 if check.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
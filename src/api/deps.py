@@ -1,7 +1,34 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
+from fastapi import Header, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.db.session import AsyncSessionLocal
+from src.config.settings import settings
+from src.db.session import AsyncSessionLocal, read_session_factory
+from src.services.analysis.copy_analyzer import CopyAnalyzerService, get_copy_analyzer as _get_copy_analyzer
+import secrets
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Session for GET endpoints: the read replica unless it lags, then the primary."""
+    session_factory = await read_session_factory()
+    async with session_factory() as session:
+        yield session
+
+def get_copy_analyzer() -> CopyAnalyzerService:
+    """Shared analyzer whose OpenAI connection pool lives for the app lifespan."""
+    return _get_copy_analyzer()
+
+def require_internal_api_key(authorization: Optional[str] = Header(None)) -> None:
+    """
+    Guard for internal diagnostics routes.
+
+    They do not exist (404) unless INTERNAL_API_KEY is set, and then require
+    `Authorization: Bearer <INTERNAL_API_KEY>`.
+    """
+    if not settings.INTERNAL_API_KEY:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.INTERNAL_API_KEY.encode()):
+        raise HTTPException(status_code=401, detail="Invalid internal API key")
@@ -1,15 +1,167 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+from celery.result import AsyncResult
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from kombu.exceptions import OperationalError
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from src.api import deps
+from src.celery_app import celery_app
+from src.config.settings import settings
+from src.services.analysis.batch import stream_batch_audits
 from src.services.analysis.copy_analyzer import CopyAnalyzerService, CopyAnalysisResult
+from src.services.analysis.tasks import audit_copy as audit_copy_task
+import logging
+import orjson
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 class CopyAuditRequest(BaseModel):
     text: str
     objective: str
+    mode: Literal["llm", "fast", "auto"] = "llm"  # fast: local heuristics, auto: heuristics then LLM if unsure
+    vertical: Optional[str] = None  # Industry vertical for winning pattern aggregation
+
+class CopyAuditBatchRequest(BaseModel):
+    items: List[CopyAuditRequest] = Field(..., min_length=1)
+
+class AuditJobResponse(BaseModel):
+    job_id: str
+    status: str  # queued, pending, running, succeeded, failed
+    result: Optional[CopyAnalysisResult] = None
+    error: Optional[str] = None
+
+# Celery task states as reported to API clients
+_JOB_STATUSES = {
+    "PENDING": "pending",
+    "RECEIVED": "pending",
+    "STARTED": "running",
+    "RETRY": "running",
+    "SUCCESS": "succeeded",
+    "FAILURE": "failed",
+    "REVOKED": "failed",
+}
 
 @router.post("/audit-copy", response_model=CopyAnalysisResult)
-async def audit_copy(request: CopyAuditRequest):
-    analyzer = CopyAnalyzerService()
-    result = await analyzer.analyze_copy(request.text, request.objective)
+async def audit_copy(
+    request: CopyAuditRequest,
+    analyzer: CopyAnalyzerService = Depends(deps.get_copy_analyzer)
+):
+    result = await analyzer.analyze_copy(
+        request.text, request.objective, mode=request.mode, vertical=request.vertical
+    )
     return result
+
+@router.post("/audit-copy/stream")
+async def audit_copy_stream(
+    request: CopyAuditRequest,
+    analyzer: CopyAnalyzerService = Depends(deps.get_copy_analyzer)
+):
+    """
+    Audit ad copy, streaming the analysis as Server-Sent Events.
+
+    One event per section (score, hooks, ctas, improvements,
+    winning_patterns) is sent as soon as the model has written it, then a
+    "result" event with the validated CopyAnalysisResult. An "error" event
+    ends the stream if the model fails part-way through.
+    """
+    async def events():
+        try:
+            async for event, value in analyzer.stream_analysis(
+                request.text, request.objective, mode=request.mode, vertical=request.vertical
+            ):
+                if isinstance(value, CopyAnalysisResult):
+                    value = value.model_dump()
+                yield b"event: " + event.encode() + b"\ndata: " + orjson.dumps(value) + b"\n\n"
+        except Exception as e:
+            logger.error(f"Streaming copy audit failed: {e}")
+            yield b"event: error\ndata: " + orjson.dumps({"detail": "Analysis failed"}) + b"\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/audit-copy/jobs", response_model=AuditJobResponse, status_code=202)
+async def create_audit_job(request: CopyAuditRequest):
+    """
+    Queue a copy audit on the Celery analysis queue.
+
+    Returns:
+        AuditJobResponse: The job id to poll with GET /jobs/{job_id}
+    """
+    try:
+        job = await run_in_threadpool(
+            audit_copy_task.delay, request.text, request.objective, request.mode, request.vertical
+        )
+    except OperationalError as e:
+        logger.error(f"Could not queue copy audit job: {e}")
+        raise HTTPException(status_code=503, detail="Job queue unavailable")
+    return AuditJobResponse(job_id=job.id, status="queued")
+
+@router.get("/jobs/{job_id}", response_model=AuditJobResponse)
+async def get_audit_job(job_id: str):
+    """
+    Poll a queued copy audit.
+
+    Unknown or expired job ids report "pending", as Celery cannot tell
+    them apart from jobs that have not started yet.
+    """
+    job = AsyncResult(job_id, app=celery_app)
+    state = await run_in_threadpool(lambda: job.state)
+    status = _JOB_STATUSES.get(state, "pending")
+    if status == "succeeded":
+        return AuditJobResponse(job_id=job_id, status=status, result=CopyAnalysisResult(**job.result))
+    if status == "failed":
+        return AuditJobResponse(job_id=job_id, status=status, error=str(job.result))
+    return AuditJobResponse(job_id=job_id, status=status)
+
+@router.post("/audit-copy/batch")
+async def audit_copy_batch(
+    request: CopyAuditBatchRequest,
+    analyzer: CopyAnalyzerService = Depends(deps.get_copy_analyzer)
+):
+    """
+    Audit many ad variants in one request, streaming results as NDJSON.
+
+    Identical items are analyzed once. Up to COPY_AUDIT_BATCH_CONCURRENCY
+    analyses run at a time, each limited to COPY_AUDIT_ITEM_TIMEOUT seconds.
+    Each output line is {"index", "status", "result" | "error"}, where index
+    is the item's position in the request, written as soon as it finishes.
+    """
+    if len(request.items) > settings.COPY_AUDIT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch audits are limited to {settings.COPY_AUDIT_BATCH_MAX_ITEMS} items"
+        )
+
+    records = stream_batch_audits(
+        analyzer,
+        [(item.text, item.objective, item.mode, item.vertical) for item in request.items],
+        concurrency=settings.COPY_AUDIT_BATCH_CONCURRENCY,
+        item_timeout=settings.COPY_AUDIT_ITEM_TIMEOUT
+    )
+
+    async def ndjson():
+        async for record in records:
+            yield orjson.dumps(record) + b"\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@router.get("/cache/stats")
+async def audit_cache_stats(
+    analyzer: CopyAnalyzerService = Depends(deps.get_copy_analyzer)
+):
+    """
+    Hit/miss counters for the copy audit result caches.
+
+    Returns:
+        dict: Exact cache memory and DB hits, misses, stores, hit rate and
+        memory tier size, plus a "similarity" section for the near-duplicate cache
+    """
+    stats = {"enabled": False} if analyzer.cache is None else {"enabled": True, **analyzer.cache.stats()}
+    stats["similarity"] = {"enabled": False} if analyzer.similar is None else {"enabled": True, **analyzer.similar.stats()}
+    return stats
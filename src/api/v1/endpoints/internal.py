@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from typing import Any, Dict, List
+from src.config.settings import settings
+from src.db.pool import pool_stats
+from pydantic import BaseModel
+import os
+
+router = APIRouter()
+
+class DbPoolResponse(BaseModel):
+    pid: int  # Pools are per worker process; each worker reports its own
+    workers: int
+    engines: List[Dict[str, Any]]
+
+@router.get("/db-pool", response_model=DbPoolResponse)
+async def db_pool_stats():
+    """
+    Live connection pool state for this worker.
+
+    Checked-out and overflow counts are current; checkout wait and hold
+    time histograms (milliseconds) and timeout counts are cumulative since
+    the process started.
+    """
+    return DbPoolResponse(
+        pid=os.getpid(),
+        workers=settings.WEB_CONCURRENCY,
+        engines=pool_stats(),
+    )
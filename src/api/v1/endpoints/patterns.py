@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from typing import List, Literal, Optional
+from src.api import deps
+from src.config.settings import settings
+from src.db.models.intelligence import WinningPattern
+from src.services.patterns.aggregator import normalize_vertical, pattern_confidence
+from src.services.patterns.sketch import pattern_sketches
+from pydantic import BaseModel
+from datetime import datetime
+
+router = APIRouter()
+
+class WinningPatternResponse(BaseModel):
+    pattern_type: str  # pattern, hook, cta
+    value: str
+    vertical: Optional[str]  # None when aggregated across verticals
+    source_count: int
+    performance_score: float  # Mean audit score of copy containing the pattern
+    confidence_level: float
+    updated_at: Optional[datetime]
+
+@router.get("/top", response_model=List[WinningPatternResponse])
+async def top_patterns(
+    vertical: Optional[str] = None,
+    pattern_type: Optional[Literal["pattern", "hook", "cta"]] = None,
+    order_by: Literal["source_count", "performance_score"] = "source_count",
+    min_count: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(deps.get_read_db)
+):
+    """
+    Top winning patterns from the streaming copy audit aggregate.
+
+    Without a vertical, counts and mean scores are combined across verticals.
+
+    Returns:
+        List[WinningPatternResponse]: Patterns ordered by order_by, then count
+    """
+    source_count = func.sum(WinningPattern.source_count)
+    performance_score = (
+        func.sum(WinningPattern.performance_score * WinningPattern.source_count) / source_count
+    )
+    query = (
+        select(
+            WinningPattern.pattern_type,
+            WinningPattern.value,
+            source_count.label("source_count"),
+            performance_score.label("performance_score"),
+            func.max(WinningPattern.updated_at).label("updated_at"),
+        )
+        .group_by(WinningPattern.pattern_type, WinningPattern.value)
+        .having(source_count >= min_count)
+    )
+    if vertical:
+        query = query.where(WinningPattern.vertical == normalize_vertical(vertical))
+    if pattern_type:
+        query = query.where(WinningPattern.pattern_type == pattern_type)
+
+    primary = performance_score if order_by == "performance_score" else source_count
+    query = query.order_by(primary.desc(), source_count.desc(), WinningPattern.value).limit(limit)
+
+    result = await db.execute(query)
+    return [
+        WinningPatternResponse(
+            pattern_type=row.pattern_type,
+            value=row.value,
+            vertical=normalize_vertical(vertical) if vertical else None,
+            source_count=row.source_count,
+            performance_score=round(row.performance_score or 0.0, 2),
+            confidence_level=round(pattern_confidence(row.source_count), 4),
+            updated_at=row.updated_at,
+        )
+        for row in result.all()
+    ]
+
+class TrendingPatternItem(BaseModel):
+    value: str
+    estimate: float  # Upper bound on the decayed count
+    lower_bound: float
+
+class TrendingPatternsResponse(BaseModel):
+    vertical: str
+    pattern_type: str
+    total: float  # Decayed weight of all observations in this sketch
+    error_bound: float  # Additive error of any estimate, in decayed weight
+    confidence: float  # Probability the Count-Min part of the bound holds
+    half_life_seconds: float
+    items: List[TrendingPatternItem]
+
+@router.get("/trending", response_model=TrendingPatternsResponse)
+async def trending_patterns(
+    vertical: Optional[str] = None,
+    pattern_type: str = "hook",
+    k: int = Query(10, ge=1, le=settings.PATTERN_SKETCH_CAPACITY),
+):
+    """
+    Real-time heavy hitters per vertical from the time-decayed sketches.
+
+    pattern_type is pattern, hook or cta for copy audits, or a trend_type
+    (visual_style, audio, copy_angle) for ingested trends. Counts are
+    decayed with PATTERN_SKETCH_HALF_LIFE; memory per sketch is fixed.
+    """
+    return TrendingPatternsResponse(
+        vertical=normalize_vertical(vertical),
+        pattern_type=pattern_type,
+        **pattern_sketches.top(vertical, pattern_type, k)
+    )
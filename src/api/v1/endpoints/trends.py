@@ -1,15 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import List, Optional
+from sqlalchemy import func, select
+from typing import List, Literal, Optional, Tuple
 from uuid import UUID
 from src.api import deps
-from src.db.models.intelligence import AdTrend
-from pydantic import BaseModel, Field
+from src.config.settings import settings
+from src.db.models.intelligence import AdTrend, trend_description
+from src.services.patterns.sketch import pattern_sketches
+from src.services.trends.conditional import (
+    http_date,
+    is_not_modified,
+    listing_etag,
+    trend_listing_version,
+)
+from src.services.trends.counts import count_trends
+from src.services.trends.export import EXPORT_FORMATS, stream_trend_export
+from src.services.trends.filters import apply_trend_filters, parse_metadata_filters
+from src.services.trends.ingest import (
+    BulkPayloadError,
+    BulkPayloadTooLarge,
+    BulkRowStatus,
+    iter_bulk_payload,
+    write_trend_chunk,
+)
+from src.services.trends.pagination import (
+    SORT_COLUMNS,
+    InvalidCursorError,
+    apply_keyset,
+    encode_cursor,
+    page_rows,
+)
+from src.services.trends.projection import parse_fields, projected_columns
+from src.services.trends.storage import bulk_insert_trends
+from pydantic import BaseModel, Field, ValidationError
+from collections import Counter
 from datetime import datetime
 
 router = APIRouter()
 
+# Label of the sort column in projected listing rows
+_SORT_KEY = "_sort_key"
+
 # Pydantic Schemas (Move to schemas/ later if large)
 class AdTrendCreate(BaseModel):
     platform: str
@@ -25,7 +57,7 @@ class AdTrendResponse(BaseModel):
     platform: str
     trend_name: str
     trend_score: float
-    description: str  # Computed from data dict
+    description: str  # Resolved from data dict when the row is written
     created_at: datetime  # Mapped from captured_at
     updated_at: Optional[datetime] = None  # For frontend compatibility
 
@@ -41,98 +73,376 @@ class AdTrendResponse(BaseModel):
 
 class PaginatedTrendsResponse(BaseModel):
     results: List[AdTrendResponse]
-    count: int
+    count: Optional[int] = None
     next: Optional[str] = None
     previous: Optional[str] = None
 
-@router.get("/", response_model=PaginatedTrendsResponse)
+class TopTrendResponse(BaseModel):
+    id: UUID
+    industry: str
+    platform: str
+    rank: int  # 1-based position within its (industry, platform) group
+    trend_name: str
+    trend_type: str
+    format: str
+    trend_score: float
+
+class BulkIngestResponse(BaseModel):
+    created: int = 0
+    upserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: int = 0
+    rows: List[BulkRowStatus]  # One entry per input row, in input order
+
+def _to_trend_response(trend: AdTrend) -> AdTrendResponse:
+    """Map an AdTrend row to the frontend-compatible response schema."""
+    description = trend.description
+    if description is None:
+        # Rows written before the description column existed
+        description = trend_description(trend.data, trend.trend_type, trend.industry)
+
+    return AdTrendResponse(
+        id=trend.id,
+        platform=trend.platform,
+        trend_name=trend.trend_name,
+        trend_score=trend.trend_score,
+        description=description,
+        created_at=trend.captured_at,  # Map captured_at to created_at
+        updated_at=trend.updated_at or trend.captured_at,
+        format=trend.format,
+        industry=trend.industry,
+        trend_type=trend.trend_type,
+        data=trend.data,
+        is_active=trend.is_active
+    )
+
+@router.get("/", response_model=PaginatedTrendsResponse, response_class=ORJSONResponse)
 async def read_trends(
+    request: Request,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
     industry: Optional[str] = None,
     platform: Optional[str] = None,
-    db: AsyncSession = Depends(deps.get_db)
+    order_by: Literal["trend_score", "captured_at"] = "trend_score",
+    cursor: Optional[str] = None,
+    count_mode: Literal["exact", "estimate", "none"] = "exact",
+    fields: Optional[str] = None,
+    captured_since: Optional[datetime] = None,
+    db: AsyncSession = Depends(deps.get_read_db)
 ):
     """
     Get paginated list of ad trends with frontend-compatible response format.
 
+    Pages are ordered by (order_by, id) descending and navigated with the
+    opaque cursors embedded in `next`/`previous`, so deep pages cost the same
+    as the first one. `skip` is still honoured for the first request but
+    should not be used to walk pages.
+
+    `fields` is a comma-separated subset of AdTrendResponse fields (id is
+    always included). Only those columns are selected, and rows are encoded
+    straight to JSON without building a response model per row.
+
+    `metadata.<key>=<value>` filters on provider metadata in `data`, e.g.
+    `metadata.aspect_ratio=9:16&metadata.duration=15s`. Repeating a key
+    matches any of its values; numeric and boolean values also match their
+    unquoted JSON form. On Postgres these use the GIN index on data.
+
+    `captured_since` keeps only trends first captured at or after that
+    time. On a partitioned ad_trends it limits the scan to the partitions
+    covering the window; without it the listing is unbounded and every
+    partition is read.
+
+    Responses carry ETag and Last-Modified derived from max(updated_at) of
+    the filtered rows; a matching If-None-Match or If-Modified-Since gets a
+    304 without running the count or page queries.
+
     Returns:
     - results: List of trend objects
-    - count: Total number of trends matching the filters
-    - next: URL for next page (not implemented yet)
-    - previous: URL for previous page (not implemented yet)
+    - count: Total number of trends matching the filters; approximate with
+      count_mode=estimate (Postgres planner statistics), null with count_mode=none
+    - next: URL for next page, or null on the last page
+    - previous: URL for previous page, or null on the first page
+    """
+    try:
+        selected_fields = parse_fields(fields)
+        metadata = parse_metadata_filters(request.query_params.multi_items())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Conditional GET: one indexed aggregate decides whether anything changed
+    filters = {
+        "industry": industry,
+        "platform": platform,
+        "captured_since": captured_since,
+        "metadata": metadata,
+    }
+    version = await trend_listing_version(db, filters)
+    etag = listing_etag(request, version)
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if version is not None:
+        cache_headers["Last-Modified"] = http_date(version)
+    if is_not_modified(request, etag, version):
+        return Response(status_code=304, headers=cache_headers)
+
+    # Build base query; the sort key is always selected for cursor links
+    sort_column = SORT_COLUMNS[order_by]
+    query = select(
+        *projected_columns(selected_fields),
+        sort_column.label(_SORT_KEY)
+    ).where(AdTrend.is_active == True)
+    query = apply_trend_filters(query, filters)
+
+    # Get total count (before pagination); cached per filter set and version token
+    total_count = await count_trends(db, query, filters, version, mode=count_mode)
+
+    # Apply keyset pagination
+    try:
+        page_query, direction = apply_keyset(query, order_by, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if skip and not cursor:
+        page_query = page_query.offset(skip)
+    result = await db.execute(page_query)
+    rows, has_more = page_rows(result.all(), limit, direction)
+
+    # Rows map 1:1 onto the response fields; no per-row model
+    results = [{name: row._mapping[name] for name in selected_fields} for row in rows]
+
+    # Cursor links; the page we came from always exists in the opposite direction
+    if direction == "next":
+        has_next, has_previous = has_more, bool(cursor or skip)
+    else:
+        has_next, has_previous = True, has_more
+
+    next_url = previous_url = None
+    if rows:
+        base_url = request.url.remove_query_params("skip")
+        first, last = rows[0]._mapping, rows[-1]._mapping
+        if has_next:
+            next_url = str(base_url.include_query_params(
+                cursor=encode_cursor(order_by, "next", last[_SORT_KEY], last["id"])
+            ))
+        if has_previous:
+            previous_url = str(base_url.include_query_params(
+                cursor=encode_cursor(order_by, "prev", first[_SORT_KEY], first["id"])
+            ))
+
+    return ORJSONResponse({
+        "results": results,
+        "count": total_count,
+        "next": next_url,
+        "previous": previous_url
+    }, headers=cache_headers)
+
+@router.get("/top", response_model=List[TopTrendResponse], response_class=ORJSONResponse)
+async def read_top_trends(
+    industry: Optional[str] = None,
+    platform: Optional[str] = None,
+    k: int = Query(10, ge=1, le=settings.MAX_TREND_LIMIT),
+    captured_since: Optional[datetime] = None,
+    db: AsyncSession = Depends(deps.get_read_db)
+):
     """
-    # Build base query
-    query = select(AdTrend).where(AdTrend.is_active == True)
-
-    # Apply filters
-    if industry:
-        query = query.where(AdTrend.industry == industry)
-    if platform:
-        query = query.where(AdTrend.platform == platform)
-
-    # Get total count (before pagination)
-    count_query = select(func.count()).select_from(query.subquery())
-    count_result = await db.execute(count_query)
-    total_count = count_result.scalar() or 0
-
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
+    Get the top-K active trends by score for each (industry, platform) pair.
+
+    With both industry and platform given this is a single bounded range scan
+    of ix_ad_trends_active_industry_platform_score. Otherwise every matching
+    group is ranked with ROW_NUMBER() over the same index order.
+
+    `captured_since` ranks only trends first captured at or after that time,
+    so a partitioned ad_trends reads just the partitions covering it;
+    without it every partition is read.
+
+    Returns:
+        List of trends ordered by industry, platform and rank
+    """
+    columns = [
+        AdTrend.id, AdTrend.industry, AdTrend.platform, AdTrend.trend_name,
+        AdTrend.trend_type, AdTrend.format, AdTrend.trend_score
+    ]
+    order = (AdTrend.trend_score.desc(), AdTrend.id.desc())
+    filters = {"industry": industry, "platform": platform, "captured_since": captured_since}
+
+    if industry and platform:
+        query = select(*columns).where(AdTrend.is_active == True)
+        query = apply_trend_filters(query, filters).order_by(*order).limit(k)
+        result = await db.execute(query)
+        rows = [
+            {**row._mapping, "rank": position}
+            for position, row in enumerate(result.all(), start=1)
+        ]
+        return ORJSONResponse(rows)
+
+    rank = func.row_number().over(
+        partition_by=(AdTrend.industry, AdTrend.platform),
+        order_by=order
+    ).label("rank")
+    ranked = select(*columns, rank).where(AdTrend.is_active == True)
+    ranked = apply_trend_filters(ranked, filters)
+    ranked = ranked.subquery()
+
+    query = (
+        select(ranked)
+        .where(ranked.c.rank <= k)
+        .order_by(ranked.c.industry, ranked.c.platform, ranked.c.rank)
+    )
     result = await db.execute(query)
-    trends = result.scalars().all()
-
-    # Transform to frontend-compatible format
-    results = []
-    for trend in trends:
-        # Extract description from data dict (use a key like "description" or convert to string)
-        description = ""
-        if trend.data and isinstance(trend.data, dict):
-            # Try to get description from data dict, or use a summary
-            description = trend.data.get("description", trend.data.get("summary", ""))
-            if not description:
-                # Fallback: create a description from available data
-                description = f"{trend.trend_type} trend in {trend.industry}"
-
-        trend_response = AdTrendResponse(
-            id=trend.id,
-            platform=trend.platform,
-            trend_name=trend.trend_name,
-            trend_score=trend.trend_score,
-            description=description,
-            created_at=trend.captured_at,  # Map captured_at to created_at
-            updated_at=trend.captured_at,  # Use captured_at as fallback
-            format=trend.format,
-            industry=trend.industry,
-            trend_type=trend.trend_type,
-            data=trend.data,
-            is_active=trend.is_active
-        )
-        results.append(trend_response)
+    return ORJSONResponse([dict(row._mapping) for row in result.all()])
+
+@router.get("/export")
+async def export_trends(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    industry: Optional[str] = None,
+    platform: Optional[str] = None,
+    since: Optional[datetime] = None,
+    active_only: bool = False,
+    fields: Optional[str] = None,
+):
+    """
+    Stream every matching trend as NDJSON or CSV.
 
-    return PaginatedTrendsResponse(
-        results=results,
-        count=total_count,
-        next=None,  # TODO: Implement pagination URLs
-        previous=None  # TODO: Implement pagination URLs
+    Rows come from a server-side cursor and are written as they are read, so
+    memory use does not grow with the export size. Rows are ordered by
+    updated_at; pass the last updated_at seen as `since` for incremental
+    exports (rows at exactly that time are repeated, dedupe on id).
+    """
+    try:
+        selected_fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    stream = stream_trend_export(
+        {"industry": industry, "platform": platform},
+        selected_fields,
+        export_format=format,
+        since=since,
+        active_only=active_only
+    )
+    return StreamingResponse(
+        stream,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="ad_trends.{format}"'}
     )
 
 @router.post("/fetch", response_model=List[AdTrendResponse])
 async def trigger_fetch_trends(
     industry: str,
+    response: Response,
+    force_refresh: bool = False,
     db: AsyncSession = Depends(deps.get_db)
 ):
-    from src.services.trends.aggregator import TrendAggregator
-    aggregator = TrendAggregator(db)
-    result = await aggregator.fetch_and_store_trends(industry)
-    return result
+    """
+    Fetch trends from all providers concurrently and store new ones.
+
+    Provider results are cached per (provider, industry) for TREND_CACHE_TTL;
+    pass force_refresh=true to bypass the cache and call the providers.
+
+    The outcome of each provider call is reported in the X-Trend-Providers
+    header as `name=status` pairs (e.g. `google=ok, meta=timeout`), so
+    callers can see which platforms failed while partial results were
+    still returned.
+
+    Returns:
+        List of newly stored trends
+    """
+    from src.services.trends.aggregator import TrendAggregator, TrendFetchError
+    aggregator = TrendAggregator(db, use_cache=not force_refresh)
+    try:
+        result = await aggregator.fetch_and_store_trends(industry)
+    except TrendFetchError as e:
+        raise HTTPException(
+            status_code=502,
+            detail={
+                "message": str(e),
+                "providers": [status.model_dump() for status in e.statuses]
+            }
+        )
+    response.headers["X-Trend-Providers"] = ", ".join(
+        f"{status.provider}={status.status}" for status in aggregator.provider_statuses
+    )
+    return [_to_trend_response(trend) for trend in result]
+
+@router.post("/bulk", response_model=BulkIngestResponse, response_class=ORJSONResponse)
+async def create_trends_bulk(
+    request: Request,
+    on_conflict: Literal["skip", "update"] = "skip",
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """
+    Ingest many trends in one request.
+
+    The body is either a JSON array of AdTrendCreate objects or an NDJSON
+    stream (Content-Type: application/x-ndjson), which is processed as it
+    arrives. Rows are validated and written in chunks of
+    TREND_BULK_CHUNK_SIZE, one multi-row upsert and commit per chunk.
+    Existing (platform, trend_name) pairs are skipped, or overwritten with
+    on_conflict=update. Bodies over TREND_BULK_MAX_ROWS rows, or JSON arrays
+    over TREND_BULK_MAX_BYTES, are refused with 413.
+
+    Returns:
+        Totals per status plus one status entry per input row
+    """
+    statuses: List[BulkRowStatus] = []
+    pending: List[Tuple[int, dict]] = []
+    chunk_size = settings.TREND_BULK_CHUNK_SIZE
+
+    payload = iter_bulk_payload(
+        request.headers.get("content-type", "application/json"),
+        request.stream(),
+        settings.TREND_BULK_MAX_ROWS,
+        settings.TREND_BULK_MAX_BYTES
+    )
+    try:
+        async for index, item, parse_error in payload:
+            if parse_error:
+                statuses.append(BulkRowStatus(index=index, status="invalid", error=parse_error))
+                continue
+            try:
+                trend_in = AdTrendCreate.model_validate(item)
+            except ValidationError as e:
+                errors = "; ".join(
+                    f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+                    for err in e.errors()
+                )
+                statuses.append(BulkRowStatus(index=index, status="invalid", error=errors))
+                continue
+            pending.append((index, trend_in.model_dump()))
+            if len(pending) >= chunk_size:
+                statuses.extend(await write_trend_chunk(db, pending, on_conflict))
+                pending = []
+    except BulkPayloadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except BulkPayloadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if pending:
+        statuses.extend(await write_trend_chunk(db, pending, on_conflict))
+
+    statuses.sort(key=lambda status: status.index)
+    totals = Counter(status.status for status in statuses)
+    return ORJSONResponse(BulkIngestResponse(
+        created=totals["created"],
+        upserted=totals["upserted"],
+        duplicates=totals["duplicate"],
+        invalid=totals["invalid"],
+        errors=totals["error"],
+        rows=statuses
+    ).model_dump(mode="json"))
 
 @router.post("/", response_model=AdTrendResponse)
 async def create_trend(
     trend_in: AdTrendCreate,
     db: AsyncSession = Depends(deps.get_db)
 ):
-    trend = AdTrend(**trend_in.dict())
-    db.add(trend)
+    # Through the bulk path so duplicates are caught the same way on partitioned tables
+    stored = await bulk_insert_trends(db, [trend_in.model_dump()])
+    if not stored:
+        await db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail=f"Trend '{trend_in.trend_name}' already exists for platform '{trend_in.platform}'"
+        )
     await db.commit()
-    await db.refresh(trend)
-    return trend
+    pattern_sketches.observe_trends(stored)
+    return _to_trend_response(stored[0])
@@ -11,8 +11,9 @@ to handle asynchronous tasks including:
 """
 from celery import Celery
 from celery.schedules import crontab
+import asyncio
 import os
-from typing import Any
+from typing import Any, Coroutine, Optional
 
 # Initialize Celery with Redis as broker and backend
 celery_app = Celery(
@@ -44,6 +45,7 @@ celery_app.conf.update(
 
     # Result backend
     result_expires=3600,  # Results expire after 1 hour
+    result_compression='gzip',  # Copy audit results can be large
     result_backend_transport_options={
         'master_name': 'mymaster',
     },
@@ -71,6 +73,20 @@ celery_app.conf.update(
             'options': {'queue': 'trends'}
         },
 
+        # Create upcoming ad_trends partitions, archive expired ones to MinIO
+        'manage-trend-partitions': {
+            'task': 'src.services.trends.tasks.manage_partitions',
+            'schedule': crontab(hour=0, minute=30),
+            'options': {'queue': 'trends'}
+        },
+
+        # Clear is_active on trends that stopped being written
+        'deactivate-stale-trends': {
+            'task': 'src.services.trends.tasks.deactivate_stale_trends',
+            'schedule': crontab(hour=1, minute=0),
+            'options': {'queue': 'trends'}
+        },
+
         # Generate daily reports at 8 AM UTC
         'generate-daily-reports': {
             'task': 'src.tasks.reporting.generate_daily_report',
@@ -81,7 +97,20 @@ celery_app.conf.update(
 )
 
 # Auto-discover tasks from services directory
-celery_app.autodiscover_tasks(['src.services', 'src.tasks'])
+celery_app.autodiscover_tasks(['src.services', 'src.services.analysis', 'src.services.trends', 'src.tasks'])
+
+# One event loop per worker process: the shared database and HTTP pools are
+# bound to the loop they were created on, so every async task reuses it to
+# keep connections alive across tasks
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def run_async(coro: Coroutine) -> Any:
+    """Run a coroutine on this worker process's event loop."""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
 
 
 # Health check task
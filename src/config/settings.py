@@ -24,14 +24,19 @@ class Settings(BaseSettings):
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8001
+    WEB_CONCURRENCY: int = 1  # uvicorn worker processes; also read by uvicorn itself
 
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./test.db"
+    DATABASE_READ_URL: str = ""  # Optional read replica for GET endpoints
+    DB_REPLICA_MAX_LAG: float = 5.0  # Seconds; reads fall back to the primary beyond this
+    DB_REPLICA_CHECK_INTERVAL: float = 5.0  # Seconds between replica lag checks
+    DB_REPLICA_CONNECT_TIMEOUT: float = 2.0  # Seconds; an unreachable replica fails fast instead of stalling reads
 
     # CORS
     ALLOWED_ORIGINS: str = "*"
 
-    @validator("ALLOWED_ORIGINS", pre=True)
+    @validator("ALLOWED_ORIGINS")
     def parse_allowed_origins(cls, v) -> List[str]:
         """Parse comma-separated origins into list."""
         if isinstance(v, str):
@@ -49,31 +54,96 @@ class Settings(BaseSettings):
     ENGARDE_API_BASE_URL: str = "http://localhost:8000"
     ENGARDE_SERVICE_API_KEY: str = ""
 
+    # Bearer token for /api/v1/internal (diagnostics); those routes 404 while unset
+    INTERNAL_API_KEY: str = ""
+
     # Logging
     LOG_LEVEL: str = "INFO"
 
     # Database Connection Pooling
-    DB_POOL_SIZE: int = 20
+    DB_POOL_SIZE: int = 20  # Per worker process
     DB_MAX_OVERFLOW: int = 10
     DB_POOL_RECYCLE: int = 3600
     DB_POOL_PRE_PING: bool = True
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_MAX_CONNECTIONS: int = 0  # Per-instance budget shared by all workers; 0 = no cap
 
     # API Rate Limiting (future use)
     RATE_LIMIT_PER_MINUTE: int = 60
 
-    # Cache Settings (Redis - future use)
+    # Cache Settings (Redis)
     REDIS_URL: str = "redis://localhost:6379/0"
     CACHE_TTL_SECONDS: int = 300  # 5 minutes
+    CACHE_REDIS_ENABLED: bool = True  # Shared second cache tier; in-process only when False
 
     # OpenAI Settings
     OPENAI_MODEL: str = "gpt-4-turbo-preview"
     OPENAI_MAX_TOKENS: int = 1000
     OPENAI_TEMPERATURE: float = 0.7
+    OPENAI_TIMEOUT: float = 60.0  # Total request timeout (seconds)
+    OPENAI_CONNECT_TIMEOUT: float = 5.0
+    OPENAI_MAX_RETRIES: int = 2
+    OPENAI_MAX_CONNECTIONS: int = 100  # Shared HTTP pool, per process
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY: float = 30.0  # Idle seconds before a pooled connection closes
+
+    # Copy Audit Cache
+    COPY_AUDIT_CACHE_ENABLED: bool = True
+    COPY_AUDIT_CACHE_TTL: int = 86400  # In-memory tier; DB rows persist until the prompt/model changes
+    COPY_AUDIT_CACHE_MAX_ENTRIES: int = 10000
+    COPY_AUDIT_BATCH_CONCURRENCY: int = 8  # Concurrent LLM calls per batch request
+    COPY_AUDIT_ITEM_TIMEOUT: float = 30.0  # Seconds per batch item
+    COPY_AUDIT_BATCH_MAX_ITEMS: int = 500
+    COPY_MICROBATCH_ENABLED: bool = False  # Coalesce concurrent audits into one LLM call
+    COPY_MICROBATCH_MAX_ITEMS: int = 8
+    COPY_MICROBATCH_MAX_WAIT_MS: int = 10
+    COPY_FAST_CONFIDENCE_THRESHOLD: float = 0.6  # mode=auto escalates to the LLM below this
+    COPY_SIMILARITY_CACHE_ENABLED: bool = True  # Reuse results for near-duplicate copy (flagged approximate)
+    COPY_SIMILARITY_THRESHOLD: float = 0.9  # Cosine similarity of hashed char n-gram vectors
+    COPY_SIMILARITY_MAX_ENTRIES: int = 5000
+    COPY_SIMILARITY_DIM: int = 1024
+
+    # Winning Pattern Aggregation
+    PATTERN_FLUSH_INTERVAL: float = 30.0  # Seconds between batched upserts of buffered patterns
+    PATTERN_BUFFER_MAX_KEYS: int = 5000  # Flush early once this many distinct patterns are buffered
+    PATTERN_SKETCH_CAPACITY: int = 256  # Space-Saving counters per (vertical, pattern_type)
+    PATTERN_SKETCH_WIDTH: int = 1024  # Count-Min columns; additive error <= e / width of total weight
+    PATTERN_SKETCH_DEPTH: int = 4  # Count-Min rows; bound holds with probability 1 - e^-depth
+    PATTERN_SKETCH_HALF_LIFE: float = 86400.0  # Seconds for an observation's weight to halve; 0 disables decay
+    PATTERN_SKETCH_MAX_SKETCHES: int = 512  # (vertical, pattern_type) sketches kept in memory
+    PATTERN_SKETCH_SYNC_INTERVAL: float = 60.0  # Seconds between merges into the shared snapshot table
 
     # Trend Settings
     DEFAULT_TREND_LIMIT: int = 10
     MAX_TREND_LIMIT: int = 100
     TREND_CACHE_TTL: int = 3600  # 1 hour
+    TREND_CACHE_STALE_TTL: int = 600  # Serve stale results this long while refreshing
+    TREND_CACHE_MAX_ENTRIES: int = 1024  # In-process LRU size, one entry per (provider, industry)
+    TREND_COUNT_CACHE_TTL: int = 60  # Upper bound on count staleness after hard deletes
+    TREND_COUNT_CACHE_MAX_ENTRIES: int = 4096
+    TREND_BULK_CHUNK_SIZE: int = 1000  # Rows validated and committed per transaction
+    TREND_BULK_MAX_ROWS: int = 50000  # Per request
+    TREND_BULK_MAX_BYTES: int = 32 * 1024 * 1024  # JSON array bodies (read whole) and single NDJSON lines
+
+    # Trend Retention (partitioning and archival apply to PostgreSQL only)
+    TREND_PARTITIONING_ENABLED: bool = False  # Set once scripts/partition_ad_trends.py has run
+    TREND_PARTITIONS_AHEAD: int = 3  # Monthly partitions created ahead of captured_at
+    TREND_RETENTION_MONTHS: int = 12  # Partitions wholly older than this are archived and dropped
+    TREND_ACTIVE_DAYS: int = 30  # Trends not written for this long get is_active cleared
+    TREND_ARCHIVE_BUCKET: str = "paid-ads-data"
+    TREND_ARCHIVE_PREFIX: str = "archive/ad_trends"
+    TREND_REHYDRATED_TTL_DAYS: int = 7  # Rehydrated partitions stay attached this long
+
+    # MinIO Object Storage
+    MINIO_ENDPOINT: str = "localhost:9000"
+    MINIO_ACCESS_KEY: str = "sankore-minio-key"
+    MINIO_SECRET_KEY: str = "sankore-minio-secret"
+    MINIO_SECURE: bool = False
+
+    # Trend Provider Fan-out
+    TREND_PROVIDER_TIMEOUT: float = 10.0  # Default per-provider deadline (seconds)
+    TREND_PROVIDER_TIMEOUTS: str = ""  # Per-provider overrides, e.g. "meta=5,tiktok=8"
+    TREND_FETCH_POLICY: str = "partial"  # partial | any | all
 
     class Config:
         env_file = ".env"
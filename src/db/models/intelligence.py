@@ -1,43 +1,110 @@
+import hashlib
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Float, Integer, JSON, DateTime, Boolean
-from sqlalchemy.types import TypeDecorator, CHAR
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Float, Integer, JSON, DateTime, Boolean, Index, LargeBinary, UniqueConstraint
+from sqlalchemy.types import TypeDecorator, BINARY
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from src.db.base import Base
 
 class GUID(TypeDecorator):
     """Platform-independent GUID type.
     Uses PostgreSQL's UUID type for PostgreSQL, otherwise uses
-    CHAR(32), storing as stringified hex values.
+    a 16-byte binary column holding the UUID's big-endian bytes, so
+    indexes stay small and ids compare in hex order.
+
+    Legacy CHAR(32) hex values still load; scripts/migrate_guid_binary.py
+    converts them, which lookups by id require.
     """
-    impl = CHAR
+    impl = BINARY
     cache_ok = True
 
     def load_dialect_impl(self, dialect):
         if dialect.name == 'postgresql':
             return dialect.type_descriptor(UUID())
+        elif dialect.name == 'sqlite':
+            # BLOB affinity; SQLite never coerces the stored bytes
+            return dialect.type_descriptor(LargeBinary())
         else:
-            return dialect.type_descriptor(CHAR(32))
+            return dialect.type_descriptor(BINARY(16))
 
     def process_bind_param(self, value, dialect):
         if value is None:
             return value
         elif dialect.name == 'postgresql':
             return str(value)
+        elif isinstance(value, uuid.UUID):
+            return value.bytes
+        elif isinstance(value, bytes) and len(value) == 16:
+            return value
         else:
-            if not isinstance(value, uuid.UUID):
-                return "%.32x" % uuid.UUID(value).int
-            else:
-                return "%.32x" % value.int
+            return uuid.UUID(value).bytes
 
     def process_result_value(self, value, dialect):
         if value is None:
             return value
         else:
             if not isinstance(value, uuid.UUID):
-                value = uuid.UUID(value)
+                value = _guid_from_db(value)
             return value
 
+    def result_processor(self, dialect, coltype):
+        # Skips the TypeDecorator wrapper and the impl's bytes() copy: one
+        # type check and one int conversion per row
+        return _guid_from_db
+
+
+_new_object = object.__new__
+_set_slot = object.__setattr__
+
+
+def _guid_from_db(value):
+    """uuid.UUID from stored bytes, without re-validating what the DB gave back."""
+    if type(value) is bytes and len(value) == 16:
+        guid = _new_object(uuid.UUID)
+        _set_slot(guid, 'int', int.from_bytes(value, 'big'))
+        _set_slot(guid, 'is_safe', uuid.SafeUUID.unknown)
+        return guid
+    if value is None or type(value) is uuid.UUID:
+        return value
+    if isinstance(value, uuid.UUID):
+        # asyncpg's own UUID subclass, which orjson does not serialize
+        guid = _new_object(uuid.UUID)
+        _set_slot(guid, 'int', value.int)
+        _set_slot(guid, 'is_safe', uuid.SafeUUID.unknown)
+        return guid
+    if isinstance(value, (bytearray, memoryview)):
+        return uuid.UUID(bytes=bytes(value))
+    if isinstance(value, bytes):
+        value = value.decode('ascii')
+    # Legacy CHAR(32) hex rows written before the binary format
+    return uuid.UUID(value)
+
+
+def trend_content_key(platform: str, trend_name: str) -> str:
+    """Stable dedup key for a trend, derived from its platform and name."""
+    return hashlib.sha256(f"{platform}\x1f{trend_name}".encode("utf-8")).hexdigest()
+
+
+def _content_key_default(context):
+    params = context.get_current_parameters()
+    return trend_content_key(params["platform"], params["trend_name"])
+
+
+def trend_description(data, trend_type: str, industry: str) -> str:
+    """Display description for a trend, resolved once when the row is written."""
+    if not data or not isinstance(data, dict):
+        return ""
+    description = data.get("description", data.get("summary", ""))
+    if not description:
+        # Fallback: create a description from available data
+        description = f"{trend_type} trend in {industry}"
+    return description
+
+
+def _description_default(context):
+    params = context.get_current_parameters()
+    return trend_description(params.get("data"), params.get("trend_type"), params.get("industry"))
+
 
 class AdTrend(Base):
     __tablename__ = "ad_trends"
@@ -48,10 +115,76 @@ class AdTrend(Base):
     industry = Column(String, nullable=False, index=True)
     trend_type = Column(String, nullable=False) # visual_style, audio, copy_angle
     trend_name = Column(String, nullable=False)
+    description = Column(String, default=_description_default)  # Derived from data on write
     trend_score = Column(Float, default=0.0)
-    data = Column(JSON, default={})
+    # JSONB on Postgres so provider metadata filters can use containment (@>)
+    data = Column(JSON().with_variant(JSONB(), "postgresql"), default={})
     captured_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped on every write; max() per filter is the listing version token
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     is_active = Column(Boolean, default=True)
+    # sha256(platform, trend_name); target of ON CONFLICT during bulk ingestion
+    content_key = Column(String(64), unique=True, default=_content_key_default)
+
+    __table_args__ = (
+        # Listing and top-K path: active trends by industry/platform, best first.
+        # Partial on is_active; INCLUDE lets Postgres answer top-K index-only.
+        Index(
+            "ix_ad_trends_active_industry_platform_score",
+            industry, platform, trend_score.desc(), id.desc(),
+            postgresql_where=is_active == True,
+            sqlite_where=is_active == True,
+            postgresql_include=["trend_name", "trend_type", "format"],
+        ),
+        # Version token lookup: max(updated_at) per industry/platform
+        Index("ix_ad_trends_industry_platform_updated", industry, platform, updated_at),
+        # Unfiltered listing ordered by score
+        Index(
+            "ix_ad_trends_active_score",
+            trend_score.desc(), id.desc(),
+            postgresql_where=is_active == True,
+            sqlite_where=is_active == True,
+        ),
+        # Retention: stale-trend deactivation and partition bounds
+        Index("ix_ad_trends_captured_at", captured_at),
+        # metadata.<key>=<value> filters; jsonb_path_ops only serves @>, and
+        # is smaller and faster for it than the default GIN opclass
+        Index(
+            "ix_ad_trends_data",
+            data,
+            postgresql_using="gin",
+            postgresql_ops={"data": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+class AdTrendKey(Base):
+    """
+    content_key -> the stored trend and the captured_at that places it.
+
+    A partitioned ad_trends can only enforce uniqueness within a partition,
+    so with TREND_PARTITIONING_ENABLED this table is the upsert arbiter.
+    """
+    __tablename__ = "ad_trend_keys"
+
+    content_key = Column(String(64), primary_key=True)
+    trend_id = Column(GUID(), nullable=False)
+    captured_at = Column(DateTime, nullable=False, index=True)
+
+class TrendPartitionArchive(Base):
+    """Lifecycle of an ad_trends partition moved out to object storage."""
+    __tablename__ = "trend_partition_archives"
+
+    partition_name = Column(String(63), primary_key=True)
+    range_start = Column(DateTime)  # None for MINVALUE
+    range_end = Column(DateTime, nullable=False)
+    status = Column(String, nullable=False)  # detached, archived, rehydrated
+    object_key = Column(String)
+    file_format = Column(String)  # parquet
+    row_count = Column(Integer)
+    size_bytes = Column(Integer)
+    detached_at = Column(DateTime)
+    archived_at = Column(DateTime)
+    rehydrated_at = Column(DateTime)
 
 class Benchmark(Base):
     __tablename__ = "benchmarks"
@@ -71,8 +204,38 @@ class WinningPattern(Base):
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     pattern_type = Column(String, nullable=False, index=True) # hook, cta, color_palette, keyword
     value = Column(String, nullable=False) # e.g. "Stop scrolling", "#FF0000"
-    vertical = Column(String, index=True)
+    # normalize_vertical(); never NULL, which would never conflict in the unique constraint
+    vertical = Column(String, nullable=False, index=True)
     performance_score = Column(Float) # Normalized score 0-100
     confidence_level = Column(Float)
     source_count = Column(Integer, default=1)
     detected_at = Column(DateTime, default=datetime.utcnow)
+    # Last time an observation was folded into this aggregate
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Upsert target for the streaming pattern aggregator
+        UniqueConstraint("pattern_type", "value", "vertical", name="uq_winning_patterns_type_value_vertical"),
+        # GET /patterns/top?vertical=
+        Index("ix_winning_patterns_vertical_count", vertical, source_count.desc()),
+    )
+
+class CachedCopyAudit(Base):
+    __tablename__ = "copy_audit_cache"
+
+    # sha256 of (normalized text, objective, model, prompt version)
+    cache_key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    prompt_version = Column(String, nullable=False)
+    result = Column(JSON, nullable=False)  # Serialized CopyAnalysisResult
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class PatternSketchSnapshot(Base):
+    __tablename__ = "pattern_sketch_snapshots"
+
+    # "{vertical}\x1f{pattern_type}"
+    sketch_key = Column(String, primary_key=True)
+    vertical = Column(String, nullable=False)
+    pattern_type = Column(String, nullable=False)
+    payload = Column(LargeBinary, nullable=False)  # Serialized HeavyHitterSketch, merged across processes
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
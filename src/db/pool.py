@@ -0,0 +1,198 @@
+"""
+Connection pool sizing and instrumentation.
+
+Pools are sized per process from Settings so that every uvicorn worker
+together stays inside the connection budget of the database. Checkout
+waits, hold times, timeouts and invalidations are recorded through pool
+events and a thin QueuePool subclass, so pool exhaustion shows up as
+numbers on the internal endpoint instead of unexplained latency.
+"""
+from typing import Any, Dict, List, Sequence, Tuple
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from src.config.settings import settings
+import time
+
+# Histogram upper bounds in milliseconds; a final +Inf bucket is implicit
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+HOLD_BUCKETS_MS = (5, 25, 100, 250, 1000, 5000, 30000, 120000)
+
+# connection_record.info key holding the perf_counter of the last checkout
+_CHECKOUT_STARTED = "sankore_checkout_started"
+
+
+def worker_pool_sizes(
+    pool_size: int = settings.DB_POOL_SIZE,
+    max_overflow: int = settings.DB_MAX_OVERFLOW,
+    max_connections: int = settings.DB_MAX_CONNECTIONS,
+    workers: int = settings.WEB_CONCURRENCY,
+) -> Tuple[int, int]:
+    """
+    (pool_size, max_overflow) for one worker process.
+
+    Without a connection budget the configured sizes apply per worker. With
+    one, each of the workers gets an equal share, split between the
+    persistent pool and overflow in the configured ratio.
+    """
+    if max_connections <= 0:
+        return pool_size, max_overflow
+    share = max(1, max_connections // max(1, workers))
+    if share >= pool_size + max_overflow:
+        return pool_size, max_overflow
+    size = max(1, round(share * pool_size / max(1, pool_size + max_overflow)))
+    return size, share - size
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with cumulative counts, Prometheus style."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative, running = {}, 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            running += count
+            cumulative[str(bound)] = running
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum, 3),
+            "mean_ms": round(self.sum / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max, 3),
+            "buckets": cumulative,
+        }
+
+
+class PoolMetrics:
+    """Counters and histograms for one engine's pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait = Histogram(WAIT_BUCKETS_MS)
+        self.hold = Histogram(HOLD_BUCKETS_MS)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "wait_ms": self.wait.snapshot(),
+            "hold_ms": self.hold.snapshot(),
+        }
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that times every checkout.
+
+    The wait covers queueing for a free connection plus opening or
+    pre-pinging it, which is the latency a request sees before its first
+    query. There is no pool event for it, hence the subclass.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.wait.observe((time.perf_counter() - started) * 1000)
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep the history
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+# name -> (engine, metrics), in registration order
+_engines: Dict[str, Tuple[AsyncEngine, PoolMetrics]] = {}
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> PoolMetrics:
+    """
+    Attach pool event hooks to an engine and register it for pool_stats().
+
+    Engines on other pool classes (NullPool for SQLite) still get connection
+    counters and hold times, just no wait histogram.
+    """
+    if name in _engines:
+        return _engines[name][1]
+    metrics = getattr(engine.sync_engine.pool, "metrics", None) or PoolMetrics()
+    _engines[name] = (engine, metrics)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.checkouts += 1
+        connection_record.info[_CHECKOUT_STARTED] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics.checkins += 1
+        started = connection_record.info.pop(_CHECKOUT_STARTED, None) if connection_record else None
+        if started is not None:
+            metrics.hold.observe((time.perf_counter() - started) * 1000)
+
+    @event.listens_for(engine.sync_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    return metrics
+
+
+def pool_stats() -> List[Dict[str, Any]]:
+    """Live state and cumulative metrics for every instrumented engine."""
+    stats = []
+    for name, (engine, metrics) in _engines.items():
+        pool = engine.sync_engine.pool
+        entry: Dict[str, Any] = {
+            "name": name,
+            "backend": engine.dialect.name,
+            "pool_class": type(pool).__name__,
+        }
+        if isinstance(pool, QueuePool):
+            entry.update({
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                # Negative while fewer than pool_size connections are open
+                "overflow": pool.overflow(),
+            })
+        entry.update(metrics.snapshot())
+        stats.append(entry)
+    return stats
@@ -1,53 +1,179 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
-import os
+from src.config.settings import settings
+from src.db.pool import InstrumentedAsyncPool, instrument_engine, worker_pool_sizes
+import asyncio
+import logging
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+def _async_url(url: str) -> str:
+    # Convert postgresql:// to postgresql+asyncpg:// for async support
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+def _engine_kwargs(url: str) -> dict:
+    # Engine configuration with production-ready settings
+    kwargs = {
+        "echo": settings.DEBUG,
+        "future": True,
+    }
+
+    # PostgreSQL-specific configuration
+    if url.startswith("postgresql"):
+        pool_size, max_overflow = worker_pool_sizes()
+        kwargs.update({
+            "poolclass": InstrumentedAsyncPool,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+        })
+    # SQLite-specific configuration
+    elif url.startswith("sqlite"):
+        kwargs.update({
+            "connect_args": {"check_same_thread": False},
+            "poolclass": NullPool,
+        })
+    return kwargs
+
+def _read_engine_kwargs(url: str) -> dict:
+    kwargs = _engine_kwargs(url)
+    if url.startswith("postgresql"):
+        # asyncpg waits 60s for an unreachable host by default
+        kwargs["connect_args"] = {"timeout": settings.DB_REPLICA_CONNECT_TIMEOUT}
+    return kwargs
+
+def _session_factory(bind: AsyncEngine) -> sessionmaker:
+    return sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+        autocommit=False,
+    )
+
 # Database URL configuration
 # Supports both SQLite (local dev) and PostgreSQL (production)
-DATABASE_URL = os.getenv(
-    "DATABASE_URL",
-    "sqlite+aiosqlite:///./test.db"
-)
+DATABASE_URL = _async_url(settings.DATABASE_URL)
+
+# Optional read replica; reads use the primary when unset
+DATABASE_READ_URL = _async_url(settings.DATABASE_READ_URL)
 
-# Convert postgresql:// to postgresql+asyncpg:// for async support
-if DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
-
-# Engine configuration with production-ready settings
-engine_kwargs = {
-    "echo": os.getenv("DEBUG", "False").lower() == "true",
-    "future": True,
-}
-
-# PostgreSQL-specific configuration
-if DATABASE_URL.startswith("postgresql"):
-    engine_kwargs.update({
-        "pool_size": 20,
-        "max_overflow": 10,
-        "pool_pre_ping": True,
-        "pool_recycle": 3600,
-    })
-# SQLite-specific configuration
-elif DATABASE_URL.startswith("sqlite"):
-    engine_kwargs.update({
-        "connect_args": {"check_same_thread": False},
-        "poolclass": NullPool,
-    })
-
-engine = create_async_engine(DATABASE_URL, **engine_kwargs)
-
-AsyncSessionLocal = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-    autocommit=False,
+engine = create_async_engine(DATABASE_URL, **_engine_kwargs(DATABASE_URL))
+read_engine = (
+    create_async_engine(DATABASE_READ_URL, **_read_engine_kwargs(DATABASE_READ_URL))
+    if DATABASE_READ_URL else engine
 )
 
+# Pool event hooks; live numbers at GET /api/v1/internal/db-pool
+instrument_engine(engine, "primary")
+if read_engine is not engine:
+    instrument_engine(read_engine, "replica")
+
+AsyncSessionLocal = _session_factory(engine)
+AsyncReadSessionLocal = _session_factory(read_engine)
+
+# Seconds of replay lag on a Postgres standby; 0 while it has replayed all
+# WAL it received, so an idle primary does not look like lag. NULL when no
+# WAL receiver is streaming: a standby cut off from the primary has replayed
+# everything it received, yet falls further behind. Without pg_read_all_stats
+# (or pg_monitor) status reads NULL, and a running receiver is trusted.
+_REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver
+            WHERE pid IS NOT NULL AND COALESCE(status, 'streaming') = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class ReplicaRouter:
+    """
+    Decides whether reads may go to the replica.
+
+    Replica lag is measured at most every check_interval seconds and cached.
+    While it exceeds max_lag, the replica cannot be reached or it is not
+    streaming from the primary, reads fall back to the primary.
+
+    Args:
+        max_lag: Largest acceptable replay lag in seconds
+        check_interval: Seconds a lag measurement is reused
+        check_timeout: Seconds allowed for one measurement
+    """
+
+    def __init__(
+        self,
+        max_lag: float = settings.DB_REPLICA_MAX_LAG,
+        check_interval: float = settings.DB_REPLICA_CHECK_INTERVAL,
+        check_timeout: float = 1.0,
+    ):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.lag: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def use_replica(self) -> bool:
+        if read_engine is engine:
+            return False
+        if self._due():
+            async with self._lock:
+                if self._due():
+                    self.lag = await self._measure_lag()
+                    self.checked_at = time.monotonic()
+        return self.lag is not None and self.lag <= self.max_lag
+
+    def _due(self) -> bool:
+        return self.checked_at is None or time.monotonic() - self.checked_at >= self.check_interval
+
+    async def _measure_lag(self) -> Optional[float]:
+        if read_engine.dialect.name != "postgresql":
+            # No portable way to measure lag; trust the replica
+            return 0.0
+        async def query_lag():
+            async with read_engine.connect() as conn:
+                result = await conn.execute(_REPLICA_LAG_SQL)
+                return result.scalar()
+
+        # Connecting counts against the timeout too: callers wait on the lock meanwhile
+        try:
+            lag = await asyncio.wait_for(query_lag(), timeout=self.check_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Replica lag check timed out after {self.check_timeout}s, reading from primary")
+            return None
+        except Exception as e:
+            logger.warning(f"Replica lag check failed, reading from primary: {e}")
+            return None
+        if lag is None:
+            logger.warning("Replica is not streaming from the primary, reading from primary")
+            return None
+        lag = float(lag)
+        if lag > self.max_lag:
+            logger.warning(f"Replica lag {lag:.1f}s exceeds {self.max_lag}s, reading from primary")
+        return lag
+
+replica_router = ReplicaRouter()
+
+async def read_session_factory() -> sessionmaker:
+    """Session factory for read-only work: the replica when healthy, else the primary."""
+    if await replica_router.use_replica():
+        return AsyncReadSessionLocal
+    return AsyncSessionLocal
+
 async def get_db():
     """
     Database session dependency for FastAPI endpoints.
@@ -1,9 +1,16 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from src.db.session import engine
+from src.db.session import engine, read_engine
 from src.db.base import Base
-from src.api.v1.endpoints import trends, analysis
+from src.api import deps
+from src.api.v1.endpoints import trends, analysis, patterns, internal
+from src.config.settings import settings
+from src.services.analysis.copy_analyzer import close_copy_analyzer, get_copy_analyzer
+from src.services.patterns.aggregator import pattern_aggregator
+from src.services.patterns.sketch import pattern_sketches
+from src.services.trends.aggregator import trend_cache
+import asyncio
 import os
 import logging
 
@@ -26,10 +33,26 @@ async def lifespan(app: FastAPI):
         await conn.run_sync(Base.metadata.create_all)
 
     logger.info("Database initialized successfully")
+
+    # One pooled OpenAI client per process, reused by every audit
+    get_copy_analyzer()
+    # Periodic batched upserts of winning patterns seen in audits
+    pattern_flusher = asyncio.create_task(pattern_aggregator.run(settings.PATTERN_FLUSH_INTERVAL))
+    # Resume heavy-hitter sketches from the shared snapshot, then keep merging into it
+    await pattern_sketches.restore()
+    sketch_syncer = asyncio.create_task(pattern_sketches.run(settings.PATTERN_SKETCH_SYNC_INTERVAL))
     yield
 
     # Shutdown
     logger.info("Sankore Intelligence Layer Shutting Down...")
+    # Cancelling runs a final flush of buffered patterns and sketch sync
+    pattern_flusher.cancel()
+    sketch_syncer.cancel()
+    await asyncio.gather(pattern_flusher, sketch_syncer, return_exceptions=True)
+    await trend_cache.close()
+    await close_copy_analyzer()
+    if read_engine is not engine:
+        await read_engine.dispose()
     await engine.dispose()
 
 app = FastAPI(
@@ -57,11 +80,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trend-Providers"],
 )
 
 # Include API routers
 app.include_router(trends.router, prefix="/api/v1/trends", tags=["trends"])
 app.include_router(analysis.router, prefix="/api/v1/analysis", tags=["analysis"])
+app.include_router(patterns.router, prefix="/api/v1/patterns", tags=["patterns"])
+app.include_router(
+    internal.router,
+    prefix="/api/v1/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(deps.require_internal_api_key)],
+)
 
 @app.get("/health")
 async def health_check():
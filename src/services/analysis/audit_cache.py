@@ -0,0 +1,106 @@
+"""
+Content-addressed cache for copy audits.
+
+Results are keyed by a hash of the normalized ad text, objective, model and
+prompt version, so identical copy resubmitted across campaigns and variants
+is analyzed once. An in-memory LRU with TTL sits in front of the
+copy_audit_cache table; changing the model or PROMPT_VERSION naturally
+misses every old entry.
+"""
+from typing import Any, Dict, Optional
+from src.config.settings import settings
+from src.db.models.intelligence import CachedCopyAudit
+from src.db.session import AsyncSessionLocal
+from src.services.cache import CacheEntry, LRUCache
+import hashlib
+import logging
+import time
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_copy(text: str) -> str:
+    """Canonical form of ad text for cache keys: NFC, collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def audit_cache_key(text: str, objective: str, model: str, prompt_version: str) -> str:
+    parts = (normalize_copy(text), objective.strip().lower(), model, prompt_version)
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class CopyAuditCache:
+    """
+    Two-level cache of serialized CopyAnalysisResult payloads.
+
+    Args:
+        ttl: Seconds an entry stays in the in-memory tier
+        max_entries: In-memory tier size; least recently used entries are evicted
+        session_factory: Async session factory for the persistent tier
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.COPY_AUDIT_CACHE_TTL,
+        max_entries: int = settings.COPY_AUDIT_CACHE_MAX_ENTRIES,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.ttl = ttl
+        self.memory: LRUCache[Dict[str, Any]] = LRUCache(max_entries)
+        self.session_factory = session_factory
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory_hits += 1
+            return entry.value
+
+        try:
+            async with self.session_factory() as session:
+                row = await session.get(CachedCopyAudit, key)
+        except Exception as e:
+            logger.warning(f"Copy audit cache lookup failed: {e}")
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.db_hits += 1
+        self._remember(key, row.result)
+        return row.result
+
+    async def set(self, key: str, result: Dict[str, Any], model: str, prompt_version: str) -> None:
+        self._remember(key, result)
+        self.stores += 1
+        try:
+            async with self.session_factory() as session:
+                await session.merge(CachedCopyAudit(
+                    cache_key=key,
+                    model=model,
+                    prompt_version=prompt_version,
+                    result=result
+                ))
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Copy audit cache write failed: {e}")
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        expires = time.time() + self.ttl
+        self.memory.set(key, CacheEntry(result, expires, expires))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_max_entries": self.memory.max_entries,
+        }
@@ -0,0 +1,67 @@
+"""
+Batch copy audits with bounded concurrency.
+
+Identical (normalized text, objective, mode, vertical) items are analyzed once. Unique items
+fan out to the analyzer under a semaphore with a per-item timeout, and
+results are yielded as each one finishes rather than after the slowest.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from src.services.analysis.audit_cache import normalize_copy
+from src.services.analysis.copy_analyzer import CopyAnalyzerService
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def stream_batch_audits(
+    analyzer: CopyAnalyzerService,
+    items: List[Tuple[str, str, str, Optional[str]]],
+    concurrency: int,
+    item_timeout: float,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Audit (text, objective, mode, vertical) items concurrently, yielding one record per input item.
+
+    Args:
+        analyzer: Shared copy analyzer
+        items: (text, objective, mode, vertical) tuples in request order
+        concurrency: Maximum analyses in flight
+        item_timeout: Seconds allowed per analysis, excluding time queued
+
+    Yields:
+        dict: {"index", "status": ok|timeout|error, "result" or "error"},
+        in completion order; duplicates of an item complete together
+    """
+    positions: Dict[Tuple[str, str, str, Optional[str]], List[int]] = {}
+    for index, (text, objective, mode, vertical) in enumerate(items):
+        key = (normalize_copy(text), objective.strip().lower(), mode, vertical)
+        positions.setdefault(key, []).append(index)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(key: Tuple[str, str, str, Optional[str]], indices: List[int]):
+        text, objective, mode, vertical = items[indices[0]]
+        async with semaphore:
+            try:
+                result = await asyncio.wait_for(
+                    analyzer.analyze_copy(text, objective, mode=mode, vertical=vertical),
+                    timeout=item_timeout
+                )
+                return indices, {"status": "ok", "result": result.model_dump()}
+            except asyncio.TimeoutError:
+                return indices, {"status": "timeout", "error": f"Timed out after {item_timeout}s"}
+            except Exception as e:
+                logger.error(f"Batch copy audit failed: {e}")
+                return indices, {"status": "error", "error": str(e)}
+
+    tasks = [asyncio.ensure_future(run(key, indices)) for key, indices in positions.items()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            indices, outcome = await next_done
+            for index in indices:
+                yield {"index": index, **outcome}
+    finally:
+        # Client went away or the stream was closed early
+        for task in tasks:
+            task.cancel()
@@ -1,8 +1,26 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from pydantic import BaseModel
+from src.config.settings import settings
+from src.services.analysis import heuristics
+from src.services.analysis.audit_cache import CopyAuditCache, audit_cache_key
+from src.services.analysis.microbatch import SYSTEM_PROMPT, CopyAnalysisMicroBatcher
+from src.services.analysis.similarity_cache import SimilarityCache
+from src.services.analysis.streaming import SECTIONS, IncrementalSectionParser
+from src.services.patterns.aggregator import PatternAggregator, pattern_aggregator
+from src.services.patterns.sketch import PatternSketches, pattern_sketches
+import httpx
 import openai
-import os
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the analysis prompt changes; it is part of the audit cache key
+PROMPT_VERSION = "1"
+
+# llm: always call the model; fast: local heuristics only; auto: heuristics,
+# escalating to the model when their confidence is below the threshold
+ANALYSIS_MODES = ("llm", "fast", "auto")
 
 class CopyAnalysisResult(BaseModel):
     score: float
@@ -10,31 +28,28 @@ class CopyAnalysisResult(BaseModel):
     ctas: List[str]
     improvements: List[str]
     winning_patterns: List[str]
+    approximate: bool = False  # Reused from a near-duplicate copy's analysis
 
-class CopyAnalyzerService:
-    def __init__(self):
-        try:
-            self.client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY", "mock-key"))
-        except Exception as e:
-            print(f"OpenAI Init Error: {e}")
-            self.client = None
+def _mock_result() -> CopyAnalysisResult:
+    return CopyAnalysisResult(
+        score=75.0,
+        hooks=["Detected Hook (Mock Mode)"],
+        ctas=["Detected CTA (Mock Mode)"],
+        improvements=["Add more urgency", "Include social proof"],
+        winning_patterns=["Benefit-First", "Problem-Solution"]
+    )
 
-    async def analyze_copy(self, ad_text: str, objective: str) -> CopyAnalysisResult:
-        """
-        Analyze ad copy using an LLM to score effectiveness and extract patterns.
-        """
-        # Check if client is available before attempting to use it
-        if self.client is None:
-            print("Warning: OpenAI client not available, returning mock data")
-            return CopyAnalysisResult(
-                score=75.0,
-                hooks=["Detected Hook (Mock Mode)"],
-                ctas=["Detected CTA (Mock Mode)"],
-                improvements=["Add more urgency", "Include social proof"],
-                winning_patterns=["Benefit-First", "Problem-Solution"]
-            )
+def _parse_result(data: Dict[str, Any]) -> CopyAnalysisResult:
+    return CopyAnalysisResult(
+        score=data.get("score", 0.0),
+        hooks=data.get("hooks", []),
+        ctas=data.get("ctas", []),
+        improvements=data.get("improvements", []),
+        winning_patterns=data.get("winning_patterns", [])
+    )
 
-        prompt = f"""
+def _analysis_messages(ad_text: str, objective: str) -> List[Dict[str, str]]:
+    prompt = f"""
         Analyze the following ad copy for a {objective} campaign.
 
         Ad Copy:
@@ -47,33 +62,248 @@ class CopyAnalyzerService:
         - improvements (list of specific suggestions)
         - winning_patterns (list of abstract patterns found, e.g. "Scarcity", "Social Proof")
         """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
 
-        try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "You are a world-class Direct Response Copywriter."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
-            )
-            content = response.choices[0].message.content
-            data = json.loads(content)
-
-            return CopyAnalysisResult(
-                score=data.get("score", 0.0),
-                hooks=data.get("hooks", []),
-                ctas=data.get("ctas", []),
-                improvements=data.get("improvements", []),
-                winning_patterns=data.get("winning_patterns", [])
+def build_openai_client() -> openai.AsyncOpenAI:
+    """
+    Build an AsyncOpenAI client on a tuned keep-alive connection pool.
+
+    Pool size and timeouts come from Settings.OPENAI_*. The client is meant
+    to be created once per process and shared by every request.
+    """
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(settings.OPENAI_TIMEOUT, connect=settings.OPENAI_CONNECT_TIMEOUT),
+    )
+    return openai.AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY or "mock-key",
+        http_client=http_client,
+        timeout=settings.OPENAI_TIMEOUT,
+        max_retries=settings.OPENAI_MAX_RETRIES,
+    )
+
+class CopyAnalyzerService:
+    def __init__(
+        self,
+        client: Optional[openai.AsyncOpenAI] = None,
+        cache: Optional[CopyAuditCache] = None,
+        microbatch: bool = False,
+        similar: Optional[SimilarityCache] = None,
+        patterns: Optional[PatternAggregator] = None,
+        sketches: Optional[PatternSketches] = None
+    ):
+        self.model = settings.OPENAI_MODEL
+        self.cache = cache
+        self.similar = similar
+        self.patterns = patterns
+        self.sketches = sketches
+        self.batcher = None
+        if client is not None:
+            self.client = client
+        else:
+            try:
+                self.client = build_openai_client()
+            except Exception as e:
+                print(f"OpenAI Init Error: {e}")
+                self.client = None
+        if microbatch and self.client is not None:
+            self.batcher = CopyAnalysisMicroBatcher(
+                self.client,
+                self.model,
+                single=self._request_single,
+                parse=_parse_result,
+                max_items=settings.COPY_MICROBATCH_MAX_ITEMS,
+                max_wait=settings.COPY_MICROBATCH_MAX_WAIT_MS / 1000,
             )
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        if self.client is not None:
+            await self.client.close()
+
+    async def analyze_copy(
+        self,
+        ad_text: str,
+        objective: str,
+        mode: str = "llm",
+        vertical: Optional[str] = None
+    ) -> CopyAnalysisResult:
+        """
+        Analyze ad copy using an LLM to score effectiveness and extract patterns.
+
+        Results are served from the audit cache when the same normalized copy
+        was already analyzed for this objective, model and prompt version,
+        then from the similarity cache (flagged approximate) when a near
+        duplicate was. Mock fallbacks are never cached.
+
+        Args:
+            ad_text: Ad copy to analyze
+            objective: Campaign objective
+            mode: One of ANALYSIS_MODES; "fast" and confident "auto" results
+                come from the local heuristic analyzer and skip the cache
+            vertical: Industry vertical the result's patterns are aggregated
+                under; only fresh model results are aggregated
+        """
+        known = await self._lookup(ad_text, objective, mode)
+        if known is not None:
+            return known
+
+        # Check if client is available before attempting to use it
+        if self.client is None:
+            print("Warning: OpenAI client not available, returning mock data")
+            return _mock_result()
+
+        try:
+            result = await self._request_analysis(ad_text, objective)
         except Exception as e:
             # Fallback for dev/mock if no key or error
             print(f"Warning: OpenAI API call failed, returning mock data. Error: {e}")
-            return CopyAnalysisResult(
-                score=75.0,
-                hooks=["Detected Hook (Mock Mode)"],
-                ctas=["Detected CTA (Mock Mode)"],
-                improvements=["Add more urgency", "Include social proof"],
-                winning_patterns=["Benefit-First", "Problem-Solution"]
-            )
+            return _mock_result()
+
+        await self._remember(ad_text, objective, result)
+        self._observe(result, vertical)
+        return result
+
+    async def stream_analysis(
+        self,
+        ad_text: str,
+        objective: str,
+        mode: str = "llm",
+        vertical: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Analyze ad copy like analyze_copy, yielding sections as the model writes them.
+
+        Yields:
+            tuple: (section, value) for each of SECTIONS as soon as it is
+            complete, then ("result", CopyAnalysisResult). Cached, heuristic
+            and mock results yield all their sections at once.
+
+        Raises:
+            Exception: If the model stream fails after sections were yielded
+        """
+        result = await self._lookup(ad_text, objective, mode)
+        if result is None and self.client is None:
+            logger.warning("OpenAI client not available, returning mock data")
+            result = _mock_result()
+
+        if result is None:
+            parser = IncrementalSectionParser()
+            streamed = False
+            try:
+                stream = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=_analysis_messages(ad_text, objective),
+                    response_format={"type": "json_object"},
+                    stream=True
+                )
+                async with stream:
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if not delta:
+                            continue
+                        for section, value in parser.feed(delta):
+                            if section in SECTIONS:
+                                streamed = True
+                                yield section, value
+                result = _parse_result(json.loads(parser.buffer))
+            except Exception as e:
+                if streamed:
+                    raise
+                logger.warning(f"OpenAI API call failed, returning mock data. Error: {e}")
+                result = _mock_result()
+            else:
+                await self._remember(ad_text, objective, result)
+                self._observe(result, vertical)
+                yield "result", result
+                return
+
+        fields = result.model_dump()
+        for section in SECTIONS:
+            yield section, fields[section]
+        yield "result", result
+
+    async def _lookup(self, ad_text: str, objective: str, mode: str) -> Optional[CopyAnalysisResult]:
+        """Answer from the heuristic analyzer, audit cache or similarity cache, if possible."""
+        if mode != "llm":
+            fields, confidence = heuristics.analyze(ad_text, objective)
+            if mode == "fast" or confidence >= settings.COPY_FAST_CONFIDENCE_THRESHOLD:
+                return CopyAnalysisResult(**fields)
+
+        if self.cache is not None:
+            cached = await self.cache.get(audit_cache_key(ad_text, objective, self.model, PROMPT_VERSION))
+            if cached is not None:
+                return CopyAnalysisResult(**cached)
+
+        if self.similar is not None:
+            neighbor = self.similar.get(ad_text, self._similarity_scope(objective))
+            if neighbor is not None:
+                return CopyAnalysisResult(**{**neighbor, "approximate": True})
+        return None
+
+    async def _remember(self, ad_text: str, objective: str, result: CopyAnalysisResult) -> None:
+        if self.cache is not None:
+            cache_key = audit_cache_key(ad_text, objective, self.model, PROMPT_VERSION)
+            await self.cache.set(cache_key, result.model_dump(), self.model, PROMPT_VERSION)
+        if self.similar is not None:
+            self.similar.add(ad_text, self._similarity_scope(objective), result.model_dump())
+
+    def _observe(self, result: CopyAnalysisResult, vertical: Optional[str]) -> None:
+        """
+        Feed a fresh model result's patterns to the pattern aggregator and sketches.
+
+        Cached, approximate, heuristic and mock results are not observed: they
+        would count the same copy again or blend estimates into the scores.
+        """
+        if self.patterns is not None:
+            self.patterns.record(result.model_dump(), vertical)
+        if self.sketches is not None:
+            self.sketches.observe_result(result.model_dump(), vertical)
+
+    def _similarity_scope(self, objective: str) -> str:
+        return f"{objective.strip().lower()}\x1f{self.model}\x1f{PROMPT_VERSION}"
+
+    async def _request_analysis(self, ad_text: str, objective: str) -> CopyAnalysisResult:
+        if self.batcher is not None:
+            return await self.batcher.submit(ad_text, objective)
+        return await self._request_single(ad_text, objective)
+
+    async def _request_single(self, ad_text: str, objective: str) -> CopyAnalysisResult:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=_analysis_messages(ad_text, objective),
+            response_format={"type": "json_object"}
+        )
+        content = response.choices[0].message.content
+        return _parse_result(json.loads(content))
+
+# Process-wide analyzer, created on first use (or at app startup) and
+# closed in the app lifespan so its connection pool is reused across requests
+_shared_analyzer: Optional[CopyAnalyzerService] = None
+
+def get_copy_analyzer() -> CopyAnalyzerService:
+    global _shared_analyzer
+    if _shared_analyzer is None:
+        cache = CopyAuditCache() if settings.COPY_AUDIT_CACHE_ENABLED else None
+        similar = SimilarityCache() if settings.COPY_SIMILARITY_CACHE_ENABLED else None
+        _shared_analyzer = CopyAnalyzerService(
+            cache=cache,
+            microbatch=settings.COPY_MICROBATCH_ENABLED,
+            similar=similar,
+            patterns=pattern_aggregator,
+            sketches=pattern_sketches
+        )
+    return _shared_analyzer
+
+async def close_copy_analyzer() -> None:
+    global _shared_analyzer
+    if _shared_analyzer is not None:
+        await _shared_analyzer.aclose()
+        _shared_analyzer = None
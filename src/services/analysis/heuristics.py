@@ -0,0 +1,186 @@
+"""
+Local heuristic copy analyzer.
+
+A deterministic, network-free fast path for copy audits. Hooks, CTAs and
+persuasion patterns (scarcity, urgency, social proof, ...) are detected with
+precompiled regexes over fixed lexicons, turned into a feature vector, and
+scored with a small linear model. Scoring many texts is a single matrix
+product, so batches cost about the same per item as one text.
+
+The result carries a confidence in [0, 1] that reflects how much signal the
+text gave the model; callers escalate to the LLM when it is low.
+"""
+from typing import Any, Dict, List, Sequence, Tuple
+import numpy as np
+import re
+
+def _lexicon(*phrases: str) -> "re.Pattern[str]":
+    """Compile phrases into one case-insensitive, word-bounded alternation."""
+    # Lookarounds rather than \b so phrases starting with a symbol ("#1") match too
+    return re.compile(r"(?<!\w)(?:" + "|".join(phrases) + r")(?!\w)", re.IGNORECASE)
+
+CTA_RE = _lexicon(
+    r"shop now", r"buy now", r"order now", r"sign up", r"signup", r"register", r"subscribe",
+    r"learn more", r"get started", r"start (?:now|today|your)", r"download", r"install",
+    r"book (?:now|a|your)", r"claim (?:your|now)", r"try (?:it )?(?:now|free|for free)",
+    r"get (?:yours|it now|your)", r"join (?:now|today|us)", r"apply now", r"call (?:now|today)",
+    r"add to cart", r"click (?:here|below)", r"tap (?:here|below)", r"discover",
+)
+SCARCITY_RE = _lexicon(
+    r"limited", r"only \d+ left", r"while (?:supplies|stocks) last", r"exclusive",
+    r"last chance", r"almost gone", r"selling fast", r"sold out", r"few (?:spots|left)",
+    r"limited (?:edition|stock|spots)",
+)
+URGENCY_RE = _lexicon(
+    r"today", r"tonight", r"now", r"hurry", r"ends (?:soon|today|tonight|sunday|midnight)",
+    r"deadline", r"don'?t miss", r"\d+ (?:hours|days) (?:left|only)", r"before it'?s gone",
+    r"final (?:hours|day|call)", r"act fast",
+)
+SOCIAL_PROOF_RE = _lexicon(
+    r"customers", r"reviews?", r"rated", r"trusted by", r"\d[\d,.]*\+? (?:people|users|customers|brands|teams)",
+    r"5[- ]star", r"#1", r"best[- ]?sell(?:er|ing)", r"award[- ]winning", r"as seen (?:on|in)",
+    r"loved by", r"recommended by",
+)
+BENEFIT_RE = _lexicon(
+    r"free", r"save", r"\d+% off", r"discount", r"guarantee[d]?", r"no risk", r"risk[- ]free",
+    r"in (?:just )?\d+ (?:minutes|days|steps)", r"instantly", r"easy", r"effortless",
+)
+HOOK_OPENER_RE = re.compile(
+    r"^(?:stop|imagine|tired of|struggling|what if|did you know|ever wonder|here'?s|the secret|"
+    r"why|how to|new:?|finally|warning|psst)\b",
+    re.IGNORECASE,
+)
+YOU_RE = _lexicon(r"you", r"your", r"you'?re", r"yours")
+NUMBER_RE = re.compile(r"\d")
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+CAPS_RE = re.compile(r"\b[A-Z]{3,}\b")
+SENTENCE_RE = re.compile(r"[^.!?\n]+[.!?]*")
+EMOJI_RE = re.compile("[\U0001F300-\U0001FAFF☀-➿]")
+
+FEATURES = (
+    "hook", "question_hook", "specific_hook", "you_focus", "cta", "scarcity",
+    "urgency", "social_proof", "benefit", "length_fit", "shouting", "emoji",
+)
+
+# Logistic model over FEATURES; tuned so plain copy of a sensible length
+# lands around 30 and copy with a hook, a CTA and two patterns around 85
+WEIGHTS = np.array([0.55, 0.35, 0.3, 0.5, 0.9, 0.45, 0.35, 0.5, 0.4, 0.45, -0.8, 0.1])
+BIAS = -1.4
+
+# Signals that count towards confidence, and the pattern names they report
+PATTERN_NAMES = {
+    "question_hook": "Question Hook",
+    "specific_hook": "Specificity",
+    "scarcity": "Scarcity",
+    "urgency": "Urgency",
+    "social_proof": "Social Proof",
+    "benefit": "Benefit-First",
+}
+
+def _sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_RE.findall(text) if s.strip()]
+
+def _length_fit(words: int) -> float:
+    """1.0 for 8-60 words, tapering off for very short or very long copy."""
+    if words < 8:
+        return words / 8
+    if words > 60:
+        return max(0.0, 1 - (words - 60) / 120)
+    return 1.0
+
+def extract_features(text: str) -> Tuple[np.ndarray, Dict[str, List[str]]]:
+    """
+    Feature vector for one text, plus the spans that triggered it.
+
+    Returns:
+        tuple: (float vector aligned with FEATURES, {"hooks": [...], "ctas": [...]})
+    """
+    sentences = _sentences(text)
+    opener = sentences[0] if sentences else ""
+    words = len(WORD_RE.findall(text))
+
+    question_hook = opener.endswith("?")
+    specific_hook = bool(NUMBER_RE.search(opener))
+    hooks = [opener] if opener and (question_hook or specific_hook or HOOK_OPENER_RE.search(opener)
+                                    or YOU_RE.search(opener)) else []
+    ctas = [s for s in sentences if CTA_RE.search(s)]
+
+    features = np.array([
+        1.0 if hooks else 0.0,
+        1.0 if question_hook else 0.0,
+        1.0 if specific_hook else 0.0,
+        min(len(YOU_RE.findall(text)) / 3, 1.0),
+        min(len(ctas), 2) / 2 + (0.5 if ctas else 0.0),
+        1.0 if SCARCITY_RE.search(text) else 0.0,
+        1.0 if URGENCY_RE.search(text) else 0.0,
+        1.0 if SOCIAL_PROOF_RE.search(text) else 0.0,
+        1.0 if BENEFIT_RE.search(text) else 0.0,
+        _length_fit(words),
+        min(len(CAPS_RE.findall(text)) / 3 + max(text.count("!") - 2, 0) / 3, 1.0),
+        1.0 if EMOJI_RE.search(text) else 0.0,
+    ])
+    return features, {"hooks": hooks, "ctas": ctas}
+
+def score_features(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score a (n_texts, len(FEATURES)) matrix in one pass.
+
+    Returns:
+        tuple: (scores in 0-100, confidences in 0-1), one per row
+    """
+    logits = matrix @ WEIGHTS + BIAS
+    scores = 100 / (1 + np.exp(-logits))
+    # Confidence grows with the number of independent signals found and is
+    # discounted for copy too short or too long to judge lexically
+    signal_columns = [FEATURES.index(name) for name in ("hook", "cta", *PATTERN_NAMES)]
+    signals = (matrix[:, signal_columns] > 0).sum(axis=1)
+    confidences = np.minimum(1.0, 0.25 + 0.15 * signals) * np.clip(matrix[:, FEATURES.index("length_fit")], 0.2, 1.0)
+    return np.round(scores, 1), np.round(confidences, 3)
+
+def _improvements(features: np.ndarray, objective: str) -> List[str]:
+    value = dict(zip(FEATURES, features))
+    suggestions = []
+    if not value["hook"]:
+        suggestions.append("Open with a hook: a question, a number or a direct 'you' statement")
+    if not value["cta"] and objective.strip().lower() not in ("awareness", "brand awareness", "reach"):
+        suggestions.append("Add a clear call to action")
+    if not value["urgency"] and not value["scarcity"]:
+        suggestions.append("Add urgency or scarcity")
+    if not value["social_proof"]:
+        suggestions.append("Include social proof")
+    if not value["benefit"]:
+        suggestions.append("Lead with a concrete benefit or offer")
+    if value["shouting"] > 0.5:
+        suggestions.append("Reduce all-caps words and exclamation marks")
+    if value["length_fit"] < 1:
+        suggestions.append("Aim for 8-60 words")
+    return suggestions
+
+def analyze_many(items: Sequence[Tuple[str, str]]) -> List[Tuple[Dict[str, Any], float]]:
+    """
+    Analyze (text, objective) pairs locally.
+
+    Returns:
+        list: (CopyAnalysisResult fields, confidence) per item, in input order
+    """
+    if not items:
+        return []
+    extracted = [extract_features(text) for text, _ in items]
+    matrix = np.vstack([features for features, _ in extracted])
+    scores, confidences = score_features(matrix)
+
+    results = []
+    for (_, objective), (features, spans), score, confidence in zip(items, extracted, scores, confidences):
+        value = dict(zip(FEATURES, features))
+        results.append(({
+            "score": float(score),
+            "hooks": spans["hooks"],
+            "ctas": spans["ctas"],
+            "improvements": _improvements(features, objective),
+            "winning_patterns": [name for key, name in PATTERN_NAMES.items() if value[key]],
+        }, float(confidence)))
+    return results
+
+def analyze(text: str, objective: str) -> Tuple[Dict[str, Any], float]:
+    """Analyze one text; see analyze_many."""
+    return analyze_many([(text, objective)])[0]
@@ -0,0 +1,154 @@
+"""
+Micro-batching of copy analyses into a single LLM call.
+
+Audits that arrive within a few milliseconds of each other are collected
+(up to max_items) and sent as one structured JSON request, so the system
+and instruction prompt is paid once per batch instead of once per ad. Each
+caller awaits its own future; results are scattered back by item id. A
+malformed batched response, or a missing/invalid item in it, falls back to
+single-item calls for the affected items.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from pydantic import ValidationError
+import asyncio
+import json
+import logging
+import openai
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = "You are a world-class Direct Response Copywriter."
+
+BATCH_PROMPT = """
+Analyze each of the following ad copies for its campaign objective.
+
+Items (JSON array of {{"id", "objective", "ad_copy"}}):
+{items}
+
+Return a JSON object {{"results": [...]}} with exactly one entry per item, each with:
+- id (the item's id, unchanged)
+- score (0-100 float)
+- hooks (list of strong opening lines found)
+- ctas (list of call to actions found)
+- improvements (list of specific suggestions)
+- winning_patterns (list of abstract patterns found, e.g. "Scarcity", "Social Proof")
+"""
+
+_PendingItem = Tuple[str, str, "asyncio.Future[Any]"]
+
+
+class CopyAnalysisMicroBatcher:
+    """
+    Coalesce concurrent analyses into batched LLM requests.
+
+    Args:
+        client: Shared AsyncOpenAI client
+        model: Chat model name
+        single: Coroutine analyzing one (text, objective); used when a batch
+            has one item and as the fallback for malformed batch output
+        parse: Builds a CopyAnalysisResult from one result dict (may raise)
+        max_items: Flush as soon as this many audits are pending
+        max_wait: Seconds the first pending audit may wait for company
+    """
+
+    def __init__(
+        self,
+        client: openai.AsyncOpenAI,
+        model: str,
+        single: Callable[[str, str], Awaitable[Any]],
+        parse: Callable[[Dict[str, Any]], Any],
+        max_items: int = 8,
+        max_wait: float = 0.01,
+    ):
+        self.client = client
+        self.model = model
+        self.single = single
+        self.parse = parse
+        self.max_items = max(1, max_items)
+        self.max_wait = max_wait
+        self._pending: List[_PendingItem] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def submit(self, ad_text: str, objective: str) -> Any:
+        """Queue one analysis and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((ad_text, objective, future))
+        if len(self._pending) >= self.max_items:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush_now)
+        return await future
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _run_batch(self, batch: List[_PendingItem]) -> None:
+        live = [item for item in batch if not item[2].done()]
+        if not live:
+            return
+        if len(live) == 1:
+            await self._run_single(live[0])
+            return
+
+        try:
+            results = await self._request_batch(live)
+        except Exception as e:
+            logger.warning(f"Batched copy analysis failed, falling back to single calls: {e}")
+            results = {}
+
+        fallbacks = []
+        for item_id, item in enumerate(live):
+            data = results.get(item_id)
+            if data is None or "score" not in data:
+                fallbacks.append(item)
+                continue
+            try:
+                parsed = self.parse(data)
+            except (ValidationError, TypeError, ValueError):
+                fallbacks.append(item)
+                continue
+            if not item[2].done():
+                item[2].set_result(parsed)
+
+        if fallbacks:
+            await asyncio.gather(*(self._run_single(item) for item in fallbacks))
+
+    async def _run_single(self, item: _PendingItem) -> None:
+        ad_text, objective, future = item
+        try:
+            result = await self.single(ad_text, objective)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    async def _request_batch(self, batch: List[_PendingItem]) -> Dict[int, Dict[str, Any]]:
+        items = [
+            {"id": item_id, "objective": objective, "ad_copy": ad_text}
+            for item_id, (ad_text, objective, _) in enumerate(batch)
+        ]
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": BATCH_PROMPT.format(items=json.dumps(items, ensure_ascii=False))}
+            ],
+            response_format={"type": "json_object"}
+        )
+        data = json.loads(response.choices[0].message.content)
+        results = {}
+        for entry in data.get("results", []):
+            if isinstance(entry, dict) and isinstance(entry.get("id"), int):
+                results[entry["id"]] = entry
+        return results
@@ -0,0 +1,114 @@
+"""
+Near-duplicate cache for copy audits.
+
+Ad variants that differ by a word, a number or an emoji miss the exact
+content-hash cache. Here each analyzed text is embedded locally as a hashed
+character n-gram vector (no network, no model), and new texts are matched
+against an in-memory matrix of those vectors by cosine similarity. A match
+at or above the threshold, for the same objective, reuses the earlier
+result; callers flag it as approximate.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from src.config.settings import settings
+from src.services.analysis.audit_cache import normalize_copy
+import numpy as np
+import zlib
+
+NGRAM_SIZES = (3, 4)
+
+
+def vectorize(text: str, dim: int) -> np.ndarray:
+    """
+    L2-normalized hashed character n-gram vector of the normalized text.
+
+    Each n-gram is hashed into one of dim buckets with a hash-derived sign,
+    so collisions tend to cancel rather than accumulate.
+    """
+    padded = f" {normalize_copy(text).lower()} "
+    hashes = np.fromiter(
+        (zlib.crc32(padded[i:i + n].encode("utf-8")) for n in NGRAM_SIZES for i in range(len(padded) - n + 1)),
+        dtype=np.uint32,
+    )
+    vector = np.zeros(dim, dtype=np.float32)
+    if hashes.size:
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        np.add.at(vector, (hashes % dim).astype(np.intp), signs)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SimilarityCache:
+    """
+    Nearest-neighbor lookup of analysis results over hashed n-gram vectors.
+
+    Vectors live in one preallocated float32 matrix that grows by doubling
+    up to max_entries; the least recently used slot is reused once full.
+
+    Args:
+        threshold: Minimum cosine similarity for a hit
+        max_entries: Maximum number of remembered texts
+        dim: Vector size
+    """
+
+    def __init__(
+        self,
+        threshold: float = settings.COPY_SIMILARITY_THRESHOLD,
+        max_entries: int = settings.COPY_SIMILARITY_MAX_ENTRIES,
+        dim: int = settings.COPY_SIMILARITY_DIM,
+    ):
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.dim = dim
+        self.vectors = np.zeros((min(256, self.max_entries), dim), dtype=np.float32)
+        self.scopes = np.empty(len(self.vectors), dtype=object)
+        self.results: Dict[int, Dict[str, Any]] = {}
+        self.lru: "OrderedDict[int, None]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str, scope: str) -> Optional[Dict[str, Any]]:
+        """Result of the most similar remembered text in scope, if similar enough."""
+        if self.size:
+            similarities = self.vectors[:self.size] @ vectorize(text, self.dim)
+            similarities[self.scopes[:self.size] != scope] = -1.0
+            slot = int(np.argmax(similarities))
+            if similarities[slot] >= self.threshold:
+                self.lru.move_to_end(slot)
+                self.hits += 1
+                return self.results[slot]
+        self.misses += 1
+        return None
+
+    def add(self, text: str, scope: str, result: Dict[str, Any]) -> None:
+        if self.size < self.max_entries:
+            if self.size == len(self.vectors):
+                self._grow()
+            slot = self.size
+            self.size += 1
+        else:
+            slot, _ = self.lru.popitem(last=False)
+        self.vectors[slot] = vectorize(text, self.dim)
+        self.scopes[slot] = scope
+        self.results[slot] = result
+        self.lru[slot] = None
+
+    def _grow(self) -> None:
+        capacity = min(len(self.vectors) * 2, self.max_entries)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        scopes = np.empty(capacity, dtype=object)
+        scopes[:self.size] = self.scopes[:self.size]
+        self.vectors, self.scopes = vectors, scopes
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": self.size,
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+        }
@@ -0,0 +1,88 @@
+"""
+Incremental parsing of a streamed JSON analysis.
+
+The model streams its JSON object a few characters at a time. The parser
+scans the text as it arrives and reports each top-level member as soon as
+its value is complete, so callers can forward the score, hooks, ctas and
+improvements as separate events long before the closing brace.
+"""
+from typing import Any, List, Optional, Tuple
+import json
+
+# Top-level members of CopyAnalysisResult, in the order the prompt asks for them
+SECTIONS = ("score", "hooks", "ctas", "improvements", "winning_patterns")
+
+
+class IncrementalSectionParser:
+    """
+    Emit (key, value) for each completed top-level member of a JSON object.
+
+    Only the structure needed to find member boundaries is tracked (depth,
+    strings and escapes); each finished value is decoded with json.loads.
+    Members whose value is not valid JSON are skipped; the final validation
+    of the whole document is left to the caller.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.string_start = 0
+        self.expect_key = True
+        self.key: Optional[str] = None
+        self.value_start: Optional[int] = None
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Consume the next chunk and return the members it completed."""
+        self.buffer += text
+        completed = []
+        for i in range(self.position, len(self.buffer)):
+            char = self.buffer[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.expect_key:
+                        self.key = json.loads(self.buffer[self.string_start:i + 1])
+                continue
+
+            if char == '"':
+                self.in_string = True
+                self.string_start = i
+                self._start_value(i)
+            elif char in "{[":
+                self._start_value(i)
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self._finish_value(i, completed)
+            elif self.depth == 1 and char == ":":
+                self.expect_key = False
+                self.value_start = None
+            elif self.depth == 1 and char == ",":
+                self._finish_value(i, completed)
+                self.expect_key = True
+            elif not char.isspace():
+                self._start_value(i)
+        self.position = len(self.buffer)
+        return completed
+
+    def _start_value(self, index: int) -> None:
+        if self.depth == 1 and not self.expect_key and self.value_start is None:
+            self.value_start = index
+
+    def _finish_value(self, end: int, completed: List[Tuple[str, Any]]) -> None:
+        if self.key is None or self.value_start is None:
+            return
+        try:
+            completed.append((self.key, json.loads(self.buffer[self.value_start:end])))
+        except ValueError:
+            pass
+        self.key = None
+        self.value_start = None
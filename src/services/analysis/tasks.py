@@ -0,0 +1,36 @@
+"""
+Celery tasks for copy analysis.
+
+Tasks are named under src.services.analysis, so celery_app routes them to
+the analysis queue and slow LLM calls run on worker pods instead of holding
+API workers.
+"""
+from typing import Any, Dict, Optional
+from celery.signals import worker_process_shutdown
+from src.celery_app import celery_app, run_async as _run
+from src.services.analysis.copy_analyzer import get_copy_analyzer
+from src.services.patterns.aggregator import pattern_aggregator
+from src.services.patterns.sketch import pattern_sketches
+
+
+@celery_app.task(name='src.services.analysis.tasks.audit_copy')
+def audit_copy(text: str, objective: str, mode: str = "llm", vertical: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Analyze ad copy on a worker.
+
+    Returns:
+        dict: Serialized CopyAnalysisResult
+    """
+    result = _run(get_copy_analyzer().analyze_copy(text, objective, mode=mode, vertical=vertical))
+    # Workers have no lifespan loop; piggyback pattern flushes on tasks
+    _run(pattern_aggregator.flush_if_due())
+    _run(pattern_sketches.sync_if_due())
+    return result.model_dump()
+
+
+@worker_process_shutdown.connect
+def _flush_patterns(**kwargs) -> None:
+    if len(pattern_aggregator):
+        _run(pattern_aggregator.flush())
+    if pattern_sketches.pending:
+        _run(pattern_sketches.sync())
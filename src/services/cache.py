@@ -0,0 +1,253 @@
+"""
+Two-tier TTL cache with request coalescing and stale-while-revalidate.
+
+Tier 1 is an in-process LRU; tier 2 is Redis, shared by all workers. Entries
+are fresh for `ttl` seconds and may then be served stale for `stale_ttl`
+more seconds while a single background task refreshes them. Concurrent misses
+for the same key share one loader call (single-flight).
+"""
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, Set, TypeVar
+import asyncio
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Seconds to stop talking to Redis after a connection error
+REDIS_RETRY_COOLDOWN = 30.0
+
+
+class CacheEntry(Generic[T]):
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value: T, fresh_until: float, stale_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+    def is_usable(self, now: float) -> bool:
+        return now < self.stale_until
+
+
+class LRUCache(Generic[T]):
+    """Bounded in-process LRU of CacheEntry objects; expired entries are dropped on read."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry[T]]" = OrderedDict()
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[CacheEntry[T]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not entry.is_usable(time.time() if now is None else now):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry[T]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TwoTierCache(Generic[T]):
+    """
+    Cache loader results in-process and in Redis.
+
+    Args:
+        namespace: Redis key prefix
+        ttl: Seconds an entry is served as fresh
+        stale_ttl: Extra seconds an entry may be served while being refreshed
+        max_entries: Size of the in-process LRU tier
+        redis_url: Redis connection URL; None disables the shared tier
+        encode: Converts a value to something JSON-serializable for Redis
+        decode: Inverse of encode
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        max_entries: int = 1024,
+        redis_url: Optional[str] = None,
+        encode: Callable[[T], Any] = lambda value: value,
+        decode: Callable[[Any], T] = lambda data: data,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.local: LRUCache[T] = LRUCache(max_entries)
+        self.redis_url = redis_url
+        self._encode = encode
+        self._decode = decode
+        self._redis = None
+        self._redis_disabled_until = 0.0
+        self._inflight: Dict[str, "asyncio.Future[T]"] = {}
+        self._background: Set[asyncio.Task] = set()
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[T]],
+        refresh: bool = False,
+    ) -> T:
+        """
+        Return the cached value for `key`, calling `loader` on a miss.
+
+        A stale hit is returned immediately and refreshed in the background.
+        With refresh=True the cache is bypassed on read but still updated.
+
+        Raises:
+            Exception: Whatever the loader raised on a miss; failures are never cached
+        """
+        if not refresh:
+            entry = await self._lookup(key)
+            if entry is not None:
+                if not entry.is_fresh(time.time()):
+                    self._refresh_in_background(key, loader)
+                return entry.value
+        return await self._load(key, loader)
+
+    async def invalidate(self, key: str) -> None:
+        self.local.delete(key)
+        client = self._get_redis()
+        if client is not None:
+            try:
+                await client.delete(self._redis_key(key))
+            except Exception as e:
+                self._redis_failed(e)
+
+    async def close(self) -> None:
+        for task in list(self._background):
+            task.cancel()
+        if self._redis is not None:
+            try:
+                await self._redis.close()
+            except Exception:
+                pass
+            self._redis = None
+
+    async def _lookup(self, key: str) -> Optional[CacheEntry[T]]:
+        now = time.time()
+        entry = self.local.get(key, now)
+        if entry is not None:
+            return entry
+
+        payload = await self._redis_get(key)
+        if payload is None:
+            return None
+        entry = CacheEntry(self._decode(payload["value"]), payload["fresh_until"], payload["stale_until"])
+        if not entry.is_usable(now):
+            return None
+        self.local.set(key, entry)
+        return entry
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[T]]) -> T:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._run_loader(key, loader))
+            self._inflight[key] = future
+            future.add_done_callback(
+                lambda done: self._inflight.pop(key) if self._inflight.get(key) is done else None
+            )
+        # Shield so one cancelled caller does not cancel the load for the rest
+        return await asyncio.shield(future)
+
+    async def _run_loader(self, key: str, loader: Callable[[], Awaitable[T]]) -> T:
+        value = await loader()
+        now = time.time()
+        entry = CacheEntry(value, now + self.ttl, now + self.ttl + self.stale_ttl)
+        self.local.set(key, entry)
+        await self._redis_set(key, entry)
+        return value
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], Awaitable[T]]) -> None:
+        if key in self._inflight:
+            return
+
+        async def refresh():
+            try:
+                await self._load(key, loader)
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {self.namespace}:{key}: {e}")
+
+        task = asyncio.ensure_future(refresh())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _redis_key(self, key: str) -> str:
+        return f"sankore:{self.namespace}:{key}"
+
+    def _get_redis(self):
+        if not self.redis_url or time.time() < self._redis_disabled_until:
+            return None
+        if self._redis is None:
+            try:
+                import redis.asyncio as aioredis
+                self._redis = aioredis.from_url(
+                    self.redis_url,
+                    socket_connect_timeout=0.5,
+                    socket_timeout=0.5,
+                )
+            except Exception as e:
+                self._redis_failed(e)
+                return None
+        return self._redis
+
+    def _redis_failed(self, error: Exception) -> None:
+        logger.warning(
+            f"Redis unavailable for cache {self.namespace!r}, "
+            f"using in-process tier only for {REDIS_RETRY_COOLDOWN:.0f}s: {error}"
+        )
+        self._redis_disabled_until = time.time() + REDIS_RETRY_COOLDOWN
+
+    async def _redis_get(self, key: str) -> Optional[Dict[str, Any]]:
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            raw = await client.get(self._redis_key(key))
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    async def _redis_set(self, key: str, entry: CacheEntry[T]) -> None:
+        client = self._get_redis()
+        if client is None:
+            return
+        payload = json.dumps({
+            "value": self._encode(entry.value),
+            "fresh_until": entry.fresh_until,
+            "stale_until": entry.stale_until,
+        }, default=str)
+        expire = max(1, int(entry.stale_until - time.time()))
+        try:
+            await client.set(self._redis_key(key), payload, ex=expire)
+        except Exception as e:
+            self._redis_failed(e)
@@ -0,0 +1,231 @@
+"""
+Streaming aggregation of winning patterns from copy audits.
+
+Each audit result contributes its winning patterns, hooks and CTAs for a
+vertical. Observations are folded into an in-memory buffer keyed by
+(pattern_type, value, vertical) and flushed periodically as one multi-row
+upsert that adds to WinningPattern.source_count and updates the running
+mean of performance_score, so reads never have to scan raw audits.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config.settings import settings
+from src.db.models.intelligence import WinningPattern
+from src.db.session import AsyncSessionLocal
+import asyncio
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Stored for audits that do not name a vertical; NULL would defeat the
+# (pattern_type, value, vertical) unique constraint
+DEFAULT_VERTICAL = "general"
+
+# Longest stored pattern value; hooks and CTAs are whole sentences
+MAX_VALUE_LENGTH = 200
+
+# Observations needed for confidence_level to reach 0.5
+CONFIDENCE_PRIOR = 10
+
+# Rows per upsert statement, well below the bind parameter limits
+UPSERT_CHUNK_SIZE = 1000
+
+# CopyAnalysisResult field -> WinningPattern.pattern_type
+RESULT_PATTERN_TYPES = {
+    "winning_patterns": "pattern",
+    "hooks": "hook",
+    "ctas": "cta",
+}
+
+_Key = Tuple[str, str, str]
+
+
+def normalize_vertical(vertical: Optional[str]) -> str:
+    return (vertical or "").strip().lower() or DEFAULT_VERTICAL
+
+
+def normalize_pattern_value(value: str) -> str:
+    return " ".join(value.split())[:MAX_VALUE_LENGTH]
+
+
+def pattern_confidence(source_count):
+    """Confidence grows with the number of observations behind an aggregate."""
+    return source_count / (source_count + CONFIDENCE_PRIOR)
+
+
+def result_patterns(result: Dict[str, Any]) -> Iterable[Tuple[str, str]]:
+    """(pattern_type, value) pairs found in a serialized CopyAnalysisResult."""
+    for field, pattern_type in RESULT_PATTERN_TYPES.items():
+        seen = set()
+        for raw in result.get(field) or []:
+            value = normalize_pattern_value(str(raw))
+            if value and value.lower() not in seen:
+                seen.add(value.lower())
+                yield pattern_type, value
+
+
+class PatternAggregator:
+    """
+    Buffer pattern observations in memory and flush them as batched upserts.
+
+    Args:
+        session_factory: Async session factory used for flushes
+        max_keys: Buffered (pattern_type, value, vertical) keys that trigger
+            an early flush
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, max_keys: int = settings.PATTERN_BUFFER_MAX_KEYS):
+        self.session_factory = session_factory
+        self.max_keys = max_keys
+        # key -> [score sum, observations]
+        self._buffer: Dict[_Key, List[float]] = {}
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self.last_flush = time.monotonic()
+
+    def record(self, result: Dict[str, Any], vertical: Optional[str]) -> None:
+        """Fold one audit result into the buffer; never touches the database."""
+        vertical = normalize_vertical(vertical)
+        score = float(result.get("score") or 0.0)
+        for pattern_type, value in result_patterns(result):
+            entry = self._buffer.setdefault((pattern_type, value, vertical), [0.0, 0])
+            entry[0] += score
+            entry[1] += 1
+        if len(self._buffer) >= self.max_keys:
+            self._wake.set()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    async def flush(self) -> int:
+        """
+        Write buffered observations.
+
+        Returns:
+            int: Number of aggregates written. On failure the observations are
+            put back into the buffer and 0 is returned.
+        """
+        async with self._lock:
+            self._wake.clear()
+            self.last_flush = time.monotonic()
+            batch, self._buffer = self._buffer, {}
+            if not batch:
+                return 0
+            try:
+                async with self.session_factory() as session:
+                    await upsert_patterns(session, batch)
+                    await session.commit()
+            except Exception as e:
+                logger.error(f"Winning pattern flush of {len(batch)} aggregates failed: {e}")
+                for key, (score_sum, count) in batch.items():
+                    entry = self._buffer.setdefault(key, [0.0, 0])
+                    entry[0] += score_sum
+                    entry[1] += count
+                return 0
+            return len(batch)
+
+    async def flush_if_due(self, interval: float = settings.PATTERN_FLUSH_INTERVAL) -> int:
+        """Flush when the interval has passed or the buffer is full."""
+        if self._wake.is_set() or time.monotonic() - self.last_flush >= interval:
+            return await self.flush()
+        return 0
+
+    async def run(self, interval: float = settings.PATTERN_FLUSH_INTERVAL) -> None:
+        """Flush every interval seconds (sooner when the buffer fills) until cancelled."""
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+                await self.flush()
+        finally:
+            await self.flush()
+
+
+async def upsert_patterns(db: AsyncSession, batch: Dict[_Key, List[float]]) -> None:
+    """
+    Add batched observations to WinningPattern rows.
+
+    source_count grows by the batch count and performance_score becomes the
+    mean over all observations, old and new.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "pattern_type": pattern_type,
+            "value": value,
+            "vertical": vertical,
+            "performance_score": score_sum / count,
+            "source_count": count,
+            "confidence_level": pattern_confidence(count),
+            "detected_at": now,
+            "updated_at": now,
+        }
+        for (pattern_type, value, vertical), (score_sum, count) in batch.items()
+    ]
+
+    dialect = db.get_bind().dialect.name
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+        if dialect in ("postgresql", "sqlite"):
+            await _upsert_patterns_chunk(db, dialect, chunk)
+        else:
+            await _upsert_patterns_fallback(db, chunk)
+
+
+async def _upsert_patterns_chunk(db: AsyncSession, dialect: str, rows: List[Dict[str, Any]]) -> None:
+    dialect_insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    table = WinningPattern.__table__
+    stmt = dialect_insert(table).values(rows)
+    new = stmt.excluded
+    old_count = func.coalesce(table.c.source_count, 0)
+    old_score = func.coalesce(table.c.performance_score, new.performance_score)
+    total = old_count + new.source_count
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.pattern_type, table.c.value, table.c.vertical],
+        set_={
+            "source_count": total,
+            "performance_score": (old_score * old_count + new.performance_score * new.source_count) / total,
+            # Float division; source counts are integers
+            "confidence_level": pattern_confidence(total * 1.0),
+            "updated_at": new.updated_at,
+        }
+    )
+    await db.execute(stmt)
+
+
+async def _upsert_patterns_fallback(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Portable path for dialects without ON CONFLICT: one lookup, then ORM writes."""
+    existing = await db.scalars(
+        select(WinningPattern).where(WinningPattern.value.in_({row["value"] for row in rows}))
+    )
+    by_key = {(p.pattern_type, p.value, p.vertical): p for p in existing.all()}
+    new_rows = []
+    for row in rows:
+        pattern = by_key.get((row["pattern_type"], row["value"], row["vertical"]))
+        if pattern is None:
+            new_rows.append(row)
+            continue
+        total = (pattern.source_count or 0) + row["source_count"]
+        pattern.performance_score = (
+            (pattern.performance_score or 0.0) * (pattern.source_count or 0)
+            + row["performance_score"] * row["source_count"]
+        ) / total
+        pattern.source_count = total
+        pattern.confidence_level = pattern_confidence(total)
+        pattern.updated_at = row["updated_at"]
+    if new_rows:
+        await db.execute(insert(WinningPattern), new_rows)
+    await db.flush()
+
+
+# Process-wide aggregator, flushed by the app lifespan (or after Celery tasks)
+pattern_aggregator = PatternAggregator()
@@ -0,0 +1,399 @@
+"""
+Constant-memory, time-decayed heavy hitters per (vertical, pattern_type).
+
+Each sketch pairs a Space-Saving summary (the top-K candidates, each with a
+count and an overestimation error) with a Count-Min table that tightens the
+upper bound of every estimate. Memory per sketch is fixed by its capacity,
+width and depth, however many distinct phrases arrive.
+
+Decay uses forward decay: an observation at time t is added with weight
+exp(rate * (t - landmark)), and estimates are scaled by
+exp(-rate * (now - landmark)) when read. Old observations therefore fade
+with the configured half-life without touching every counter on each tick;
+the landmark is moved forward (rescaling all weights) before they overflow.
+
+Sketches are mergeable. Every process keeps the observations made since its
+last sync separately and periodically merges them into a shared snapshot
+row per sketch, so all API and worker processes converge on the same view
+and a restart resumes from the snapshot.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from src.config.settings import settings
+from src.db.models.intelligence import AdTrend, PatternSketchSnapshot
+from src.db.session import AsyncSessionLocal
+from src.services.patterns.aggregator import normalize_pattern_value, normalize_vertical, result_patterns
+import asyncio
+import hashlib
+import heapq
+import logging
+import math
+import numpy as np
+import orjson
+import struct
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Move the landmark once new observations would be boosted beyond this
+MAX_BOOST = 1e6
+
+_SketchKey = Tuple[str, str]
+
+
+class HeavyHitterSketch:
+    """
+    Space-Saving top-K with a Count-Min table and forward exponential decay.
+
+    Args:
+        capacity: Space-Saving counters (the K tracked candidates)
+        width: Count-Min columns
+        depth: Count-Min rows
+        half_life: Seconds for an observation's weight to halve; 0 disables decay
+        landmark: Decay reference time (epoch seconds), defaults to now
+    """
+
+    def __init__(self, capacity: int, width: int, depth: int, half_life: float, landmark: Optional[float] = None):
+        self.capacity = max(1, capacity)
+        self.width = width
+        self.depth = depth
+        self.half_life = half_life
+        self.rate = math.log(2) / half_life if half_life > 0 else 0.0
+        self.landmark = time.time() if landmark is None else landmark
+        self.counts: Dict[str, float] = {}
+        self.errors: Dict[str, float] = {}
+        self.table = np.zeros((depth, width))
+        self.total = 0.0
+
+    def empty_like(self) -> "HeavyHitterSketch":
+        return HeavyHitterSketch(self.capacity, self.width, self.depth, self.half_life, self.landmark)
+
+    def copy(self) -> "HeavyHitterSketch":
+        clone = self.empty_like()
+        clone.counts = dict(self.counts)
+        clone.errors = dict(self.errors)
+        clone.table = self.table.copy()
+        clone.total = self.total
+        return clone
+
+    def _columns(self, value: str) -> np.ndarray:
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype="<u4") % self.width
+
+    def _floor(self) -> float:
+        """Largest count an untracked item can have."""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0.0
+
+    def add(self, value: str, weight: float = 1.0, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        boost = math.exp(self.rate * (now - self.landmark))
+        if boost > MAX_BOOST:
+            self.rebase(now)
+            boost = 1.0
+        weight *= boost
+
+        self.total += weight
+        self.table[np.arange(self.depth), self._columns(value)] += weight
+        if value in self.counts:
+            self.counts[value] += weight
+        elif len(self.counts) < self.capacity:
+            self.counts[value] = weight
+            self.errors[value] = 0.0
+        else:
+            # Space-Saving: the new item takes over the smallest counter
+            victim = min(self.counts, key=self.counts.__getitem__)
+            floor = self.counts.pop(victim)
+            del self.errors[victim]
+            self.counts[value] = floor + weight
+            self.errors[value] = floor
+
+    def rebase(self, landmark: float) -> None:
+        """Move the decay landmark, rescaling stored weights so estimates are unchanged."""
+        factor = math.exp(-self.rate * (landmark - self.landmark))
+        if factor != 1.0:
+            self.counts = {value: count * factor for value, count in self.counts.items()}
+            self.errors = {value: error * factor for value, error in self.errors.items()}
+            self.table *= factor
+            self.total *= factor
+        self.landmark = landmark
+
+    def merge(self, other: "HeavyHitterSketch") -> "HeavyHitterSketch":
+        """Fold another sketch with the same shape into this one."""
+        other = other.copy()
+        landmark = max(self.landmark, other.landmark)
+        self.rebase(landmark)
+        other.rebase(landmark)
+
+        self.table += other.table
+        self.total += other.total
+        # An item untracked on one side may still have up to that side's floor
+        floor, other_floor = self._floor(), other._floor()
+        counts, errors = {}, {}
+        for value in self.counts.keys() | other.counts.keys():
+            counts[value] = self.counts.get(value, floor) + other.counts.get(value, other_floor)
+            errors[value] = self.errors.get(value, floor) + other.errors.get(value, other_floor)
+        kept = heapq.nlargest(self.capacity, counts, key=counts.__getitem__)
+        self.counts = {value: counts[value] for value in kept}
+        self.errors = {value: errors[value] for value in kept}
+        return self
+
+    def _scale(self, now: float) -> float:
+        return math.exp(-self.rate * (now - self.landmark))
+
+    def error_bound(self, now: Optional[float] = None) -> float:
+        """Additive error bound on any estimate, in decayed weight."""
+        now = time.time() if now is None else now
+        return self._scale(now) * min(self.total / self.capacity, math.e * self.total / self.width)
+
+    def top(self, k: int, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        The k heaviest tracked items.
+
+        Returns:
+            list: {"value", "estimate", "lower_bound"} in decayed weight; the
+            true weight lies between lower_bound and estimate
+        """
+        now = time.time() if now is None else now
+        scale = self._scale(now)
+        rows = np.arange(self.depth)
+        items = []
+        for value in heapq.nlargest(k, self.counts, key=self.counts.__getitem__):
+            count = self.counts[value]
+            upper = min(count, float(self.table[rows, self._columns(value)].min()))
+            items.append({
+                "value": value,
+                "estimate": round(upper * scale, 4),
+                "lower_bound": round(max(count - self.errors[value], 0.0) * scale, 4),
+            })
+        return items
+
+    def to_bytes(self) -> bytes:
+        header = orjson.dumps({
+            "capacity": self.capacity,
+            "width": self.width,
+            "depth": self.depth,
+            "half_life": self.half_life,
+            "landmark": self.landmark,
+            "total": self.total,
+            "counts": self.counts,
+            "errors": self.errors,
+        })
+        return zlib.compress(struct.pack("<I", len(header)) + header + self.table.astype("<f8").tobytes())
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "HeavyHitterSketch":
+        raw = zlib.decompress(payload)
+        (header_length,) = struct.unpack_from("<I", raw)
+        header = orjson.loads(raw[4:4 + header_length])
+        sketch = cls(header["capacity"], header["width"], header["depth"], header["half_life"], header["landmark"])
+        sketch.total = header["total"]
+        sketch.counts = header["counts"]
+        sketch.errors = header["errors"]
+        sketch.table = np.frombuffer(raw[4 + header_length:], dtype="<f8").reshape(sketch.depth, sketch.width).copy()
+        return sketch
+
+
+class PatternSketches:
+    """
+    Heavy-hitter sketches keyed by (vertical, pattern_type), synced across processes.
+
+    live holds what this process serves: the last synced snapshot plus local
+    observations since. pending holds only the local observations, which
+    sync() merges into the snapshot table.
+    """
+
+    def __init__(
+        self,
+        capacity: int = settings.PATTERN_SKETCH_CAPACITY,
+        width: int = settings.PATTERN_SKETCH_WIDTH,
+        depth: int = settings.PATTERN_SKETCH_DEPTH,
+        half_life: float = settings.PATTERN_SKETCH_HALF_LIFE,
+        max_sketches: int = settings.PATTERN_SKETCH_MAX_SKETCHES,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.shape = (capacity, width, depth, half_life)
+        self.max_sketches = max_sketches
+        self.session_factory = session_factory
+        self.live: "OrderedDict[_SketchKey, HeavyHitterSketch]" = OrderedDict()
+        self.pending: Dict[_SketchKey, HeavyHitterSketch] = {}
+        self._lock = asyncio.Lock()
+        self.last_sync = time.monotonic()
+        self._synced_at: Optional[datetime] = None
+
+    def _new(self) -> HeavyHitterSketch:
+        return HeavyHitterSketch(*self.shape)
+
+    def _compatible(self, sketch: HeavyHitterSketch) -> bool:
+        return (sketch.capacity, sketch.width, sketch.depth, sketch.half_life) == self.shape
+
+    def _set_live(self, key: _SketchKey, sketch: HeavyHitterSketch) -> None:
+        self.live[key] = sketch
+        self.live.move_to_end(key)
+        while len(self.live) > self.max_sketches:
+            self.live.popitem(last=False)
+
+    def observe(self, vertical: Optional[str], pattern_type: str, value: str, weight: float = 1.0) -> None:
+        value = normalize_pattern_value(value)
+        if not value:
+            return
+        key = (normalize_vertical(vertical), pattern_type)
+        now = time.time()
+        live = self.live.get(key)
+        if live is None:
+            live = self._new()
+        self._set_live(key, live)
+        live.add(value, weight, now)
+        if key not in self.pending and len(self.pending) >= self.max_sketches:
+            return
+        self.pending.setdefault(key, self._new()).add(value, weight, now)
+
+    def observe_result(self, result: Dict[str, Any], vertical: Optional[str]) -> None:
+        """Count the patterns, hooks and CTAs of a serialized CopyAnalysisResult."""
+        for pattern_type, value in result_patterns(result):
+            self.observe(vertical, pattern_type, value)
+
+    def observe_trends(self, trends: Iterable[AdTrend]) -> None:
+        """Count newly stored trends by industry and trend_type; skipped duplicates are not passed in."""
+        for trend in trends:
+            self.observe(trend.industry, trend.trend_type or "trend", trend.trend_name)
+
+    def top(self, vertical: Optional[str], pattern_type: str, k: int) -> Dict[str, Any]:
+        """
+        Current heavy hitters for one sketch.
+
+        Returns:
+            dict: total decayed weight, the additive error bound of every
+            estimate and the probability it holds, and the top k items
+        """
+        now = time.time()
+        sketch = self.live.get((normalize_vertical(vertical), pattern_type)) or self._new()
+        return {
+            "total": round(sketch.total * sketch._scale(now), 4),
+            "error_bound": round(sketch.error_bound(now), 4),
+            "confidence": round(1 - math.exp(-sketch.depth), 4),
+            "half_life_seconds": sketch.half_life,
+            "items": sketch.top(k, now),
+        }
+
+    async def restore(self) -> int:
+        """Load the most recently updated snapshots into live."""
+        try:
+            async with self.session_factory() as session:
+                result = await session.scalars(
+                    select(PatternSketchSnapshot)
+                    .order_by(PatternSketchSnapshot.updated_at.desc())
+                    .limit(self.max_sketches)
+                )
+                rows = result.all()
+        except Exception as e:
+            logger.warning(f"Pattern sketch restore failed: {e}")
+            return 0
+        for row in reversed(rows):
+            self._load(row)
+        self._synced_at = datetime.utcnow()
+        return len(rows)
+
+    def _load(self, row: PatternSketchSnapshot) -> Optional[HeavyHitterSketch]:
+        try:
+            sketch = HeavyHitterSketch.from_bytes(row.payload)
+        except Exception as e:
+            logger.warning(f"Unreadable pattern sketch snapshot {row.sketch_key!r}: {e}")
+            return None
+        if not self._compatible(sketch):
+            # Settings changed; the snapshot is replaced on the next sync
+            return None
+        key = (row.vertical, row.pattern_type)
+        if key in self.pending:
+            sketch = sketch.copy().merge(self.pending[key])
+        self._set_live(key, sketch)
+        return sketch
+
+    async def sync(self) -> int:
+        """
+        Merge local observations into the snapshot table and refresh live
+        sketches from it, including ones other processes updated.
+
+        Returns:
+            int: Snapshots written. On failure local observations stay pending.
+        """
+        async with self._lock:
+            self.last_sync = time.monotonic()
+            pending, self.pending = self.pending, {}
+            started = datetime.utcnow()
+            merged: Dict[_SketchKey, HeavyHitterSketch] = {}
+            try:
+                async with self.session_factory() as session:
+                    # Fixed lock order across processes
+                    for key in sorted(pending):
+                        sketch_key = "\x1f".join(key)
+                        row = (await session.execute(
+                            select(PatternSketchSnapshot)
+                            .where(PatternSketchSnapshot.sketch_key == sketch_key)
+                            .with_for_update()
+                        )).scalar_one_or_none()
+                        stored = None
+                        if row is not None:
+                            try:
+                                stored = HeavyHitterSketch.from_bytes(row.payload)
+                            except Exception:
+                                stored = None
+                        if stored is None or not self._compatible(stored):
+                            stored = self._new()
+                        stored.merge(pending[key]).rebase(time.time())
+                        if row is None:
+                            session.add(PatternSketchSnapshot(
+                                sketch_key=sketch_key,
+                                vertical=key[0],
+                                pattern_type=key[1],
+                                payload=stored.to_bytes()
+                            ))
+                        else:
+                            row.payload = stored.to_bytes()
+                        merged[key] = stored
+                    await session.commit()
+
+                    if self._synced_at is not None:
+                        # Pick up sketches other processes wrote since our last sync
+                        others = await session.scalars(
+                            select(PatternSketchSnapshot)
+                            .where(PatternSketchSnapshot.updated_at >= self._synced_at)
+                        )
+                        for row in others.all():
+                            if (row.vertical, row.pattern_type) not in merged:
+                                self._load(row)
+            except Exception as e:
+                logger.error(f"Pattern sketch sync of {len(pending)} sketches failed: {e}")
+                for key, sketch in pending.items():
+                    if key in self.pending:
+                        sketch.merge(self.pending[key])
+                    self.pending[key] = sketch
+                return 0
+
+            self._synced_at = started
+            for key, stored in merged.items():
+                # Observations made while syncing are pending again; keep them visible
+                if key in self.pending:
+                    stored = stored.copy().merge(self.pending[key])
+                self._set_live(key, stored)
+            return len(merged)
+
+    async def sync_if_due(self, interval: float = settings.PATTERN_SKETCH_SYNC_INTERVAL) -> int:
+        if time.monotonic() - self.last_sync >= interval:
+            return await self.sync()
+        return 0
+
+    async def run(self, interval: float = settings.PATTERN_SKETCH_SYNC_INTERVAL) -> None:
+        """Sync every interval seconds until cancelled, then once more."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await self.sync()
+        finally:
+            await self.sync()
+
+
+# Process-wide sketches, fed by copy audits and trend ingestion
+pattern_sketches = PatternSketches()
@@ -1,66 +1,189 @@
-from typing import List
+from typing import Awaitable, Dict, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from src.services.trends.base import TrendResult
+from src.config.settings import settings
+from src.services.cache import TwoTierCache
+from src.services.trends.base import ProviderStatus, TrendProvider, TrendResult
 from src.services.trends.providers.meta import MetaTrendProvider
 from src.services.trends.providers.tiktok import TikTokTrendProvider
-from src.db.models.intelligence import AdTrend
+from src.services.patterns.sketch import pattern_sketches
+from src.services.trends.storage import bulk_insert_trends, mark_trends_seen
+from src.db.models.intelligence import AdTrend, trend_content_key
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+FETCH_POLICIES = ("partial", "any", "all")
+
+# Provider results keyed by (provider, industry), shared across requests
+trend_cache: TwoTierCache[List[TrendResult]] = TwoTierCache(
+    namespace="trends",
+    ttl=settings.TREND_CACHE_TTL,
+    stale_ttl=settings.TREND_CACHE_STALE_TTL,
+    max_entries=settings.TREND_CACHE_MAX_ENTRIES,
+    redis_url=settings.REDIS_URL if settings.CACHE_REDIS_ENABLED else None,
+    encode=lambda results: [result.model_dump() for result in results],
+    decode=lambda data: [TrendResult(**item) for item in data],
+)
+
+
+class TrendFetchError(Exception):
+    """Raised when provider failures violate the configured fetch policy."""
+
+    def __init__(self, message: str, statuses: List[ProviderStatus]):
+        super().__init__(message)
+        self.statuses = statuses
+
+
+def parse_provider_timeouts(raw: str) -> Dict[str, float]:
+    """
+    Parse per-provider timeout overrides of the form "meta=5,tiktok=8".
+
+    Returns:
+        Dict[str, float]: Timeout in seconds keyed by provider name
+    """
+    timeouts = {}
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        try:
+            timeouts[name.strip()] = float(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid provider timeout override: {item!r}")
+    return timeouts
+
+
 class TrendAggregator:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, use_cache: bool = True):
         self.db = db
-        self.providers = [
+        self.use_cache = use_cache
+        self.providers: List[TrendProvider] = [
             MetaTrendProvider(),
             TikTokTrendProvider()
         ]
+        self.timeouts = parse_provider_timeouts(settings.TREND_PROVIDER_TIMEOUTS)
+        self.policy = settings.TREND_FETCH_POLICY
+        if self.policy not in FETCH_POLICIES:
+            logger.warning(f"Unknown TREND_FETCH_POLICY {self.policy!r}, using 'partial'")
+            self.policy = "partial"
+        # Per-provider outcome of the most recent fetch
+        self.provider_statuses: List[ProviderStatus] = []
+
+    def _timeout_for(self, provider: TrendProvider) -> float:
+        return self.timeouts.get(provider.name, settings.TREND_PROVIDER_TIMEOUT)
+
+    async def _run_provider(
+        self, provider: TrendProvider, industry: str
+    ) -> Tuple[List[TrendResult], ProviderStatus]:
+        """
+        Call a single provider under its own deadline, through the trend cache.
+
+        Never raises: timeouts and errors are reported through the status.
+        """
+        timeout = self._timeout_for(provider)
+        started = time.perf_counter()
+
+        def elapsed_ms() -> float:
+            return round((time.perf_counter() - started) * 1000, 2)
+
+        def load() -> Awaitable[List[TrendResult]]:
+            return asyncio.wait_for(provider.fetch_trends(industry), timeout=timeout)
+
+        try:
+            results = await trend_cache.get_or_load(
+                f"{provider.name}:{industry.lower()}",
+                load,
+                refresh=not self.use_cache
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Provider {provider.name} timed out after {timeout}s")
+            return [], ProviderStatus(
+                provider=provider.name,
+                status="timeout",
+                duration_ms=elapsed_ms(),
+                error=f"Timed out after {timeout}s"
+            )
+        except Exception as e:
+            logger.error(f"Error fetching trends from provider {provider.name}: {e}")
+            return [], ProviderStatus(
+                provider=provider.name,
+                status="error",
+                duration_ms=elapsed_ms(),
+                error=str(e)
+            )
+
+        return results, ProviderStatus(
+            provider=provider.name,
+            status="ok",
+            result_count=len(results),
+            duration_ms=elapsed_ms()
+        )
+
+    def _enforce_policy(self, statuses: List[ProviderStatus]) -> None:
+        failed = [s for s in statuses if s.status != "ok"]
+        if not failed or self.policy == "partial":
+            return
+        if self.policy == "all" or len(failed) == len(statuses):
+            names = ", ".join(s.provider for s in failed)
+            raise TrendFetchError(f"Trend providers failed: {names}", statuses)
+
+    async def fetch_from_providers(self, industry: str) -> List[TrendResult]:
+        """
+        Fetch trends from all providers concurrently.
+
+        Each provider runs under its own timeout, so total latency is bounded by
+        the slowest provider rather than the sum of all of them. Per-provider
+        outcomes are recorded in `provider_statuses`.
+
+        Raises:
+            TrendFetchError: If failures violate TREND_FETCH_POLICY
+        """
+        outcomes = await asyncio.gather(
+            *(self._run_provider(provider, industry) for provider in self.providers)
+        )
+        self.provider_statuses = [status for _, status in outcomes]
+        self._enforce_policy(self.provider_statuses)
+
+        all_results: List[TrendResult] = []
+        for results, _ in outcomes:
+            all_results.extend(results)
+        return all_results
 
     async def fetch_and_store_trends(self, industry: str) -> List[AdTrend]:
         """
         Fetch trends from all providers, deduplicate, and store in DB.
         """
-        all_results: List[TrendResult] = []
-        
-        for provider in self.providers:
-            try:
-                results = await provider.fetch_trends(industry)
-                all_results.extend(results)
-            except Exception as e:
-                logger.error(f"Error fetching trends from provider {provider}: {e}")
-                continue
-
-        stored_trends = []
-        for res in all_results:
-            # Check if exists (simple check by name/platform for now)
-            # In production, use hash content or more robust ID
-            query = select(AdTrend).where(
-                AdTrend.platform == res.platform,
-                AdTrend.trend_name == res.trend_name
-            )
-            existing = await self.db.execute(query)
-            if existing.scalars().first():
-                continue
-
-            trend_db = AdTrend(
-                platform=res.platform,
-                format=res.format,
-                industry=industry,
-                trend_type=res.trend_type,
-                trend_name=res.trend_name,
-                trend_score=res.score,
-                data={
-                    "description": res.description, 
+        all_results = await self.fetch_from_providers(industry)
+
+        rows = [
+            {
+                "platform": res.platform,
+                "format": res.format,
+                "industry": industry,
+                "trend_type": res.trend_type,
+                "trend_name": res.trend_name,
+                "trend_score": res.score,
+                "data": {
+                    "description": res.description,
                     "metadata": res.metadata
                 }
-            )
-            self.db.add(trend_db)
-            stored_trends.append(trend_db)
-        
-        if stored_trends:
+            }
+            for res in all_results
+        ]
+
+        # Existing (platform, trend_name) pairs are skipped via ON CONFLICT,
+        # and marked seen so they stay active
+        stored_trends = await bulk_insert_trends(self.db, rows)
+        stored_keys = {trend.content_key for trend in stored_trends}
+        seen = await mark_trends_seen(self.db, [
+            key for key in (trend_content_key(row["platform"], row["trend_name"]) for row in rows)
+            if key not in stored_keys
+        ])
+        if stored_trends or seen:
             await self.db.commit()
-            for t in stored_trends:
-                await self.db.refresh(t)
-                
+        if stored_trends:
+            pattern_sketches.observe_trends(stored_trends)
+
         return stored_trends
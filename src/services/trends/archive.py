@@ -0,0 +1,298 @@
+"""
+Tiered retention for ad_trends partitions.
+
+Partitions wholly older than TREND_RETENTION_MONTHS are detached, written
+to a zstd-compressed Parquet file and uploaded to the MinIO bucket the DAG
+reads, then dropped. Archives can be rehydrated: the rows are loaded into a
+table of the same name and attached again, for TREND_REHYDRATED_TTL_DAYS.
+
+Progress is recorded in trend_partition_archives (detached -> archived ->
+rehydrated), so a run that fails midway is finished by the next one.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import Boolean, DateTime, Float, Integer, column, insert, select, table, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from src.config.settings import settings
+from src.db.models.intelligence import AdTrend, TrendPartitionArchive
+from src.services.trends.partitions import (
+    PARENT_TABLE,
+    TrendPartition,
+    add_months,
+    attach_partition,
+    detach_partition,
+    list_partitions,
+    month_start,
+)
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import uuid
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Listed in requirements; checked where archives are written or read
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+# Rows per export batch / Parquet row group and per rehydration insert
+ARCHIVE_BATCH_SIZE = 5000
+
+ARCHIVE_FORMAT = "parquet"
+ARCHIVE_CONTENT_TYPE = "application/vnd.apache.parquet"
+
+_COLUMNS = [c.name for c in AdTrend.__table__.columns]
+
+
+def _partition_table(name: str):
+    # ad_trends columns and types under another table name
+    return table(name, *(column(c.name, c.type) for c in AdTrend.__table__.columns))
+
+
+def _require_pyarrow() -> None:
+    if pq is None:
+        raise RuntimeError("pyarrow is required to write and read ad_trends Parquet archives")
+
+
+def archive_client():
+    """MinIO client for the archive bucket."""
+    from minio import Minio
+
+    return Minio(
+        endpoint=settings.MINIO_ENDPOINT,
+        access_key=settings.MINIO_ACCESS_KEY,
+        secret_key=settings.MINIO_SECRET_KEY,
+        secure=settings.MINIO_SECURE
+    )
+
+
+def _encode(name: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if name == "id":
+        return str(value)
+    if name == "data":
+        return json.dumps(value)
+    return value
+
+
+def _decode(name: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if name == "id":
+        return uuid.UUID(value)
+    if name == "data":
+        return json.loads(value)
+    return value
+
+
+def _parquet_type(column_type):
+    # id and data are stored as strings, see _encode
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    return pa.string()
+
+
+class _ParquetWriter:
+    def __init__(self, path: str):
+        self.schema = pa.schema([
+            pa.field(c.name, _parquet_type(c.type)) for c in AdTrend.__table__.columns
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, columns: Dict[str, List[Any]]) -> None:
+        self.writer.write_table(pa.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def _read_batches(path: str) -> Iterator[List[Dict[str, Any]]]:
+    """Rows of a Parquet archive, decoded back to column values, in batches."""
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=ARCHIVE_BATCH_SIZE):
+        yield [{name: _decode(name, row.get(name)) for name in _COLUMNS} for row in batch.to_pylist()]
+
+
+async def _export_partition(conn: AsyncConnection, name: str, path: str) -> int:
+    writer = _ParquetWriter(path)
+    rows = 0
+    try:
+        query = select(_partition_table(name)).execution_options(yield_per=ARCHIVE_BATCH_SIZE)
+        result = await conn.stream(query)
+        async for partition in result.mappings().partitions():
+            writer.write({col: [_encode(col, row[col]) for row in partition] for col in _COLUMNS})
+            rows += len(partition)
+    finally:
+        writer.close()
+    return rows
+
+
+async def _get_record(conn: AsyncConnection, name: str) -> Optional[Dict[str, Any]]:
+    result = await conn.execute(
+        select(TrendPartitionArchive.__table__).where(TrendPartitionArchive.partition_name == name)
+    )
+    row = result.mappings().first()
+    return dict(row) if row else None
+
+
+async def _save_record(conn: AsyncConnection, name: str, **values) -> None:
+    archives = TrendPartitionArchive.__table__
+    if await _get_record(conn, name):
+        await conn.execute(archives.update().where(archives.c.partition_name == name).values(**values))
+    else:
+        await conn.execute(archives.insert().values(partition_name=name, **values))
+
+
+async def archive_partition(engine: AsyncEngine, name: str, client=None) -> Dict[str, Any]:
+    """
+    Export a detached partition, upload it, then drop the table.
+
+    The record only moves to "archived", in the same transaction as the
+    DROP, once the upload has succeeded.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed; the partition stays detached
+
+    Returns:
+        dict: The archive record
+    """
+    _require_pyarrow()
+    client = client or archive_client()
+    object_key = f"{settings.TREND_ARCHIVE_PREFIX}/{name}.{ARCHIVE_FORMAT}"
+
+    handle, path = tempfile.mkstemp(suffix=f".{ARCHIVE_FORMAT}")
+    os.close(handle)
+    try:
+        async with engine.connect() as conn:
+            rows = await _export_partition(conn, name, path)
+        size = os.path.getsize(path)
+
+        def upload():
+            if not client.bucket_exists(settings.TREND_ARCHIVE_BUCKET):
+                client.make_bucket(settings.TREND_ARCHIVE_BUCKET)
+            client.fput_object(
+                settings.TREND_ARCHIVE_BUCKET, object_key, path,
+                content_type=ARCHIVE_CONTENT_TYPE,
+                metadata={"row-count": str(rows)}
+            )
+        await asyncio.to_thread(upload)
+    finally:
+        os.remove(path)
+
+    async with engine.begin() as conn:
+        await _save_record(
+            conn, name,
+            status="archived", object_key=object_key, file_format=ARCHIVE_FORMAT,
+            row_count=rows, size_bytes=size, archived_at=datetime.utcnow(), rehydrated_at=None
+        )
+        await conn.execute(text(f'DROP TABLE "{name}"'))
+        record = await _get_record(conn, name)
+    logger.info(f"Archived {name}: {rows} rows, {size} bytes -> {settings.TREND_ARCHIVE_BUCKET}/{object_key}")
+    return record
+
+
+async def archive_expired_partitions(
+    engine: AsyncEngine,
+    now: Optional[datetime] = None,
+    retention_months: int = settings.TREND_RETENTION_MONTHS,
+    client=None,
+) -> List[str]:
+    """
+    Detach partitions wholly older than the retention window and archive them.
+
+    Rehydrated partitions are kept until TREND_REHYDRATED_TTL_DAYS after
+    they were loaded. Partitions left detached by an earlier failed run are
+    archived too.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed, before anything is detached
+
+    Returns:
+        List[str]: Names of the partitions archived
+    """
+    _require_pyarrow()
+    now = now or datetime.utcnow()
+    cutoff = add_months(month_start(now), -retention_months)
+    rehydrated_until = now - timedelta(days=settings.TREND_REHYDRATED_TTL_DAYS)
+
+    async with engine.begin() as conn:
+        for partition in await list_partitions(conn):
+            if partition.end is None or partition.end > cutoff:
+                continue
+            record = await _get_record(conn, partition.name)
+            if record and record["status"] == "rehydrated" and record["rehydrated_at"] > rehydrated_until:
+                continue
+            await detach_partition(conn, partition)
+            await _save_record(
+                conn, partition.name,
+                range_start=partition.start, range_end=partition.end,
+                status="detached", detached_at=now
+            )
+            logger.info(f"Detached {partition.name} ({partition.start} - {partition.end})")
+
+        archives = TrendPartitionArchive.__table__
+        pending = (await conn.execute(
+            select(archives.c.partition_name).where(archives.c.status == "detached")
+        )).scalars().all()
+
+    archived = []
+    for name in pending:
+        try:
+            await archive_partition(engine, name, client=client)
+            archived.append(name)
+        except Exception as e:
+            # Stays detached; retried on the next run
+            logger.error(f"Archiving {name} failed: {e}")
+    return archived
+
+
+async def rehydrate_partition(engine: AsyncEngine, name: str, client=None) -> Dict[str, Any]:
+    """
+    Load an archived partition back into ad_trends.
+
+    The rows are restored into a table of the original name, which is
+    attached with its original bounds and re-registers its content keys
+    (keys since reused by newer trends keep pointing at those).
+
+    Raises:
+        ValueError: If the partition has no archive
+        RuntimeError: If pyarrow is not installed
+
+    Returns:
+        dict: The archive record
+    """
+    _require_pyarrow()
+    async with engine.connect() as conn:
+        record = await _get_record(conn, name)
+    if not record or record["status"] != "archived":
+        raise ValueError(f"No archived partition named {name}")
+
+    client = client or archive_client()
+    handle, path = tempfile.mkstemp(suffix=f".{record['file_format']}")
+    os.close(handle)
+    try:
+        await asyncio.to_thread(client.fget_object, settings.TREND_ARCHIVE_BUCKET, record["object_key"], path)
+        async with engine.begin() as conn:
+            await conn.execute(text(f'CREATE TABLE "{name}" (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)'))
+            target = _partition_table(name)
+            for batch in _read_batches(path):
+                await conn.execute(insert(target), batch)
+            await attach_partition(conn, TrendPartition(
+                name=name, start=record["range_start"], end=record["range_end"]
+            ))
+            await _save_record(conn, name, status="rehydrated", rehydrated_at=datetime.utcnow())
+            record = await _get_record(conn, name)
+    finally:
+        os.remove(path)
+    logger.info(f"Rehydrated {name}: {record['row_count']} rows")
+    return record
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
 class TrendResult(BaseModel):
@@ -11,8 +11,18 @@ class TrendResult(BaseModel):
     score: float
     metadata: Dict[str, Any] = {}
 
+class ProviderStatus(BaseModel):
+    """Outcome of a single provider call during a fan-out fetch."""
+    provider: str
+    status: str # ok, timeout, error
+    result_count: int = 0
+    duration_ms: float = 0.0
+    error: Optional[str] = None
+
 class TrendProvider(ABC):
-    
+    # Short platform identifier, used for timeouts config and status reporting
+    name: str = "unknown"
+
     @abstractmethod
     async def fetch_trends(self, industry: str) -> List[TrendResult]:
         """
@@ -0,0 +1,63 @@
+"""
+Conditional GET support for trend listings.
+
+The version of a filtered listing is max(updated_at) over every row the
+filters can reach, active or not, so inserts, upserts and deactivations all
+move it. It is one indexed aggregate, far cheaper than the page and count
+queries it lets a 304 skip. Hard deletes do not move it.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from src.db.models.intelligence import AdTrend
+from src.services.trends.filters import apply_trend_filters
+import hashlib
+import json
+
+
+async def trend_listing_version(db: AsyncSession, filters: Dict[str, Any]) -> Optional[datetime]:
+    """
+    Latest write time among trends matching the listing filters.
+
+    Returns:
+        Optional[datetime]: max(updated_at), or None when no rows match
+    """
+    query = apply_trend_filters(select(func.max(AdTrend.updated_at)), filters)
+    result = await db.execute(query)
+    return result.scalar()
+
+
+def listing_etag(request: Request, version: Optional[datetime]) -> str:
+    """Weak ETag over the data version and every query parameter shaping the response."""
+    params = sorted(request.query_params.multi_items())
+    raw = json.dumps([version.isoformat() if version else None, params])
+    return f'W/"{hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]}"'
+
+
+def http_date(version: datetime) -> str:
+    # updated_at is stored as naive UTC
+    return format_datetime(version.replace(microsecond=0, tzinfo=timezone.utc), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, version: Optional[datetime]) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since (RFC 9110 precedence).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        # Weak comparison: W/ prefixes are ignored
+        normalized = {tag[2:] if tag.startswith("W/") else tag for tag in candidates}
+        return "*" in candidates or etag[2:] in normalized
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and version is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).replace(tzinfo=None)
+        except (TypeError, ValueError):
+            return False
+        return version.replace(microsecond=0) <= since
+    return False
@@ -0,0 +1,107 @@
+"""
+Cached and approximate row counts for trend listings.
+
+Exact counts are cached per filter set and listing version, the
+max(updated_at) token read_trends computes for its ETag (conditional.py).
+Every write path, including other workers, Celery tasks and bulk UPDATEs,
+moves that token, so a changed listing never reuses an old count. Hard
+deletes do not move it; entries also expire after TREND_COUNT_CACHE_TTL
+seconds.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config.settings import settings
+from src.db.models.intelligence import AdTrend
+from src.services.cache import CacheEntry, LRUCache
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+_count_cache: LRUCache[int] = LRUCache(max_entries=settings.TREND_COUNT_CACHE_MAX_ENTRIES)
+
+
+def _cache_key(db: AsyncSession, filters: Dict[str, Any], version: Optional[datetime]) -> str:
+    # Keyed by database too: a lagging replica's count must not answer primary reads
+    database = str(db.get_bind().url)
+    stamp = version.isoformat() if version else ""
+    return f"{stamp}:{database}:{json.dumps(filters, sort_keys=True, default=str)}"
+
+
+async def _exact_count(
+    db: AsyncSession,
+    query: Select,
+    filters: Dict[str, Any],
+    version: Optional[datetime],
+) -> int:
+    key = _cache_key(db, filters, version)
+    entry = _count_cache.get(key)
+    if entry is not None:
+        return entry.value
+
+    count_result = await db.execute(select(func.count()).select_from(query.subquery()))
+    total = count_result.scalar() or 0
+    expires = time.time() + settings.TREND_COUNT_CACHE_TTL
+    _count_cache.set(key, CacheEntry(total, expires, expires))
+    return total
+
+
+async def _estimated_count(db: AsyncSession, query: Select) -> Optional[int]:
+    """Row estimate from the Postgres planner statistics, or None if unavailable."""
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    try:
+        compiled = query.with_only_columns(AdTrend.id).compile(
+            dialect=bind.dialect,
+            compile_kwargs={"literal_binds": True}
+        )
+        # Raw driver SQL: literal values may contain ':' which text() would treat as binds
+        conn = await db.connection()
+        # A failed EXPLAIN (statement_timeout, cancel) aborts the transaction;
+        # the savepoint keeps the exact-count fallback usable
+        async with conn.begin_nested():
+            explain = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+            plan = explain.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.warning(f"Planner count estimate failed, falling back to exact count: {e}")
+        return None
+
+
+async def count_trends(
+    db: AsyncSession,
+    query: Select,
+    filters: Dict[str, Any],
+    version: Optional[datetime],
+    mode: str = "exact",
+) -> Optional[int]:
+    """
+    Count the rows matched by a trend listing query.
+
+    Args:
+        db: Database session
+        query: Filtered, unpaginated listing query
+        filters: Filter values that fully determine `query`; used as cache key
+        version: Listing version token (trend_listing_version) for the same
+            filters; a new token invalidates the cached count
+        mode: "exact" (cached), "estimate" (Postgres planner statistics,
+            exact elsewhere) or "none"
+
+    Returns:
+        Optional[int]: Row count, or None when mode is "none"
+    """
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        estimate = await _estimated_count(db, query)
+        if estimate is not None:
+            return estimate
+    return await _exact_count(db, query, filters, version)
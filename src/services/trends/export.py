@@ -0,0 +1,93 @@
+"""
+Streaming export of ad_trends.
+
+Rows are read through a server-side cursor (AsyncSession.stream with
+yield_per) and encoded one partition at a time, so memory stays flat no
+matter how many rows are exported.
+"""
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional
+from sqlalchemy import select
+from src.db.models.intelligence import AdTrend
+from src.db.session import read_session_factory
+from src.services.trends.filters import apply_trend_filters
+from src.services.trends.projection import projected_columns
+import csv
+import io
+import json
+import orjson
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Rows fetched from the cursor and encoded per chunk
+EXPORT_BATCH_SIZE = 1000
+
+
+def _encode_ndjson(rows: List[Mapping[str, Any]]) -> bytes:
+    return b"".join(orjson.dumps(dict(row)) + b"\n" for row in rows)
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return json.dumps(value, separators=(",", ":"))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _encode_csv(rows: List[Mapping[str, Any]], fields: List[str]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_csv_value(row[name]) for name in fields] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+async def stream_trend_export(
+    filters: Dict[str, Any],
+    fields: List[str],
+    export_format: str = "ndjson",
+    since: Optional[datetime] = None,
+    active_only: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Yield encoded export chunks for trends matching the filters.
+
+    Rows are ordered by (updated_at, id) so an incremental export can resume
+    from the newest updated_at it has seen by passing it as `since`.
+
+    Args:
+        filters: industry / platform filters, as for listings
+        fields: Output columns, see projection.TREND_FIELDS
+        export_format: "ndjson" or "csv" (CSV starts with a header row)
+        since: Only rows written (updated_at) at or after this time
+        active_only: Skip deactivated trends
+
+    Yields:
+        bytes: Encoded rows, one chunk per cursor partition
+    """
+    query = select(*projected_columns(fields))
+    query = apply_trend_filters(query, filters)
+    if since is not None:
+        query = query.where(AdTrend.updated_at >= since)
+    if active_only:
+        query = query.where(AdTrend.is_active == True)
+    query = query.order_by(AdTrend.updated_at, AdTrend.id)
+
+    if export_format == "csv":
+        # Header row: field names map onto themselves
+        yield _encode_csv([{name: name for name in fields}], fields)
+
+    # Own session: the request-scoped one may be closed before streaming ends
+    session_factory = await read_session_factory()
+    async with session_factory() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for partition in result.mappings().partitions():
+            if export_format == "csv":
+                yield _encode_csv(partition, fields)
+            else:
+                yield _encode_ndjson(partition)
@@ -0,0 +1,138 @@
+"""
+Shared filter handling for trend read paths.
+
+Listing, counting, version tokens and exports must agree on which rows a
+filter set selects, so they all build their WHERE clauses here.
+"""
+from datetime import timezone
+from typing import Any, Dict, Iterable, List, Tuple
+from sqlalchemy import Boolean, Select, literal, or_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from src.db.models.intelligence import AdTrend
+import json
+import math
+import re
+
+# Query parameters of the form metadata.<key>=<value>
+METADATA_PREFIX = "metadata."
+METADATA_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_\-]{1,64}$")
+MAX_METADATA_FILTERS = 10
+
+
+class metadata_equals(FunctionElement):
+    """
+    True where AdTrend.data["metadata"][key] equals value.
+
+    On Postgres this is containment, data @> {"metadata": {key: value}},
+    which the GIN index on data answers. Other databases compare
+    json_extract(data, '$.metadata."key"') row by row.
+    """
+    type = Boolean()
+    inherit_cache = True
+    name = "metadata_equals"
+
+    def __init__(self, key: str, value: Any):
+        # Every bind is an argument, so cached statements pick up new values
+        super().__init__(
+            AdTrend.data,
+            # Serialized here so the statement can also render with literal binds
+            literal(json.dumps({"metadata": {key: value}})),
+            literal(f'$.metadata."{key}"'),
+            literal(value),
+        )
+
+
+@compiles(metadata_equals)
+def _compile_metadata_equals(element, compiler, **kw):
+    data, _, path, value = element.clauses
+    return (
+        f"json_extract({compiler.process(data, **kw)}, {compiler.process(path, **kw)})"
+        f" = {compiler.process(value, **kw)}"
+    )
+
+
+@compiles(metadata_equals, "postgresql")
+def _compile_metadata_equals_postgresql(element, compiler, **kw):
+    data, document, _, _ = element.clauses
+    return f"{compiler.process(data, **kw)} @> CAST({compiler.process(document, **kw)} AS JSONB)"
+
+
+def _metadata_candidates(raw: str) -> List[Any]:
+    """
+    JSON values a query string value may stand for.
+
+    Providers store some numbers as strings ("sound_id": "123456789") and
+    some as numbers ("card_count": 5), so "5" matches either.
+    """
+    candidates: List[Any] = [raw]
+    try:
+        parsed = json.loads(raw)
+    except ValueError:
+        return candidates
+    # NaN / Infinity parse but are not valid JSON for Postgres
+    if isinstance(parsed, (bool, int, float)) and math.isfinite(parsed):
+        candidates.append(parsed)
+    return candidates
+
+
+def parse_metadata_filters(params: Iterable[Tuple[str, str]]) -> Dict[str, List[str]]:
+    """
+    Collect metadata.<key>=<value> query parameters.
+
+    A key given more than once matches any of its values; different keys
+    must all match.
+
+    Raises:
+        ValueError: If a key is malformed or too many keys are given
+    """
+    metadata: Dict[str, List[str]] = {}
+    for name, value in params:
+        if not name.startswith(METADATA_PREFIX):
+            continue
+        key = name[len(METADATA_PREFIX):]
+        if not METADATA_KEY_PATTERN.match(key):
+            raise ValueError(
+                f"Invalid metadata filter '{name}': keys are 1-64 letters, digits, '_' or '-'"
+            )
+        values = metadata.setdefault(key, [])
+        if value not in values:
+            values.append(value)
+    if len(metadata) > MAX_METADATA_FILTERS:
+        raise ValueError(f"At most {MAX_METADATA_FILTERS} metadata filters are allowed")
+    # Sorted so equal filter sets share count cache entries
+    return {key: sorted(metadata[key]) for key in sorted(metadata)}
+
+
+def apply_trend_filters(query: Select, filters: Dict[str, Any]) -> Select:
+    """
+    Restrict a query to trends matching the given filters.
+
+    Args:
+        query: Select over ad_trends
+        filters: industry / platform values, an optional captured_since
+            datetime (lower bound on captured_at, which lets Postgres prune
+            older partitions) and an optional metadata dict of key ->
+            accepted values (see parse_metadata_filters); None or empty
+            means unfiltered
+
+    Returns:
+        Select: Filtered query
+    """
+    if filters.get("industry"):
+        query = query.where(AdTrend.industry == filters["industry"])
+    if filters.get("platform"):
+        query = query.where(AdTrend.platform == filters["platform"])
+    captured_since = filters.get("captured_since")
+    if captured_since is not None:
+        if captured_since.tzinfo is not None:
+            # captured_at is stored as naive UTC
+            captured_since = captured_since.astimezone(timezone.utc).replace(tzinfo=None)
+        query = query.where(AdTrend.captured_at >= captured_since)
+    for key, values in (filters.get("metadata") or {}).items():
+        query = query.where(or_(*(
+            metadata_equals(key, candidate)
+            for value in values
+            for candidate in _metadata_candidates(value)
+        )))
+    return query
@@ -0,0 +1,146 @@
+"""
+Bulk trend ingestion.
+
+Request bodies are parsed incrementally (NDJSON line by line, or a JSON
+array), validated in chunks and written with one multi-row upsert and one
+commit per chunk, reporting a status for every input row.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID
+from pydantic import BaseModel
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.models.intelligence import trend_content_key
+from src.services.patterns.sketch import pattern_sketches
+from src.services.trends.storage import bulk_insert_trends
+import logging
+import orjson
+
+logger = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class BulkPayloadError(ValueError):
+    """Raised when a bulk body is not a JSON array or NDJSON stream."""
+
+
+class BulkPayloadTooLarge(BulkPayloadError):
+    """Raised when a bulk body has more rows or bytes than allowed."""
+
+
+class BulkRowStatus(BaseModel):
+    index: int  # Position of the row in the request body
+    status: str  # created, duplicate, upserted, invalid, error
+    id: Optional[UUID] = None
+    error: Optional[str] = None
+
+
+async def iter_bulk_payload(
+    content_type: str,
+    chunks: AsyncIterator[bytes],
+    max_rows: int,
+    max_bytes: int,
+) -> AsyncIterator[Tuple[int, Any, Optional[str]]]:
+    """
+    Yield (index, item, parse_error) for each row of a bulk request body.
+
+    NDJSON bodies are consumed as they arrive; a JSON array has to be read
+    whole before it can be parsed, so it is refused once it passes
+    max_bytes. The same bound applies to a single NDJSON line.
+
+    Raises:
+        BulkPayloadTooLarge: If the body has more than max_rows rows or
+            buffers more than max_bytes
+        BulkPayloadError: If the body is malformed
+    """
+    index = 0
+    if content_type.split(";")[0].strip().lower() in NDJSON_CONTENT_TYPES:
+        buffer = b""
+        async for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            if len(buffer) > max_bytes:
+                raise BulkPayloadTooLarge(f"Bulk rows are limited to {max_bytes} bytes")
+            for line in lines:
+                if not line.strip():
+                    continue
+                if index >= max_rows:
+                    raise BulkPayloadTooLarge(f"Bulk requests are limited to {max_rows} rows")
+                try:
+                    yield index, orjson.loads(line), None
+                except orjson.JSONDecodeError as e:
+                    yield index, None, f"Invalid JSON: {e}"
+                index += 1
+        if buffer.strip():
+            if index >= max_rows:
+                raise BulkPayloadTooLarge(f"Bulk requests are limited to {max_rows} rows")
+            try:
+                yield index, orjson.loads(buffer), None
+            except orjson.JSONDecodeError as e:
+                yield index, None, f"Invalid JSON: {e}"
+        return
+
+    parts, size = [], 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+            raise BulkPayloadTooLarge(
+                f"JSON array bodies are limited to {max_bytes} bytes; send larger batches as NDJSON"
+            )
+        parts.append(chunk)
+    body = b"".join(parts)
+    try:
+        items = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise BulkPayloadError(f"Invalid JSON body: {e}")
+    if not isinstance(items, list):
+        raise BulkPayloadError("Expected a JSON array of trends or an NDJSON stream")
+    if len(items) > max_rows:
+        raise BulkPayloadTooLarge(f"Bulk requests are limited to {max_rows} rows")
+    for index, item in enumerate(items):
+        yield index, item, None
+
+
+async def write_trend_chunk(
+    db: AsyncSession,
+    rows: List[Tuple[int, Dict[str, Any]]],
+    on_conflict: str,
+) -> List[BulkRowStatus]:
+    """
+    Upsert one chunk of validated rows in its own transaction.
+
+    Args:
+        db: Database session; committed (or rolled back) here
+        rows: (input index, trend values) pairs
+        on_conflict: "skip" or "update", see storage.bulk_insert_trends
+
+    Returns:
+        List[BulkRowStatus]: One status per input row
+    """
+    try:
+        stored = await bulk_insert_trends(db, [values for _, values in rows], on_conflict=on_conflict)
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Bulk trend chunk of {len(rows)} rows failed: {e}")
+        return [
+            BulkRowStatus(index=index, status="error", error="Database write failed")
+            for index, _ in rows
+        ]
+
+    pattern_sketches.observe_trends(stored)
+
+    written = {trend.content_key: trend.id for trend in stored}
+    write_status = "upserted" if on_conflict == "update" else "created"
+    statuses = []
+    for index, values in rows:
+        key = trend_content_key(values["platform"], values["trend_name"])
+        # With "skip" only the first occurrence of a key counts as the insert
+        trend_id = written.get(key) if on_conflict == "update" else written.pop(key, None)
+        if trend_id is not None:
+            statuses.append(BulkRowStatus(index=index, status=write_status, id=trend_id))
+        else:
+            # Already stored, or repeated earlier in this request
+            statuses.append(BulkRowStatus(index=index, status="duplicate"))
+    return statuses
@@ -0,0 +1,115 @@
+"""
+Keyset (cursor) pagination helpers for trend listings.
+
+A cursor is an opaque, URL-safe token carrying the sort key of the boundary
+row and the direction to read in. Seeking on (sort_value, id) lets every page
+use the index instead of scanning and discarding OFFSET rows.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import Select, literal, tuple_
+from src.db.models.intelligence import AdTrend
+import base64
+import json
+
+# Sortable columns exposed through the API; ties are broken by id
+SORT_COLUMNS = {
+    "trend_score": AdTrend.trend_score,
+    "captured_at": AdTrend.captured_at,
+}
+
+DIRECTIONS = ("next", "prev")
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor cannot be decoded or does not match the sort order."""
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _load_value(order_by: str, value: Any) -> Any:
+    if order_by == "captured_at":
+        return datetime.fromisoformat(value)
+    return float(value)
+
+
+def encode_cursor(order_by: str, direction: str, sort_value: Any, row_id: UUID) -> str:
+    payload = {"o": order_by, "d": direction, "v": _dump_value(sort_value), "id": str(row_id)}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: str) -> Tuple[str, Any, UUID]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        Tuple[str, Any, UUID]: direction, boundary sort value, boundary id
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or was issued for a different sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload: Dict[str, Any] = json.loads(base64.urlsafe_b64decode(padded))
+        if payload["o"] != order_by or payload["d"] not in DIRECTIONS:
+            raise InvalidCursorError("Cursor does not match the requested ordering")
+        return payload["d"], _load_value(order_by, payload["v"]), UUID(payload["id"])
+    except InvalidCursorError:
+        raise
+    except Exception as e:
+        raise InvalidCursorError("Malformed cursor") from e
+
+
+def apply_keyset(
+    query: Select,
+    order_by: str,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[Select, str]:
+    """
+    Order and bound a trend query for one keyset page.
+
+    Rows are ordered by (sort column, id) descending. One extra row is fetched
+    so the caller can tell whether another page exists in the read direction.
+
+    Returns:
+        Tuple[Select, str]: Paged query and the direction it reads in
+    """
+    sort_column = SORT_COLUMNS[order_by]
+    key = tuple_(sort_column, AdTrend.id)
+    direction = "next"
+
+    if cursor:
+        direction, value, row_id = decode_cursor(cursor, order_by)
+        bound = tuple_(
+            literal(value, type_=sort_column.type),
+            literal(row_id, type_=AdTrend.id.type)
+        )
+        query = query.where(key < bound if direction == "next" else key > bound)
+
+    if direction == "next":
+        query = query.order_by(sort_column.desc(), AdTrend.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), AdTrend.id.asc())
+    return query.limit(limit + 1), direction
+
+
+def page_rows(rows: List[Any], limit: int, direction: str) -> Tuple[List[Any], bool]:
+    """
+    Trim the look-ahead row and restore descending order.
+
+    Returns:
+        Tuple[List[Any], bool]: Rows for this page and whether more rows exist
+        beyond it in the read direction
+    """
+    has_more = len(rows) > limit
+    rows = list(rows[:limit])
+    if direction == "prev":
+        rows.reverse()
+    return rows, has_more
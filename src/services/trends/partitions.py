@@ -0,0 +1,213 @@
+"""
+Range partitioning of ad_trends by captured_at (PostgreSQL only).
+
+ad_trends is split into monthly partitions named ad_trends_pYYYY_MM, plus
+a DEFAULT partition for rows outside every range. A daily task keeps
+TREND_PARTITIONS_AHEAD months created ahead of time; archive.py detaches
+and exports partitions past TREND_RETENTION_MONTHS.
+
+Partitioned tables can only enforce unique indexes that include the
+partition key, so the primary key becomes (id, captured_at) and content_key
+deduplication moves to the ad_trend_keys registry (see storage.py).
+"""
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.schema import CreateIndex
+from src.db.models.intelligence import AdTrend
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "ad_trends"
+PARTITION_PREFIX = "ad_trends_p"
+DEFAULT_PARTITION = "ad_trends_default"
+# The pre-partitioning table, attached as one partition below the first month
+LEGACY_PARTITION = "ad_trends_legacy"
+
+# pg_get_expr(relpartbound) for a range partition
+_BOUND_PATTERN = re.compile(r"FROM \((MINVALUE|'[^']*')\) TO \((MAXVALUE|'[^']*')\)")
+
+
+class TrendPartition(BaseModel):
+    name: str
+    start: Optional[datetime] = None  # None for MINVALUE
+    end: Optional[datetime] = None  # None for MAXVALUE
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    index = moment.year * 12 + moment.month - 1 + months
+    return moment.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{PARTITION_PREFIX}{start:%Y_%m}"
+
+
+def _bound_value(raw: str) -> Optional[datetime]:
+    if raw in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(raw.strip("'"))
+
+
+def _literal(moment: datetime) -> str:
+    # Bounds are DDL, which takes no bind parameters
+    return f"'{moment.isoformat(sep=' ')}'"
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    result = await conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"
+    ), {"table": PARENT_TABLE})
+    return result.first() is not None
+
+
+async def list_partitions(conn: AsyncConnection) -> List[TrendPartition]:
+    """Attached range partitions ordered by lower bound; the DEFAULT partition is left out."""
+    result = await conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:table)
+    """), {"table": PARENT_TABLE})
+    partitions = []
+    for name, bound in result.all():
+        match = _BOUND_PATTERN.search(bound or "")
+        if match:
+            partitions.append(TrendPartition(
+                name=name, start=_bound_value(match.group(1)), end=_bound_value(match.group(2))
+            ))
+    return sorted(partitions, key=lambda p: p.start or datetime.min)
+
+
+async def ensure_partitions(conn: AsyncConnection, now: datetime, ahead: int) -> List[str]:
+    """
+    Create monthly partitions through `ahead` months past the current one.
+
+    Months already covered by an existing range (including the legacy
+    partition) are skipped. A month whose rows already landed in the
+    DEFAULT partition cannot be created; that is logged and left alone.
+
+    Returns:
+        List[str]: Names of the partitions created
+    """
+    partitions = await list_partitions(conn)
+    covered_until = max((p.end for p in partitions if p.end), default=None)
+    start = month_start(now)
+    if covered_until and covered_until > start:
+        start = month_start(covered_until)
+    last = add_months(month_start(now), ahead)
+
+    created = []
+    while start <= last:
+        end = add_months(start, 1)
+        name = partition_name(start)
+        if not any(p.start and p.start <= start < (p.end or datetime.max) for p in partitions):
+            try:
+                async with conn.begin_nested():
+                    await conn.execute(text(
+                        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT_TABLE} '
+                        f"FOR VALUES FROM ({_literal(start)}) TO ({_literal(end)})"
+                    ))
+                created.append(name)
+            except Exception as e:
+                logger.error(f"Could not create partition {name}: {e}")
+        start = end
+    return created
+
+
+async def detach_partition(conn: AsyncConnection, partition: TrendPartition) -> None:
+    """
+    Detach a partition and release its content keys.
+
+    Trends seen again after this are stored as new rows in a current
+    partition instead of pointing at data that is no longer queryable.
+    """
+    await conn.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{partition.name}"'))
+    conditions, params = ["captured_at < :end"], {"end": partition.end}
+    if partition.start is not None:
+        conditions.append("captured_at >= :start")
+        params["start"] = partition.start
+    await conn.execute(text(f"DELETE FROM ad_trend_keys WHERE {' AND '.join(conditions)}"), params)
+
+
+async def attach_partition(conn: AsyncConnection, partition: TrendPartition) -> None:
+    start = _literal(partition.start) if partition.start else "MINVALUE"
+    end = _literal(partition.end) if partition.end else "MAXVALUE"
+    await conn.execute(text(
+        f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION "{partition.name}" FOR VALUES FROM ({start}) TO ({end})'
+    ))
+    await conn.execute(text(f"""
+        INSERT INTO ad_trend_keys (content_key, trend_id, captured_at)
+        SELECT content_key, id, captured_at FROM "{partition.name}" WHERE content_key IS NOT NULL
+        ON CONFLICT (content_key) DO NOTHING
+    """))
+
+
+async def convert_to_partitioned(conn: AsyncConnection, now: datetime, ahead: int) -> None:
+    """
+    Turn an unpartitioned ad_trends into a partitioned one, in place.
+
+    The existing table is renamed to ad_trends_legacy and attached as the
+    partition for everything before next month, so no rows are copied; its
+    indexes are renamed and adopted by the new partitioned indexes where
+    they match. Only its (id, captured_at) primary key is built. Runs in
+    the caller's transaction and holds an ACCESS EXCLUSIVE lock on
+    ad_trends until it commits.
+
+    Raises:
+        RuntimeError: If ad_trends.data is not jsonb yet
+    """
+    data_type = (await conn.execute(text("""
+        SELECT data_type FROM information_schema.columns
+        WHERE table_name = :table AND column_name = 'data' AND table_schema = current_schema()
+    """), {"table": PARENT_TABLE})).scalar()
+    if data_type != "jsonb":
+        raise RuntimeError(
+            f"ad_trends.data is {data_type}; run scripts/migrate_trend_data_jsonb.py first"
+        )
+
+    await conn.execute(text(f"LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE"))
+    # The partition key cannot be NULL
+    await conn.execute(text(f"""
+        UPDATE {PARENT_TABLE} SET captured_at = COALESCE(updated_at, now() AT TIME ZONE 'utc')
+        WHERE captured_at IS NULL
+    """))
+    await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ALTER COLUMN captured_at SET NOT NULL"))
+    # A partition cannot keep a primary key of its own; the (id) key is
+    # replaced by the parent's (id, captured_at), which ATTACH then adopts
+    primary_key = await conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:table) AND contype = 'p'"
+    ), {"table": PARENT_TABLE})
+    for (constraint_name,) in primary_key.all():
+        await conn.execute(text(f'ALTER TABLE {PARENT_TABLE} DROP CONSTRAINT "{constraint_name}"'))
+    await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ADD PRIMARY KEY (id, captured_at)"))
+
+    await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_PARTITION}"))
+    indexes = await conn.execute(text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE i.indrelid = to_regclass(:table)"
+    ), {"table": LEGACY_PARTITION})
+    for (index_name,) in indexes.all():
+        await conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name[:55]}_legacy"'))
+
+    await conn.execute(text(
+        f"CREATE TABLE {PARENT_TABLE} (LIKE {LEGACY_PARTITION} INCLUDING DEFAULTS) "
+        f"PARTITION BY RANGE (captured_at)"
+    ))
+    await conn.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ADD CONSTRAINT {PARENT_TABLE}_pkey PRIMARY KEY (id, captured_at)"
+    ))
+    for index in AdTrend.__table__.indexes:
+        await conn.execute(CreateIndex(index))
+
+    first_month = add_months(month_start(now), 1)
+    await attach_partition(conn, TrendPartition(name=LEGACY_PARTITION, end=first_month))
+    await conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+    await ensure_partitions(conn, now, ahead)
@@ -0,0 +1,54 @@
+"""
+Column projection for trend listings.
+
+Maps the public AdTrendResponse field names onto SQL expressions so listing
+endpoints can select only the requested columns and serialize row tuples
+directly, without loading ORM objects or building a model per row.
+"""
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.sql.elements import ColumnElement
+from src.db.models.intelligence import AdTrend
+
+TREND_FIELDS: Dict[str, ColumnElement] = {
+    "id": AdTrend.id,
+    "platform": AdTrend.platform,
+    "trend_name": AdTrend.trend_name,
+    "trend_score": AdTrend.trend_score,
+    # Resolved on write; scripts/backfill_trend_descriptions.py fills older rows
+    "description": AdTrend.description,
+    "created_at": AdTrend.captured_at,  # Map captured_at to created_at
+    "updated_at": func.coalesce(AdTrend.updated_at, AdTrend.captured_at),
+    "format": AdTrend.format,
+    "industry": AdTrend.industry,
+    "trend_type": AdTrend.trend_type,
+    "data": AdTrend.data,
+    "is_active": AdTrend.is_active,
+}
+
+
+def parse_fields(raw: Optional[str]) -> List[str]:
+    """
+    Parse a comma-separated `fields` parameter.
+
+    `id` is always included so rows stay addressable. No value selects every field.
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not raw:
+        return list(TREND_FIELDS)
+    fields = ["id"]
+    for name in (part.strip() for part in raw.split(",")):
+        if not name or name in fields:
+            continue
+        if name not in TREND_FIELDS:
+            raise ValueError(
+                f"Unknown field '{name}'. Allowed fields: {', '.join(TREND_FIELDS)}"
+            )
+        fields.append(name)
+    return fields
+
+
+def projected_columns(fields: List[str]) -> List[ColumnElement]:
+    return [TREND_FIELDS[name].label(name) for name in fields]
@@ -2,6 +2,8 @@ from typing import List
 from src.services.trends.base import TrendProvider, TrendResult
 
 class MetaTrendProvider(TrendProvider):
+    name = "meta"
+
     async def fetch_trends(self, industry: str) -> List[TrendResult]:
         # Integrated with Production Env Var
         import os
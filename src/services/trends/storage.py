@@ -0,0 +1,288 @@
+"""
+Set-based persistence for AdTrend rows.
+
+Trends are written with a single multi-row INSERT ... ON CONFLICT per chunk,
+keyed on AdTrend.content_key, and the stored rows come back through RETURNING.
+This keeps ingestion at O(1) round-trips regardless of batch size.
+
+A partitioned ad_trends (TREND_PARTITIONING_ENABLED) cannot carry a unique
+index on content_key alone, so there the ad_trend_keys registry arbitrates
+conflicts instead; still a fixed number of statements per chunk.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from sqlalchemy import String, column, func, insert, or_, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config.settings import settings
+from src.db.models.intelligence import AdTrend, AdTrendKey, trend_content_key, trend_description
+import uuid
+
+# Rows per INSERT statement; keeps bind parameters well below the
+# Postgres (32767) and SQLite (32766) limits.
+INSERT_CHUNK_SIZE = 1000
+
+ON_CONFLICT_MODES = ("skip", "update")
+
+# A trend seen again keeps its updated_at unless it is older than this, so
+# repeated fetches do not churn listing version tokens
+SEEN_REFRESH_INTERVAL = timedelta(hours=1)
+
+# Columns refreshed from the incoming row when on_conflict="update"
+_UPSERT_COLUMNS = (
+    "format", "industry", "trend_type", "description", "trend_score", "data", "is_active", "updated_at"
+)
+
+
+def prepare_trend_row(values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill in keys and defaults for a trend row.
+
+    Multi-row VALUES statements need every row to carry the same columns, so
+    Python-side column defaults are resolved here instead of by the ORM.
+    """
+    now = datetime.utcnow()
+    row = dict(values)
+    row.setdefault("id", uuid.uuid4())
+    row.setdefault("captured_at", now)
+    # Always stamped by the write itself; listing version tokens depend on it
+    row["updated_at"] = now
+    row.setdefault("trend_score", 0.0)
+    row.setdefault("is_active", True)
+    if row.get("data") is None:
+        row["data"] = {}
+    row["content_key"] = trend_content_key(row["platform"], row["trend_name"])
+    row["description"] = trend_description(row["data"], row.get("trend_type"), row.get("industry"))
+    return row
+
+
+def _dedupe_rows(rows: List[Dict[str, Any]], keep_last: bool) -> List[Dict[str, Any]]:
+    # Postgres rejects an upsert that touches the same key twice in one statement
+    unique: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        if keep_last or row["content_key"] not in unique:
+            unique[row["content_key"]] = row
+    return list(unique.values())
+
+
+async def bulk_insert_trends(
+    db: AsyncSession,
+    rows: List[Dict[str, Any]],
+    on_conflict: str = "skip",
+) -> List[AdTrend]:
+    """
+    Insert trend rows in bulk, resolving duplicates on content_key.
+
+    Args:
+        db: Database session (not committed here)
+        rows: Column values per trend; see prepare_trend_row
+        on_conflict: "skip" keeps existing rows untouched, "update" overwrites
+            their mutable columns with the incoming values
+
+    Returns:
+        List[AdTrend]: Rows written by this call. With "skip" this is only the
+        newly inserted trends; with "update" it also includes refreshed ones.
+    """
+    if on_conflict not in ON_CONFLICT_MODES:
+        raise ValueError(f"on_conflict must be one of {ON_CONFLICT_MODES}")
+
+    prepared = _dedupe_rows(
+        [prepare_trend_row(row) for row in rows],
+        keep_last=on_conflict == "update"
+    )
+    if not prepared:
+        return []
+
+    dialect = db.get_bind().dialect.name
+    stored: List[AdTrend] = []
+    for start in range(0, len(prepared), INSERT_CHUNK_SIZE):
+        chunk = prepared[start:start + INSERT_CHUNK_SIZE]
+        if dialect == "postgresql" and settings.TREND_PARTITIONING_ENABLED:
+            stored.extend(await _upsert_chunk_registered(db, chunk, on_conflict))
+        elif dialect in ("postgresql", "sqlite"):
+            stored.extend(await _upsert_chunk(db, dialect, chunk, on_conflict))
+        else:
+            stored.extend(await _insert_chunk_fallback(db, chunk, on_conflict))
+    return stored
+
+
+async def _upsert_chunk(
+    db: AsyncSession,
+    dialect: str,
+    chunk: List[Dict[str, Any]],
+    on_conflict: str,
+) -> List[AdTrend]:
+    dialect_insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    stmt = dialect_insert(AdTrend).values(chunk)
+    if on_conflict == "update":
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AdTrend.content_key],
+            set_={name: stmt.excluded[name] for name in _UPSERT_COLUMNS}
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[AdTrend.content_key])
+
+    result = await db.scalars(
+        stmt.returning(AdTrend),
+        execution_options={"populate_existing": True}
+    )
+    return list(result.all())
+
+
+async def _upsert_chunk_registered(
+    db: AsyncSession,
+    chunk: List[Dict[str, Any]],
+    on_conflict: str,
+) -> List[AdTrend]:
+    """
+    Upsert through the ad_trend_keys registry.
+
+    Claiming keys first serializes concurrent writers of the same trend on
+    the registry's primary key, exactly as ON CONFLICT on ad_trends did.
+    Updates find their row by (id, captured_at), so only one partition is
+    touched per trend.
+    """
+    keys = AdTrendKey.__table__
+    claim = pg_insert(keys).values([
+        {"content_key": row["content_key"], "trend_id": row["id"], "captured_at": row["captured_at"]}
+        for row in chunk
+    ]).on_conflict_do_nothing(index_elements=[keys.c.content_key]).returning(keys.c.content_key)
+    claimed = set((await db.execute(claim)).scalars().all())
+
+    stored: List[AdTrend] = []
+    new_rows = [row for row in chunk if row["content_key"] in claimed]
+    if new_rows:
+        result = await db.scalars(
+            pg_insert(AdTrend).values(new_rows).returning(AdTrend),
+            execution_options={"populate_existing": True}
+        )
+        stored.extend(result.all())
+
+    updates = [row for row in chunk if row["content_key"] not in claimed]
+    if on_conflict == "update" and updates:
+        table = AdTrend.__table__
+        incoming = values(
+            column("content_key", String),
+            *(column(name, table.c[name].type) for name in _UPSERT_COLUMNS),
+            name="incoming"
+        ).data([
+            (row["content_key"], *(row[name] for name in _UPSERT_COLUMNS)) for row in updates
+        ])
+        stmt = (
+            update(AdTrend)
+            .where(
+                keys.c.content_key == incoming.c.content_key,
+                AdTrend.id == keys.c.trend_id,
+                AdTrend.captured_at == keys.c.captured_at,
+            )
+            .values({name: incoming.c[name] for name in _UPSERT_COLUMNS})
+            .returning(AdTrend)
+            # Refreshes trends already in the session from RETURNING, which
+            # populate_existing does not do for UPDATE here
+            .execution_options(synchronize_session="fetch")
+        )
+        result = await db.scalars(stmt)
+        stored.extend(result.all())
+    return stored
+
+
+async def _insert_chunk_fallback(
+    db: AsyncSession,
+    chunk: List[Dict[str, Any]],
+    on_conflict: str,
+) -> List[AdTrend]:
+    """Portable path for dialects without ON CONFLICT: one lookup, one insert."""
+    keys = [row["content_key"] for row in chunk]
+    existing = await db.execute(
+        select(AdTrend.content_key).where(AdTrend.content_key.in_(keys))
+    )
+    existing_keys = set(existing.scalars().all())
+
+    new_rows = [row for row in chunk if row["content_key"] not in existing_keys]
+    stored: List[AdTrend] = []
+    if new_rows:
+        result = await db.scalars(insert(AdTrend).returning(AdTrend), new_rows)
+        stored.extend(result.all())
+
+    if on_conflict == "update" and existing_keys:
+        updates = [row for row in chunk if row["content_key"] in existing_keys]
+        existing_rows = await db.scalars(
+            select(AdTrend).where(AdTrend.content_key.in_(existing_keys))
+        )
+        by_key = {trend.content_key: trend for trend in existing_rows.all()}
+        for row in updates:
+            trend = by_key[row["content_key"]]
+            for name in _UPSERT_COLUMNS:
+                setattr(trend, name, row[name])
+            stored.append(trend)
+        await db.flush()
+    return stored
+
+
+async def mark_trends_seen(db: AsyncSession, content_keys: List[str]) -> int:
+    """
+    Record that stored trends were returned by a provider again.
+
+    Sets is_active and bumps updated_at (at most every SEEN_REFRESH_INTERVAL),
+    so deactivate_stale_trends only retires trends providers stopped returning.
+    On a partitioned ad_trends rows are found through the ad_trend_keys
+    registry, as there is no content_key index across partitions.
+
+    Returns:
+        int: Number of trends refreshed (not committed here)
+    """
+    keys = sorted(set(content_keys))
+    if not keys:
+        return 0
+    now = datetime.utcnow()
+    stale = or_(
+        AdTrend.is_active.is_not(True),
+        AdTrend.updated_at.is_(None),
+        AdTrend.updated_at < now - SEEN_REFRESH_INTERVAL,
+    )
+    registry = db.get_bind().dialect.name == "postgresql" and settings.TREND_PARTITIONING_ENABLED
+    refreshed = 0
+    for start in range(0, len(keys), INSERT_CHUNK_SIZE):
+        chunk = keys[start:start + INSERT_CHUNK_SIZE]
+        stmt = update(AdTrend).values(is_active=True, updated_at=now)
+        if registry:
+            registered = AdTrendKey.__table__
+            stmt = stmt.where(
+                registered.c.content_key.in_(chunk),
+                AdTrend.id == registered.c.trend_id,
+                AdTrend.captured_at == registered.c.captured_at,
+            )
+        else:
+            stmt = stmt.where(AdTrend.content_key.in_(chunk))
+        result = await db.execute(
+            stmt.where(stale).execution_options(synchronize_session=False)
+        )
+        refreshed += result.rowcount
+    return refreshed
+
+
+async def deactivate_stale_trends(db: AsyncSession, active_days: int = settings.TREND_ACTIVE_DAYS) -> int:
+    """
+    Clear is_active on trends not written or seen (mark_trends_seen) for active_days.
+
+    updated_at is bumped too, so listing version tokens change. The
+    captured_at bound is implied (a trend captured after the cutoff was
+    written after it) but lets Postgres skip recent partitions.
+
+    Returns:
+        int: Number of trends deactivated (not committed here)
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=active_days)
+    result = await db.execute(
+        update(AdTrend)
+        .where(
+            AdTrend.is_active == True,
+            or_(AdTrend.captured_at < cutoff, AdTrend.captured_at.is_(None)),
+            func.coalesce(AdTrend.updated_at, AdTrend.captured_at, cutoff) <= cutoff,
+        )
+        .values(is_active=False, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -0,0 +1,74 @@
+"""
+Celery tasks for ad_trends retention.
+
+Named under src.services.trends, so celery_app routes them to the trends
+queue; manage_partitions and deactivate_stale_trends run from beat.
+"""
+from datetime import datetime
+from typing import Any, Dict
+from src.celery_app import celery_app, run_async
+from src.config.settings import settings
+from src.db.session import AsyncSessionLocal, engine
+from src.services.trends import archive, partitions
+from src.services.trends.storage import deactivate_stale_trends as _deactivate_stale_trends
+
+
+def _partitioning_available() -> bool:
+    return engine.dialect.name == "postgresql" and settings.TREND_PARTITIONING_ENABLED
+
+
+async def _manage_partitions() -> Dict[str, Any]:
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        if not await partitions.is_partitioned(conn):
+            return {"status": "skipped", "reason": "ad_trends is not partitioned"}
+        created = await partitions.ensure_partitions(conn, now, settings.TREND_PARTITIONS_AHEAD)
+    archived = await archive.archive_expired_partitions(engine, now)
+    return {"status": "ok", "created": created, "archived": archived}
+
+
+@celery_app.task(name='src.services.trends.tasks.manage_partitions')
+def manage_partitions() -> Dict[str, Any]:
+    """
+    Create upcoming monthly partitions and archive expired ones.
+
+    Returns:
+        dict: Partitions created and archived
+    """
+    if not _partitioning_available():
+        return {"status": "skipped", "reason": "TREND_PARTITIONING_ENABLED is off or not PostgreSQL"}
+    return run_async(_manage_partitions())
+
+
+@celery_app.task(name='src.services.trends.tasks.rehydrate_partition')
+def rehydrate_partition(partition_name: str) -> Dict[str, Any]:
+    """
+    Load an archived partition back from object storage.
+
+    Returns:
+        dict: Partition name, row count and when it was rehydrated
+    """
+    record = run_async(archive.rehydrate_partition(engine, partition_name))
+    return {
+        "partition": record["partition_name"],
+        "rows": record["row_count"],
+        "rehydrated_at": record["rehydrated_at"].isoformat(),
+    }
+
+
+async def _deactivate() -> int:
+    async with AsyncSessionLocal() as session:
+        count = await _deactivate_stale_trends(session)
+        await session.commit()
+    return count
+
+
+@celery_app.task(name='src.services.trends.tasks.deactivate_stale_trends')
+def deactivate_stale_trends() -> Dict[str, Any]:
+    """
+    Clear is_active on trends not written or fetched again for TREND_ACTIVE_DAYS.
+
+    Returns:
+        dict: Number of trends deactivated
+    """
+    return {"deactivated": run_async(_deactivate())}